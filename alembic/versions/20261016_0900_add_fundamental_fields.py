@@ -0,0 +1,41 @@
+"""add fundamental fields
+
+Revision ID: 20261016_0900
+Revises: 20260225_1409
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_0900"
+down_revision: Union[str, None] = "20260225_1409"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "fundamental_fields",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("symbol", sa.String(length=32), nullable=False),
+        sa.Column("field", sa.String(length=64), nullable=False),
+        sa.Column("value", sa.JSON(), nullable=True),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("symbol", "field", name="uq_fundamental_fields_symbol_field"),
+    )
+    op.create_index(op.f("ix_fundamental_fields_fetched_at"), "fundamental_fields", ["fetched_at"], unique=False)
+    op.create_index(op.f("ix_fundamental_fields_id"), "fundamental_fields", ["id"], unique=False)
+    op.create_index(op.f("ix_fundamental_fields_symbol"), "fundamental_fields", ["symbol"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_fundamental_fields_symbol"), table_name="fundamental_fields")
+    op.drop_index(op.f("ix_fundamental_fields_id"), table_name="fundamental_fields")
+    op.drop_index(op.f("ix_fundamental_fields_fetched_at"), table_name="fundamental_fields")
+    op.drop_table("fundamental_fields")
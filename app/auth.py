@@ -1,3 +1,4 @@
+import secrets
 from datetime import UTC, datetime
 
 from fastapi import Depends, HTTPException, Request, status
@@ -5,6 +6,7 @@ from fastapi.security import APIKeyHeader
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 
+from .config import settings
 from .db import get_db, initialize_database, sync_configured_api_keys
 from .models import APIKey, Subscription
 from .security import hash_api_key
@@ -63,3 +65,11 @@ def require_api_key(
     request.state.authenticated_api_key_id = api_key.id
 
     return x_api_key
+
+
+def require_master_key(x_api_key: str | None = Depends(api_key_header)) -> str:
+    if not x_api_key:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing API key")
+    if not secrets.compare_digest(x_api_key, settings.api_master_key):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Master API key required")
+    return x_api_key
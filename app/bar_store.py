@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BAR_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+_SESSION_PERIOD_RE = re.compile(r"^(\d+)d$")
+_CALENDAR_PERIODS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+
+@dataclass
+class StoredBars:
+    # columns is a (6, n) float64 array, one row per field: epoch seconds, then BAR_FIELDS.
+    columns: np.ndarray
+    tz: str | None
+    covered_from: float | None
+    covers_max: bool
+
+    @property
+    def last_epoch(self) -> float:
+        return float(self.columns[0, -1])
+
+    def covers(self, range_start: pd.Timestamp | None) -> bool:
+        if self.covers_max:
+            return True
+        if range_start is None or self.covered_from is None:
+            return False
+        return self.covered_from <= _epoch(range_start)
+
+    def frame(self, since: pd.Timestamp | None = None) -> pd.DataFrame:
+        first = 0
+        if since is not None:
+            first = int(np.searchsorted(self.columns[0], _epoch(since), side="left"))
+        window = np.array(self.columns[:, first:])
+        index = pd.to_datetime(window[0].astype(np.int64), unit="s", utc=True)
+        index = index.tz_convert(self.tz) if self.tz else index.tz_localize(None)
+        return pd.DataFrame({field: window[i + 1] for i, field in enumerate(BAR_FIELDS)}, index=index)
+
+
+def _epoch(ts: pd.Timestamp) -> float:
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.timestamp()
+
+
+class BarStore:
+    # One memory-mapped columnar .npy file (+ JSON coverage metadata) per symbol and
+    # interval. Bars accumulate across requests, so intraday series outlive Yahoo's
+    # short retention and repeat requests only fetch the bars after the last stored one.
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def read(self, symbol: str, interval: str) -> StoredBars | None:
+        bars_path, meta_path = self._paths(symbol, interval)
+        try:
+            meta = json.loads(meta_path.read_text())
+            columns = np.load(bars_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if columns.ndim != 2 or columns.shape[0] != len(BAR_FIELDS) + 1 or columns.shape[1] == 0:
+            return None
+        return StoredBars(
+            columns=columns,
+            tz=meta.get("tz"),
+            covered_from=meta.get("covered_from"),
+            covers_max=bool(meta.get("covers_max")),
+        )
+
+    def merge(
+        self,
+        symbol: str,
+        interval: str,
+        df: pd.DataFrame,
+        range_start: pd.Timestamp | None,
+        covers_max: bool = False,
+        range_end: pd.Timestamp | None = None,
+    ) -> StoredBars | None:
+        # df holds every bar from range_start (None: its first bar) up to its last bar, or
+        # up to range_end when the fetch was bounded by an explicit end.
+        if df.empty or not isinstance(df.index, pd.DatetimeIndex):
+            return self.read(symbol, interval)
+
+        with self._lock_for(symbol, interval):
+            existing = self.read(symbol, interval)
+            incoming = _to_columns(df)
+            tz = str(df.index.tz) if df.index.tz is not None else None
+            fetched_from = _epoch(range_start) if range_start is not None else float(incoming[0, 0])
+            fetched_to = float(incoming[0, -1])
+            if range_end is not None:
+                fetched_to = max(fetched_to, _epoch(range_end))
+
+            if existing is None:
+                combined = incoming
+                covered_from = fetched_from
+            else:
+                tz = existing.tz
+                combined = np.concatenate([np.array(existing.columns), incoming], axis=1)
+                # Later fetches win for duplicate timestamps (e.g. a still-forming last bar).
+                _, keep = np.unique(combined[0][::-1], return_index=True)
+                combined = combined[:, combined.shape[1] - 1 - keep]
+                if existing.covered_from is None or fetched_from > existing.last_epoch:
+                    covered_from = fetched_from
+                elif fetched_to >= existing.covered_from:
+                    covered_from = min(existing.covered_from, fetched_from)
+                    covers_max = covers_max or existing.covers_max
+                else:
+                    # An older range that stops short of the covered one: keep its bars, but
+                    # not a coverage claim across the gap between the two.
+                    covered_from = existing.covered_from
+                    covers_max = existing.covers_max
+
+            bars_path, meta_path = self._paths(symbol, interval)
+            bars_path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(bars_path, lambda fh: np.save(fh, combined))
+            meta = {"tz": tz, "covered_from": covered_from, "covers_max": covers_max}
+            _atomic_write(meta_path, lambda fh: fh.write(json.dumps(meta).encode()))
+            return StoredBars(columns=combined, tz=tz, covered_from=covered_from, covers_max=covers_max)
+
+    def load(
+        self,
+        symbol: str,
+        interval: str,
+        period: str,
+        start: date | None,
+        end: date | None,
+        now: pd.Timestamp,
+        fetch: Callable[..., pd.DataFrame],
+    ) -> pd.DataFrame:
+        stored = self.read(symbol, interval)
+        if stored is None:
+            return self._fetch_full(symbol, interval, period, start, end, now, fetch, None)
+
+        range_start = _range_start(period, start, now, stored.tz)
+        if not _is_session_period(period, start) and not stored.covers(range_start):
+            return self._fetch_full(symbol, interval, period, start, end, now, fetch, stored.tz)
+
+        end_ts = _localize(pd.Timestamp(end), stored.tz) if end is not None else None
+        if end_ts is None or _epoch(end_ts) > stored.last_epoch:
+            last_bar = pd.Timestamp(stored.last_epoch, unit="s", tz="UTC")
+            try:
+                tail = fetch(start=last_bar.to_pydatetime(), end=end)
+            except Exception:
+                return self._fetch_full(symbol, interval, period, start, end, now, fetch, stored.tz)
+            stored = self.merge(symbol, interval, tail, last_bar) or stored
+
+        selected = _select(stored, period, start, end_ts, now)
+        if selected.empty:
+            return self._fetch_full(symbol, interval, period, start, end, now, fetch, stored.tz)
+        return selected
+
+    def _fetch_full(self, symbol, interval, period, start, end, now, fetch, tz) -> pd.DataFrame:
+        df = fetch(period=period, start=start, end=end)
+        if df.empty or not isinstance(df.index, pd.DatetimeIndex):
+            return df
+        tz = str(df.index.tz) if df.index.tz is not None else None
+        if _is_session_period(period, start):
+            range_start = df.index[0].normalize()
+        else:
+            range_start = _range_start(period, start, now, tz)
+        range_end = _localize(pd.Timestamp(end), tz) if end is not None else None
+        self.merge(symbol, interval, df, range_start, covers_max=range_start is None, range_end=range_end)
+        return df
+
+    def _paths(self, symbol: str, interval: str) -> tuple[Path, Path]:
+        directory = self.root / interval
+        return directory / f"{symbol}.npy", directory / f"{symbol}.json"
+
+    def _lock_for(self, symbol: str, interval: str) -> threading.Lock:
+        key = f"{interval}:{symbol}"
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+
+def _to_columns(df: pd.DataFrame) -> np.ndarray:
+    index = df.index if df.index.tz is not None else df.index.tz_localize("UTC")
+    epochs = index.as_unit("s").asi8.astype(np.float64)
+    columns = [epochs]
+    for field in BAR_FIELDS:
+        if field in df.columns:
+            columns.append(pd.to_numeric(df[field], errors="coerce").to_numpy(dtype="float64"))
+        else:
+            columns.append(np.full(len(df), np.nan))
+    stacked = np.vstack(columns)
+    return stacked[:, np.argsort(stacked[0], kind="stable")]
+
+
+def _atomic_write(path: Path, write: Callable) -> None:
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            write(fh)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def _localize(ts: pd.Timestamp, tz: str | None) -> pd.Timestamp:
+    if ts.tzinfo is not None:
+        return ts.tz_convert(tz) if tz else ts.tz_convert("UTC").tz_localize(None)
+    return ts.tz_localize(tz) if tz else ts
+
+
+def _is_session_period(period: str, start: date | None) -> bool:
+    return start is None and _SESSION_PERIOD_RE.fullmatch(period) is not None
+
+
+def _range_start(period: str, start: date | None, now: pd.Timestamp, tz: str | None) -> pd.Timestamp | None:
+    if start is not None:
+        return _localize(pd.Timestamp(start), tz)
+    local_now = _localize(now, tz)
+    if period == "ytd":
+        return local_now.normalize().replace(month=1, day=1)
+    if period in _CALENDAR_PERIODS:
+        return local_now - _CALENDAR_PERIODS[period]
+    # "max" and trading-session periods ("1d", "5d") have no calendar lower bound.
+    return None
+
+
+def _select(
+    stored: StoredBars,
+    period: str,
+    start: date | None,
+    end_ts: pd.Timestamp | None,
+    now: pd.Timestamp,
+) -> pd.DataFrame:
+    session_match = _SESSION_PERIOD_RE.fullmatch(period) if start is None else None
+    if session_match:
+        sessions = int(session_match.group(1))
+        # Look back far enough to span weekends and holidays, then keep the last N sessions.
+        lookback = _localize(now, stored.tz) - pd.Timedelta(days=sessions * 2 + 7)
+        frame = stored.frame(since=lookback)
+        if end_ts is not None:
+            frame = frame[frame.index < end_ts]
+        session_days = frame.index.normalize().unique()
+        if len(session_days) < sessions:
+            return frame.iloc[0:0]
+        first_session = session_days[-sessions]
+        if not stored.covers(first_session):
+            return frame.iloc[0:0]
+        return frame[frame.index >= first_session]
+
+    range_start = _range_start(period, start, now, stored.tz)
+    frame = stored.frame(since=range_start)
+    if end_ts is not None:
+        frame = frame[frame.index < end_ts]
+    return frame
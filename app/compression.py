@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import gzip
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional; gzip still works without it
+    brotli = None
+
+
+def choose_encoding(accept_encoding: str, brotli_available: bool = brotli is not None) -> str | None:
+    # Honours q-values; prefers br over gzip when both are acceptable.
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    if brotli_available and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        # Flushes after every chunk so streamed responses reach the client incrementally.
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+def compress(data: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    # Negotiated gzip/brotli for 200 responses whose media type is in `media_types`.
+    # Bodies under minimum_size (when known up front) go out as-is; streamed bodies
+    # are compressed chunk by chunk.
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int,
+        media_types: set[str],
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.media_types = media_types
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, encoding, send).run(scope, receive)
+
+
+class _CompressedResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start_message: Message | None = None
+        self.pending: list[bytes] = []
+        self.pending_size = 0
+        self.compressor: _Compressor | None = None
+        self.passthrough = False
+
+    async def run(self, scope: Scope, receive: Receive) -> None:
+        await self.middleware.app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+            self.passthrough = (
+                message["status"] != 200
+                or "content-encoding" in headers
+                or media_type not in self.middleware.media_types
+            )
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.start_message is None:
+            await self._send_body(message.get("body", b""), message.get("more_body", False))
+            return
+
+        if self.passthrough:
+            start_message, self.start_message = self.start_message, None
+            await self.send(start_message)
+            await self.send(message)
+            return
+
+        # Wrapping middleware (BaseHTTPMiddleware) splits even small bodies into a chunk
+        # plus an empty terminator, so buffer until the size threshold or the end decides.
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        self.pending.append(body)
+        self.pending_size += len(body)
+        if more_body and self.pending_size < self.middleware.minimum_size:
+            return
+
+        start_message, self.start_message = self.start_message, None
+        body, self.pending = b"".join(self.pending), []
+        headers = MutableHeaders(raw=start_message["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        if not more_body and len(body) < self.middleware.minimum_size:
+            self.passthrough = True
+            headers["Content-Length"] = str(len(body))
+            await self.send(start_message)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # The encoded bytes differ from the identity representation the tag names.
+            headers["ETag"] = f"W/{etag}"
+
+        if not more_body:
+            compressed = compress(body, self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            headers["Content-Length"] = str(len(compressed))
+            await self.send(start_message)
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        del headers["Content-Length"]
+        self.compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+        await self.send(start_message)
+        await self._send_body(body, more_body=True)
+
+    async def _send_body(self, body: bytes, more_body: bool) -> None:
+        if self.passthrough or self.compressor is None:
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+        body = self.compressor.chunk(body)
+        if more_body:
+            await self.send({"type": "http.response.body", "body": body, "more_body": True})
+        else:
+            await self.send({"type": "http.response.body", "body": body + self.compressor.finish()})
@@ -18,6 +18,54 @@ class Settings(BaseSettings):
     app_base_url: str = Field(default="http://localhost:8000", alias="APP_BASE_URL")
     market_cache_ttl_seconds: int = Field(default=30, alias="MARKET_CACHE_TTL_SECONDS")
     market_cache_stale_window_seconds: int = Field(default=300, alias="MARKET_CACHE_STALE_WINDOW_SECONDS")
+    market_cache_stale_while_revalidate: bool = Field(default=False, alias="MARKET_CACHE_STALE_WHILE_REVALIDATE")
+    market_history_daily_ttl_seconds: int = Field(default=6 * 3600, alias="MARKET_HISTORY_DAILY_TTL_SECONDS")
+    market_bar_store_dir: str = Field(default="", alias="MARKET_BAR_STORE_DIR")
+    market_cache_max_entries: int = Field(default=5000, alias="MARKET_CACHE_MAX_ENTRIES")
+    market_cache_max_bytes: int = Field(default=64 * 1024 * 1024, alias="MARKET_CACHE_MAX_BYTES")
+    market_not_found_ttl_seconds: int = Field(default=300, alias="MARKET_NOT_FOUND_TTL_SECONDS")
+    market_not_found_max_entries: int = Field(default=10_000, alias="MARKET_NOT_FOUND_MAX_ENTRIES")
+    market_cache_redis_enabled: bool = Field(default=False, alias="MARKET_CACHE_REDIS_ENABLED")
+    market_cache_redis_timeout_seconds: float = Field(default=0.25, alias="MARKET_CACHE_REDIS_TIMEOUT_SECONDS")
+    market_upstream_max_workers: int = Field(default=32, alias="MARKET_UPSTREAM_MAX_WORKERS")
+    market_revalidate_max_workers: int = Field(default=4, alias="MARKET_REVALIDATE_MAX_WORKERS")
+    market_quotes_concurrency: int = Field(default=8, alias="MARKET_QUOTES_CONCURRENCY")
+    market_quotes_symbol_timeout_seconds: float = Field(default=5.0, alias="MARKET_QUOTES_SYMBOL_TIMEOUT_SECONDS")
+    market_quotes_max_symbols: int = Field(default=200, alias="MARKET_QUOTES_MAX_SYMBOLS")
+    market_quotes_batch_size: int = Field(default=50, alias="MARKET_QUOTES_BATCH_SIZE")
+    market_data_provider: str = Field(default="yfinance", alias="MARKET_DATA_PROVIDER")
+    market_synthetic_latency_seconds: float = Field(default=0.05, alias="MARKET_SYNTHETIC_LATENCY_SECONDS")
+    market_synthetic_jitter_seconds: float = Field(default=0.0, alias="MARKET_SYNTHETIC_JITTER_SECONDS")
+    market_synthetic_failure_rate: float = Field(default=0.0, alias="MARKET_SYNTHETIC_FAILURE_RATE")
+    market_synthetic_seed: int = Field(default=0, alias="MARKET_SYNTHETIC_SEED")
+    market_synthetic_unknown_symbols: str = Field(default="", alias="MARKET_SYNTHETIC_UNKNOWN_SYMBOLS")
+    market_upstream_pool_size: int = Field(default=32, alias="MARKET_UPSTREAM_POOL_SIZE")
+    market_yahoo_crumb_refresh_seconds: float = Field(default=6 * 3600, alias="MARKET_YAHOO_CRUMB_REFRESH_SECONDS")
+    market_upstream_max_in_flight: int = Field(default=16, alias="MARKET_UPSTREAM_MAX_IN_FLIGHT")
+    market_upstream_rate_per_second: float = Field(default=20.0, alias="MARKET_UPSTREAM_RATE_PER_SECOND")
+    market_upstream_burst: int = Field(default=40, alias="MARKET_UPSTREAM_BURST")
+    market_upstream_max_wait_seconds: float = Field(default=2.0, alias="MARKET_UPSTREAM_MAX_WAIT_SECONDS")
+    market_breaker_failure_ratio: float = Field(default=0.5, alias="MARKET_BREAKER_FAILURE_RATIO")
+    market_breaker_min_calls: int = Field(default=10, alias="MARKET_BREAKER_MIN_CALLS")
+    market_breaker_window: int = Field(default=20, alias="MARKET_BREAKER_WINDOW")
+    market_breaker_open_seconds: float = Field(default=30.0, alias="MARKET_BREAKER_OPEN_SECONDS")
+    market_breaker_slow_call_seconds: float = Field(default=5.0, alias="MARKET_BREAKER_SLOW_CALL_SECONDS")
+    market_prewarm_symbols: str = Field(default="", alias="MARKET_PREWARM_SYMBOLS")
+    market_prewarm_top_n: int = Field(default=0, alias="MARKET_PREWARM_TOP_N")
+    market_prewarm_interval_seconds: float = Field(default=20.0, alias="MARKET_PREWARM_INTERVAL_SECONDS")
+    market_prewarm_history_period: str = Field(default="1mo", alias="MARKET_PREWARM_HISTORY_PERIOD")
+    market_prewarm_concurrency: int = Field(default=4, alias="MARKET_PREWARM_CONCURRENCY")
+    market_history_batch_max_symbols: int = Field(default=25, alias="MARKET_HISTORY_BATCH_MAX_SYMBOLS")
+    market_history_batch_concurrency: int = Field(default=8, alias="MARKET_HISTORY_BATCH_CONCURRENCY")
+    market_history_symbol_timeout_seconds: float = Field(default=15.0, alias="MARKET_HISTORY_SYMBOL_TIMEOUT_SECONDS")
+    market_fundamentals_ttl_seconds: int = Field(default=24 * 3600, alias="MARKET_FUNDAMENTALS_TTL_SECONDS")
+    market_fundamentals_profile_ttl_seconds: int = Field(
+        default=7 * 24 * 3600,
+        alias="MARKET_FUNDAMENTALS_PROFILE_TTL_SECONDS",
+    )
+    market_fundamentals_refresh_enabled: bool = Field(default=True, alias="MARKET_FUNDAMENTALS_REFRESH_ENABLED")
+    market_fundamentals_refresh_hour_utc: int = Field(default=4, alias="MARKET_FUNDAMENTALS_REFRESH_HOUR_UTC")
+    market_fundamentals_refresh_concurrency: int = Field(default=2, alias="MARKET_FUNDAMENTALS_REFRESH_CONCURRENCY")
 
     api_master_key: str = Field(default="replace-me", alias="API_MASTER_KEY")
     api_valid_keys: str = Field(default="", alias="API_VALID_KEYS")
@@ -38,6 +86,13 @@ class Settings(BaseSettings):
     database_url: str = Field(default="sqlite:///./dev.db", alias="DATABASE_URL")
     redis_url: str = Field(default="redis://localhost:6379/0", alias="REDIS_URL")
     default_rate_limit: str = Field(default="60/minute", alias="DEFAULT_RATE_LIMIT")
+    compression_min_bytes: int = Field(default=1024, alias="COMPRESSION_MIN_BYTES")
+    compression_media_types: str = Field(
+        default="application/json,application/x-ndjson,text/csv,text/html,text/css,text/javascript,application/javascript",
+        alias="COMPRESSION_MEDIA_TYPES",
+    )
+    compression_gzip_level: int = Field(default=6, alias="COMPRESSION_GZIP_LEVEL")
+    compression_brotli_quality: int = Field(default=4, alias="COMPRESSION_BROTLI_QUALITY")
 
     @model_validator(mode="after")
     def apply_stripe_env_alias_fallbacks(self) -> "Settings":
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Iterable
+from datetime import UTC, datetime
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+from .models import Base, FundamentalField
+
+
+def _to_epoch(value: datetime) -> float:
+    # SQLite hands timezone-aware columns back naive; they were written as UTC.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value.timestamp()
+
+
+class FundamentalsStore:
+    # Fundamentals persisted one row per (symbol, field), each with its own fetch time, so
+    # slow-moving profile fields and daily metrics expire independently. A database outage
+    # reads as a miss and a skipped write, never as a failed request.
+
+    def __init__(
+        self,
+        default_ttl_seconds: float,
+        field_ttls: dict[str, float] | None = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.default_ttl_seconds = default_ttl_seconds
+        self.field_ttls = field_ttls or {}
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self._reads = 0
+        self._fresh_hits = 0
+        self._writes = 0
+        self._errors = 0
+
+    def ttl_for(self, field: str) -> float:
+        return self.field_ttls.get(field, self.default_ttl_seconds)
+
+    def get(self, symbol: str, fields: Iterable[str], now: float) -> tuple[dict | None, float]:
+        # Returns (payload, fresh_until). A field never stored (e.g. newly added) reads as
+        # None and makes the whole payload due for a refresh.
+        fields = list(fields)
+        try:
+            rows = self._run(
+                lambda db: db.execute(
+                    select(FundamentalField.field, FundamentalField.value, FundamentalField.fetched_at).where(
+                        FundamentalField.symbol == symbol
+                    )
+                ).all()
+            )
+        except SQLAlchemyError:
+            self._count(errors=1)
+            return None, 0.0
+        if not rows:
+            self._count(reads=1)
+            return None, 0.0
+
+        stored = {field: (value, _to_epoch(fetched_at)) for field, value, fetched_at in rows}
+        payload = {"symbol": symbol}
+        fresh_until = float("inf")
+        for field in fields:
+            if field not in stored:
+                payload[field] = None
+                fresh_until = 0.0
+                continue
+            value, fetched_at = stored[field]
+            payload[field] = value
+            fresh_until = min(fresh_until, fetched_at + self.ttl_for(field))
+        self._count(reads=1, fresh_hits=1 if now < fresh_until else 0)
+        return payload, fresh_until
+
+    def put(self, symbol: str, payload: dict, now: float) -> None:
+        fetched_at = datetime.fromtimestamp(now, UTC)
+        values = {field: value for field, value in payload.items() if field != "symbol"}
+
+        def upsert(db: Session) -> None:
+            existing = {
+                row.field: row
+                for row in db.execute(select(FundamentalField).where(FundamentalField.symbol == symbol)).scalars()
+            }
+            for field, value in values.items():
+                row = existing.get(field)
+                if row is None:
+                    db.add(FundamentalField(symbol=symbol, field=field, value=value, fetched_at=fetched_at))
+                else:
+                    row.value = value
+                    row.fetched_at = fetched_at
+            db.commit()
+
+        try:
+            self._run(upsert)
+        except SQLAlchemyError:
+            self._count(errors=1)
+            return
+        self._count(writes=1)
+
+    def symbols_fetched_before(self, cutoff: float) -> list[str]:
+        # Symbols with at least one field fetched before `cutoff`, oldest first.
+        cutoff_at = datetime.fromtimestamp(cutoff, UTC)
+        oldest = func.min(FundamentalField.fetched_at)
+        try:
+            return list(
+                self._run(
+                    lambda db: db.execute(
+                        select(FundamentalField.symbol)
+                        .group_by(FundamentalField.symbol)
+                        .having(oldest < cutoff_at)
+                        .order_by(oldest)
+                    ).scalars().all()
+                )
+            )
+        except SQLAlchemyError:
+            self._count(errors=1)
+            return []
+
+    def clear(self) -> None:
+        def delete_all(db: Session) -> None:
+            db.execute(delete(FundamentalField))
+            db.commit()
+
+        self._run(delete_all)
+
+    def stats(self) -> dict:
+        try:
+            symbols = self._run(
+                lambda db: db.execute(select(func.count(func.distinct(FundamentalField.symbol)))).scalar_one()
+            )
+        except SQLAlchemyError:
+            symbols = None
+        with self._lock:
+            return {
+                "symbols": symbols,
+                "reads": self._reads,
+                "fresh_hits": self._fresh_hits,
+                "writes": self._writes,
+                "errors": self._errors,
+                "default_ttl_seconds": self.default_ttl_seconds,
+            }
+
+    def _run(self, fn: Callable[[Session], object]):
+        try:
+            with self._session_factory() as db:
+                return fn(db)
+        except OperationalError:
+            # Same recovery as auth: a database created before this table existed gets it
+            # on first use, then the operation is retried once.
+            with self._session_factory() as db:
+                Base.metadata.create_all(bind=db.get_bind())
+                return fn(db)
+
+    def _count(self, reads: int = 0, fresh_hits: int = 0, writes: int = 0, errors: int = 0) -> None:
+        with self._lock:
+            self._reads += reads
+            self._fresh_hits += fresh_hits
+            self._writes += writes
+            self._errors += errors
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import csv
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CSV_MEDIA_TYPE = "text/csv"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+_CSV_CHUNK_ROWS = 1000
+_PRICE_FIELDS = ("open", "high", "low", "close")
+
+
+def history_csv(columns: dict[str, list], ts_key: str):
+    fields = ("ts", *_PRICE_FIELDS, "volume")
+    total = len(columns[ts_key])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(fields)
+    for offset in range(0, total, _CSV_CHUNK_ROWS):
+        window = slice(offset, offset + _CSV_CHUNK_ROWS)
+        writer.writerows(
+            zip(
+                columns[ts_key][window],
+                *(columns[field][window] for field in (*_PRICE_FIELDS, "volume")),
+            )
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def history_table(columns: dict[str, list], ts_format: str) -> pa.Table:
+    if ts_format == "epoch":
+        ts = pa.array(columns["epoch"], type=pa.int64())
+    else:
+        ts = pa.array(columns["epoch"], type=pa.int64()).cast(pa.timestamp("s", tz=columns.get("tz")))
+    arrays = {"ts": ts}
+    for field in _PRICE_FIELDS:
+        arrays[field] = pa.array(columns[field], type=pa.float64())
+    arrays["volume"] = pa.array(columns["volume"], type=pa.int64())
+    return pa.table(arrays)
+
+
+def history_parquet(columns: dict[str, list], ts_format: str) -> bytes:
+    sink = pa.BufferOutputStream()
+    pq.write_table(history_table(columns, ts_format), sink, compression="zstd")
+    return sink.getvalue().to_pybytes()
+
+
+def history_arrow(columns: dict[str, list], ts_format: str) -> bytes:
+    table = history_table(columns, ts_format)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -11,13 +11,23 @@ from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 
+from .compression import CompressionMiddleware
 from .config import settings
 from .db import SessionLocal, initialize_database, sync_configured_api_keys, verify_database_connection
 from .models import UsageLog
 from .rate_limit import limiter
 from .routes.billing import router as billing_router
 from .routes.customer_dashboard import router as customer_dashboard_router
-from .routes.market import router as market_router
+from .routes.market import (
+    router as market_router,
+    start_cache_prewarm,
+    start_fundamentals_refresh,
+    start_upstream_session,
+    stop_cache_prewarm,
+    stop_fundamentals_refresh,
+    stop_upstream_session,
+)
+from .routes.ops import router as ops_router
 
 app = FastAPI(
     title=settings.app_name,
@@ -73,9 +83,19 @@ async def record_usage_logs(request: Request, call_next):
                 db.commit()
 
 
+# Added last so it wraps every other middleware and compresses the final response body.
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_bytes,
+    media_types={m.strip().lower() for m in settings.compression_media_types.split(",") if m.strip()},
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+)
+
 app.include_router(market_router)
 app.include_router(billing_router)
 app.include_router(customer_dashboard_router)
+app.include_router(ops_router)
 
 WEB_DIR = Path(__file__).resolve().parents[1] / "web"
 CUSTOMER_DASHBOARD_DIR = WEB_DIR / "customer-dashboard"
@@ -95,6 +115,16 @@ def startup() -> None:
     verify_database_connection()
     initialize_database()
     sync_configured_api_keys()
+    start_upstream_session()
+    start_cache_prewarm()
+    start_fundamentals_refresh()
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    stop_fundamentals_refresh()
+    stop_cache_prewarm()
+    stop_upstream_session()
 
 
 @app.exception_handler(RequestValidationError)
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import json
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import redis
+
+_PURGE_EVERY_SETS = 256
+_REDIS_KEY_PREFIX = "yfapi:market:"
+_REDIS_ERROR_BACKOFF_SECONDS = 5.0
+
+
+@dataclass
+class CacheEntry:
+    created_at: float
+    payload: dict
+    size: int
+    fresh_until: float
+    expires_at: float
+
+
+def approx_size(value) -> int:
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(approx_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class MarketCache:
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self._sets_since_purge = 0
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str, now: float) -> tuple[dict | None, bool]:
+        entry, is_stale = self.get_entry(key, now)
+        return (entry.payload if entry is not None else None), is_stale
+
+    def get_entry(self, key: str, now: float) -> tuple[CacheEntry | None, bool]:
+        # Like get, but returns the entry itself so callers read the payload and its
+        # version (created_at, fresh_until) atomically.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None, False
+
+            if now > entry.expires_at:
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None, False
+
+            self._entries.move_to_end(key)
+            if now <= entry.fresh_until:
+                self._hits += 1
+                return entry, False
+            self._stale_hits += 1
+            return entry, True
+
+    def fresh_for(self, key: str, now: float) -> float:
+        # Seconds until key goes stale (0 if missing or stale), without touching stats or LRU order.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return 0.0
+            return max(0.0, entry.fresh_until - now)
+
+    def set(self, key: str, payload: dict, now: float, ttl: float, stale_window: float) -> None:
+        size = approx_size(payload)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+
+        entry = CacheEntry(
+            created_at=now,
+            payload=payload,
+            size=size,
+            fresh_until=now + ttl,
+            expires_at=now + max(ttl, stale_window),
+        )
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+
+            self._sets_since_purge += 1
+            if self._sets_since_purge >= _PURGE_EVERY_SETS or self._over_capacity():
+                self._purge_expired(now)
+
+            while self._over_capacity():
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._evictions += 1
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def purge_expired(self, now: float) -> int:
+        with self._lock:
+            return self._purge_expired(now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "stale_hits": self._stale_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def _over_capacity(self) -> bool:
+        return len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _purge_expired(self, now: float) -> int:
+        self._sets_since_purge = 0
+        expired = [key for key, entry in self._entries.items() if now > entry.expires_at]
+        for key in expired:
+            self._remove(key)
+        self._expirations += len(expired)
+        return len(expired)
+
+
+class RedisCacheTier:
+    # Shared L2 under the per-worker MarketCache. Redis failures never fail a request:
+    # they are counted and the tier is skipped for a short backoff.
+
+    def __init__(self, client, key_prefix: str = _REDIS_KEY_PREFIX):
+        self._client = client
+        self._key_prefix = key_prefix
+        self._lock = threading.Lock()
+        self._disabled_until = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+
+    def get(self, key: str) -> CacheEntry | None:
+        if self._backing_off():
+            return None
+        try:
+            raw = self._client.get(self._key_prefix + key)
+        except (redis.RedisError, OSError):
+            self._record_error()
+            return None
+
+        if raw is None:
+            with self._lock:
+                self._misses += 1
+            return None
+
+        try:
+            stored = json.loads(raw)
+            entry = CacheEntry(
+                created_at=stored["created_at"],
+                payload=stored["payload"],
+                size=len(raw),
+                fresh_until=stored["fresh_until"],
+                expires_at=stored["expires_at"],
+            )
+        except (TypeError, ValueError, KeyError):
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+        return entry
+
+    def set(self, key: str, payload: dict, now: float, ttl: float, stale_window: float) -> None:
+        if self._backing_off():
+            return
+        window = max(ttl, stale_window)
+        raw = json.dumps(
+            {
+                "created_at": now,
+                "fresh_until": now + ttl,
+                "expires_at": now + window,
+                "payload": payload,
+            },
+            separators=(",", ":"),
+        )
+        try:
+            self._client.set(self._key_prefix + key, raw, ex=max(1, math.ceil(window)))
+        except (redis.RedisError, OSError):
+            self._record_error()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "errors": self._errors,
+                "backing_off": time.monotonic() < self._disabled_until,
+            }
+
+    def _backing_off(self) -> bool:
+        return time.monotonic() < self._disabled_until
+
+    def _record_error(self) -> None:
+        with self._lock:
+            self._errors += 1
+            self._disabled_until = time.monotonic() + _REDIS_ERROR_BACKOFF_SECONDS
+
+
+def build_redis_tier(redis_url: str, timeout_seconds: float) -> RedisCacheTier:
+    client = redis.Redis.from_url(
+        redis_url,
+        socket_timeout=timeout_seconds,
+        socket_connect_timeout=timeout_seconds,
+    )
+    return RedisCacheTier(client)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from collections.abc import Callable, Iterable
+from datetime import UTC, datetime, timedelta
+
+from .upstream import map_bounded
+
+
+def seconds_until_utc_hour(hour: int, now: float) -> float:
+    current = datetime.fromtimestamp(now, UTC)
+    target = current.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if target <= current:
+        target += timedelta(days=1)
+    return (target - current).total_seconds()
+
+
+class SymbolDemand:
+    # Per-worker request counts, used to pick the top-N symbols to keep warm.
+
+    def __init__(self, max_tracked: int = 10_000):
+        self.max_tracked = max_tracked
+        self._lock = threading.Lock()
+        self._counts: Counter[str] = Counter()
+
+    def record(self, symbols: Iterable[str]) -> None:
+        with self._lock:
+            self._counts.update(symbols)
+            if len(self._counts) > self.max_tracked:
+                self._counts = Counter(dict(self._counts.most_common(self.max_tracked // 2)))
+
+    def top(self, n: int) -> list[str]:
+        if n <= 0:
+            return []
+        with self._lock:
+            return [symbol for symbol, _ in self._counts.most_common(n)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+class CachePrewarmer:
+    # Calls warm(symbol) for every symbol from symbols() once per interval (or after
+    # delay() seconds, for wall-clock schedules) on a daemon thread. warm() decides what to
+    # refresh; failures are counted and retried next cycle.
+
+    def __init__(
+        self,
+        warm: Callable[[str], None],
+        symbols: Callable[[], list[str]],
+        interval_seconds: float,
+        executor,
+        concurrency: int,
+        timeout_seconds: float,
+        delay: Callable[[], float] | None = None,
+        name: str = "market-prewarm",
+    ):
+        self._warm = warm
+        self._symbols = symbols
+        self.interval_seconds = interval_seconds
+        self._executor = executor
+        self._concurrency = concurrency
+        self._timeout_seconds = timeout_seconds
+        self._delay = delay
+        self.name = name
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._cycles = 0
+        self._warmed = 0
+        self._failed = 0
+        self._last_symbols = 0
+
+    def run_once(self) -> dict:
+        symbols = self._symbols()
+        outcomes = map_bounded(
+            self._executor,
+            self._warm,
+            symbols,
+            limit=self._concurrency,
+            timeout=self._timeout_seconds,
+        )
+        failed = sum(1 for _, error in outcomes if error is not None)
+        with self._lock:
+            self._cycles += 1
+            self._warmed += len(symbols) - failed
+            self._failed += failed
+            self._last_symbols = len(symbols)
+        return {"symbols": len(symbols), "failed": failed}
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "interval_seconds": self.interval_seconds,
+                "cycles": self._cycles,
+                "warmed": self._warmed,
+                "failed": self._failed,
+                "last_symbols": self._last_symbols,
+            }
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self._delay() if self._delay is not None else self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception:
+                # A broken cycle must not kill the thread; the next one retries.
+                with self._lock:
+                    self._failed += 1
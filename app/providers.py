@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+import zlib
+from collections.abc import Mapping
+from datetime import date, timedelta
+from typing import Protocol
+
+import numpy as np
+import pandas as pd
+import requests
+import yfinance as yf
+from yfinance.data import YfData
+
+YAHOO_BATCH_QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+
+# Yahoo's multi-symbol quote fields, keyed by the fast_info names every provider returns.
+_BATCH_QUOTE_FIELDS = {
+    "currency": "currency",
+    "exchange": "exchange",
+    "lastPrice": "regularMarketPrice",
+    "open": "regularMarketOpen",
+    "dayHigh": "regularMarketDayHigh",
+    "dayLow": "regularMarketDayLow",
+    "previousClose": "regularMarketPreviousClose",
+    "lastVolume": "regularMarketVolume",
+    "marketCap": "marketCap",
+}
+
+
+class MarketDataProvider(Protocol):
+    # Raw upstream shapes: quotes use yfinance fast_info names, fundamentals use info
+    # names and history is an Open/High/Low/Close/Volume frame. An empty mapping or frame
+    # means the symbol is unknown; market.py owns sanitizing and caching.
+    name: str
+
+    def quote(self, symbol: str) -> Mapping: ...
+
+    def quotes(self, symbols: list[str], timeout: float) -> dict[str, Mapping]: ...
+
+    def history(
+        self,
+        symbol: str,
+        period: str | None,
+        interval: str,
+        start: date | None,
+        end: date | None,
+    ) -> pd.DataFrame: ...
+
+    def fundamentals(self, symbol: str) -> Mapping: ...
+
+    def stats(self) -> dict: ...
+
+
+class YFinanceProvider:
+    name = "yfinance"
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+
+    def quote(self, symbol: str) -> Mapping:
+        return yf.Ticker(symbol).fast_info or {}
+
+    def quotes(self, symbols: list[str], timeout: float) -> dict[str, Mapping]:
+        # One upstream call for many symbols; symbols Yahoo does not return are simply absent.
+        response = YfData(session=self.session).get_raw_json(
+            YAHOO_BATCH_QUOTE_URL,
+            params={"symbols": ",".join(symbols), "formatted": "false"},
+            timeout=timeout,
+        )
+        rows = (response.get("quoteResponse") or {}).get("result") or []
+        requested = set(symbols)
+        infos = {}
+        for row in rows:
+            symbol = str(row.get("symbol") or "").upper()
+            if symbol in requested:
+                infos[symbol] = {name: row.get(field) for name, field in _BATCH_QUOTE_FIELDS.items()}
+        return infos
+
+    def history(self, symbol, period, interval, start, end) -> pd.DataFrame:
+        return yf.Ticker(symbol).history(period=period, interval=interval, start=start, end=end, auto_adjust=False)
+
+    def fundamentals(self, symbol: str) -> Mapping:
+        return yf.Ticker(symbol).info or {}
+
+    def stats(self) -> dict:
+        return {"name": self.name}
+
+
+class SyntheticUpstreamError(RuntimeError):
+    pass
+
+
+_SYNTHETIC_PERIOD_DAYS = {
+    "1d": 1,
+    "5d": 5,
+    "1mo": 30,
+    "3mo": 91,
+    "6mo": 182,
+    "1y": 365,
+    "2y": 730,
+    "5y": 1826,
+    "10y": 3652,
+    "max": 7305,
+}
+_SYNTHETIC_BAR_FREQ = {
+    "1m": "1min",
+    "2m": "2min",
+    "5m": "5min",
+    "15m": "15min",
+    "30m": "30min",
+    "60m": "60min",
+    "90m": "90min",
+    "1h": "60min",
+    "1d": "B",
+    "5d": "5B",
+    "1wk": "W-MON",
+    "1mo": "MS",
+    "3mo": "QS",
+}
+_SYNTHETIC_SECTORS = (
+    ("Technology", "Software"),
+    ("Healthcare", "Biotechnology"),
+    ("Financial Services", "Banks"),
+    ("Energy", "Oil & Gas"),
+    ("Consumer Cyclical", "Retail"),
+    ("Industrials", "Aerospace & Defense"),
+)
+_MARKET_TZ = "America/New_York"
+
+
+def _market_timestamp(value) -> pd.Timestamp:
+    # Dates and naive datetimes are market-local; aware ones (BarStore's tail fetch
+    # passes the last stored bar in UTC) are converted.
+    ts = pd.Timestamp(value)
+    return ts.tz_localize(_MARKET_TZ) if ts.tzinfo is None else ts.tz_convert(_MARKET_TZ)
+
+
+class SyntheticProvider:
+    # Deterministic market data for load and soak tests: every value is a pure function
+    # of (seed, symbol, timestamp), so repeated and overlapping requests agree. Each call
+    # sleeps latency_seconds (+ up to jitter_seconds) and fails with probability
+    # failure_rate; symbols in unknown_symbols come back empty, like delisted tickers.
+
+    name = "synthetic"
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        jitter_seconds: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+        unknown_symbols: frozenset[str] = frozenset(),
+        clock=time.time,
+        sleep=time.sleep,
+    ):
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.unknown_symbols = unknown_symbols
+        self._clock = clock
+        self._sleep = sleep
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._failures = 0
+
+    def quote(self, symbol: str) -> Mapping:
+        self._simulate_call()
+        if symbol in self.unknown_symbols:
+            return {}
+        return self._quote(symbol)
+
+    def quotes(self, symbols: list[str], timeout: float) -> dict[str, Mapping]:
+        self._simulate_call()
+        return {symbol: self._quote(symbol) for symbol in symbols if symbol not in self.unknown_symbols}
+
+    def history(self, symbol, period, interval, start, end) -> pd.DataFrame:
+        self._simulate_call()
+        if symbol in self.unknown_symbols:
+            return pd.DataFrame()
+        index = self._bar_index(period, interval, start, end)
+        if len(index) == 0:
+            return pd.DataFrame()
+        seconds = index.tz_convert("UTC").as_unit("s").asi8
+        close = self._prices(symbol, seconds)
+        spread = close * 0.01 * (0.5 + self._noise(symbol, seconds, salt=1))
+        open_ = close - spread * (self._noise(symbol, seconds, salt=2) - 0.5)
+        return pd.DataFrame(
+            {
+                "Open": open_,
+                "High": np.maximum(open_, close) + spread / 2,
+                "Low": np.minimum(open_, close) - spread / 2,
+                "Close": close,
+                "Volume": (1e5 + 1e6 * self._noise(symbol, seconds, salt=3)).astype(np.int64),
+            },
+            index=index,
+        )
+
+    def fundamentals(self, symbol: str) -> Mapping:
+        self._simulate_call()
+        if symbol in self.unknown_symbols:
+            return {}
+        h = self._symbol_hash(symbol)
+        sector, industry = _SYNTHETIC_SECTORS[h % len(_SYNTHETIC_SECTORS)]
+        base = self._base_price(symbol)
+        return {
+            "longName": f"{symbol} Synthetic Holdings",
+            "sector": sector,
+            "industry": industry,
+            "website": f"https://{symbol.lower()}.example.com",
+            "trailingPE": round(8 + (h % 400) / 10, 2),
+            "forwardPE": round(7 + (h % 350) / 10, 2),
+            "priceToBook": round(0.5 + (h % 120) / 10, 2),
+            "dividendYield": round((h % 60) / 1000, 4),
+            "beta": round(0.4 + (h % 160) / 100, 2),
+            "fiftyTwoWeekHigh": round(base * 1.25, 2),
+            "fiftyTwoWeekLow": round(base * 0.75, 2),
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "latency_seconds": self.latency_seconds,
+                "jitter_seconds": self.jitter_seconds,
+                "failure_rate": self.failure_rate,
+                "calls": self._calls,
+                "failures": self._failures,
+            }
+
+    def _simulate_call(self) -> None:
+        with self._lock:
+            self._calls += 1
+            jitter = self._random.random() * self.jitter_seconds
+            failed = self._random.random() < self.failure_rate
+            if failed:
+                self._failures += 1
+        delay = self.latency_seconds + jitter
+        if delay > 0:
+            self._sleep(delay)
+        if failed:
+            raise SyntheticUpstreamError("synthetic upstream failure")
+
+    def _quote(self, symbol: str) -> dict:
+        now = int(self._clock())
+        day = now - now % 86400
+        seconds = np.array([day - 86400, day, now], dtype=np.int64)
+        previous_close, open_, last = self._prices(symbol, seconds).tolist()
+        return {
+            "currency": "USD",
+            "exchange": "SYN",
+            "lastPrice": round(last, 4),
+            "open": round(open_, 4),
+            "dayHigh": round(max(open_, last) * 1.005, 4),
+            "dayLow": round(min(open_, last) * 0.995, 4),
+            "previousClose": round(previous_close, 4),
+            "lastVolume": int(1e5 + 1e6 * self._noise(symbol, seconds[2:], salt=3)[0]),
+            "marketCap": int(last * 1e9),
+        }
+
+    def _bar_index(self, period, interval, start, end) -> pd.DatetimeIndex:
+        freq = _SYNTHETIC_BAR_FREQ.get(interval, "B")
+        now = pd.Timestamp(self._clock(), unit="s", tz="UTC").tz_convert(_MARKET_TZ)
+        stop = _market_timestamp(end) if end is not None else now
+        if start is not None:
+            first = _market_timestamp(start)
+        elif period == "ytd":
+            first = pd.Timestamp(year=now.year, month=1, day=1, tz=_MARKET_TZ)
+        else:
+            first = stop - timedelta(days=_SYNTHETIC_PERIOD_DAYS.get(period, 30))
+        if freq.endswith("min"):
+            index = pd.date_range(first.ceil(freq), stop, freq=freq, inclusive="left")
+            index = index[index.dayofweek < 5]
+            return index[(index.hour * 60 + index.minute >= 570) & (index.hour < 16)]
+        return pd.date_range(first.normalize(), stop.normalize(), freq=freq, inclusive="left" if end else "both")
+
+    def _symbol_hash(self, symbol: str) -> int:
+        return zlib.crc32(f"{self.seed}:{symbol}".encode())
+
+    def _base_price(self, symbol: str) -> float:
+        return 20.0 + self._symbol_hash(symbol) % 48000 / 100
+
+    def _noise(self, symbol: str, seconds: np.ndarray, salt: int) -> np.ndarray:
+        # Per-timestamp uniform [0, 1) from an integer hash, independent of the window asked for.
+        x = seconds.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        x ^= np.uint64(self._symbol_hash(symbol) * 31 + salt)
+        x ^= x >> np.uint64(29)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(32)
+        return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+    def _prices(self, symbol: str, seconds: np.ndarray) -> np.ndarray:
+        days = seconds.astype(np.float64) / 86400
+        phase = self._symbol_hash(symbol) % 360
+        trend = 0.15 * np.sin(2 * np.pi * (days + phase) / 365) + 0.05 * np.sin(2 * np.pi * days / 29)
+        wiggle = 0.01 * (self._noise(symbol, seconds, salt=0) - 0.5)
+        return np.round(self._base_price(symbol) * (1 + trend + wiggle), 4)
+
+
+def build_provider(
+    name: str,
+    session: requests.Session,
+    synthetic_latency_seconds: float = 0.0,
+    synthetic_jitter_seconds: float = 0.0,
+    synthetic_failure_rate: float = 0.0,
+    synthetic_seed: int = 0,
+    synthetic_unknown_symbols: str = "",
+) -> MarketDataProvider:
+    name = name.strip().lower()
+    if name == YFinanceProvider.name:
+        return YFinanceProvider(session)
+    if name == SyntheticProvider.name:
+        return SyntheticProvider(
+            latency_seconds=synthetic_latency_seconds,
+            jitter_seconds=synthetic_jitter_seconds,
+            failure_rate=synthetic_failure_rate,
+            seed=synthetic_seed,
+            unknown_symbols=frozenset(s.strip().upper() for s in synthetic_unknown_symbols.split(",") if s.strip()),
+        )
+    raise ValueError(f"Unknown MARKET_DATA_PROVIDER {name!r}; expected 'yfinance' or 'synthetic'")
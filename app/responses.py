@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# NaN/Infinity (Python and numpy) become null, matching _to_finite_float; datetimes and
+# numpy scalars/arrays are serialized natively.
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    # Only reached for types orjson does not know, e.g. pd.Timestamp (a datetime subclass).
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    # Return it directly from a handler: FastAPI only skips its jsonable_encoder pass for
+    # Response instances, not for dicts rendered through response_class.
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
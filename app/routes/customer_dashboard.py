@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 
 from app.db import get_db, initialize_database
 from app.models import DashboardSession, User
+from app.responses import FastJSONResponse
 from app.security import hash_session_token, hash_password, verify_password
 
 from .dashboard_data import (
@@ -28,7 +29,7 @@ from .dashboard_data import (
     rotate_dashboard_key,
 )
 
-router = APIRouter(prefix="/dashboard/api", tags=["customer-dashboard"])
+router = APIRouter(prefix="/dashboard/api", tags=["customer-dashboard"], default_response_class=FastJSONResponse)
 
 
 class CustomerRegisterRequest(BaseModel):
@@ -211,11 +212,13 @@ def customer_register(payload: CustomerRegisterRequest, db: Session = Depends(ge
     db.refresh(user)
 
     session = _issue_session(db, user)
-    return {
-        "ok": True,
-        "source": "customer-db-session",
-        "session": _session_payload(session),
-    }
+    return FastJSONResponse(
+        {
+            "ok": True,
+            "source": "customer-db-session",
+            "session": _session_payload(session),
+        }
+    )
 
 
 @router.post("/session/login")
@@ -225,11 +228,13 @@ def customer_dashboard_login(payload: CustomerSessionLoginRequest, db: Session =
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     session = _issue_session(db, user)
-    return {
-        "ok": True,
-        "source": "customer-db-session",
-        "session": _session_payload(session),
-    }
+    return FastJSONResponse(
+        {
+            "ok": True,
+            "source": "customer-db-session",
+            "session": _session_payload(session),
+        }
+    )
 
 
 @router.post("/session/logout")
@@ -243,19 +248,23 @@ def customer_dashboard_logout(
         record.revoked_at = datetime.now(UTC)
         db.commit()
 
-    return {
-        "ok": True,
-        "source": "customer-db-session",
-    }
+    return FastJSONResponse(
+        {
+            "ok": True,
+            "source": "customer-db-session",
+        }
+    )
 
 
 @router.get("/session/me")
 def customer_dashboard_me(session: CustomerSessionContext = Depends(require_customer_session)):
-    return {
-        "ok": True,
-        "source": "customer-db-session",
-        "session": _session_payload(session),
-    }
+    return FastJSONResponse(
+        {
+            "ok": True,
+            "source": "customer-db-session",
+            "session": _session_payload(session),
+        }
+    )
 
 
 @router.get("/overview")
@@ -265,14 +274,16 @@ def get_customer_dashboard_overview(
     db: Session = Depends(get_db),
 ):
     payload = get_dashboard_overview(db, session.user_id, range)
-    return {
-        **payload,
-        "source": "customer-db-store",
-        "scope": {
-            "tenantId": session.tenant_id,
-            "email": session.email,
-        },
-    }
+    return FastJSONResponse(
+        {
+            **payload,
+            "source": "customer-db-store",
+            "scope": {
+                "tenantId": session.tenant_id,
+                "email": session.email,
+            },
+        }
+    )
 
 
 @router.get("/metrics")
@@ -282,14 +293,16 @@ def get_customer_dashboard_metrics(
     db: Session = Depends(get_db),
 ):
     payload = get_dashboard_metrics(db, session.user_id, range)
-    return {
-        **payload,
-        "source": "customer-db-store",
-        "scope": {
-            "tenantId": session.tenant_id,
-            "email": session.email,
-        },
-    }
+    return FastJSONResponse(
+        {
+            **payload,
+            "source": "customer-db-store",
+            "scope": {
+                "tenantId": session.tenant_id,
+                "email": session.email,
+            },
+        }
+    )
 
 
 @router.get("/activity")
@@ -308,14 +321,16 @@ def get_customer_dashboard_activity(
         action=action,
         limit=limit,
     )
-    return {
-        **payload,
-        "source": "customer-db-store",
-        "scope": {
-            "tenantId": session.tenant_id,
-            "email": session.email,
-        },
-    }
+    return FastJSONResponse(
+        {
+            **payload,
+            "source": "customer-db-store",
+            "scope": {
+                "tenantId": session.tenant_id,
+                "email": session.email,
+            },
+        }
+    )
 
 
 @router.get("/keys")
@@ -324,14 +339,16 @@ def get_customer_dashboard_keys(
     db: Session = Depends(get_db),
 ):
     payload = get_dashboard_keys(db, session.user_id)
-    return {
-        **payload,
-        "source": "customer-db-store",
-        "scope": {
-            "tenantId": session.tenant_id,
-            "email": session.email,
-        },
-    }
+    return FastJSONResponse(
+        {
+            **payload,
+            "source": "customer-db-store",
+            "scope": {
+                "tenantId": session.tenant_id,
+                "email": session.email,
+            },
+        }
+    )
 
 
 @router.post("/keys/create")
@@ -346,7 +363,7 @@ def create_customer_dashboard_key(
         "tenantId": session.tenant_id,
         "email": session.email,
     }
-    return response
+    return FastJSONResponse(response)
 
 
 @router.post("/keys/{key_id}/rotate")
@@ -361,7 +378,7 @@ def rotate_customer_dashboard_key(
         "tenantId": session.tenant_id,
         "email": session.email,
     }
-    return response
+    return FastJSONResponse(response)
 
 
 @router.post("/keys/{key_id}/revoke")
@@ -376,7 +393,7 @@ def revoke_customer_dashboard_key(
         "tenantId": session.tenant_id,
         "email": session.email,
     }
-    return response
+    return FastJSONResponse(response)
 
 
 @router.post("/keys/{key_id}/activate")
@@ -391,4 +408,4 @@ def activate_customer_dashboard_key(
         "tenantId": session.tenant_id,
         "email": session.email,
     }
-    return response
+    return FastJSONResponse(response)
@@ -1,23 +1,195 @@
+import asyncio
 from datetime import date
+import hashlib
+import json
 import math
 import re
-import threading
 import time
+
+import numpy as np
+import pandas as pd
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-import yfinance as yf
+from fastapi.responses import Response, StreamingResponse
 
 from ..auth import require_api_key
+from ..bar_store import BarStore
 from ..config import settings
+from ..fundamentals_store import FundamentalsStore
+from ..history_export import (
+    ARROW_MEDIA_TYPE,
+    CSV_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    history_arrow,
+    history_csv,
+    history_parquet,
+)
+from ..market_cache import MarketCache, build_redis_tier
+from ..prewarm import CachePrewarmer, SymbolDemand, seconds_until_utc_hour
+from ..providers import build_provider
 from ..rate_limit import default_market_rate_limit, limiter
-
-router = APIRouter(prefix="/v1", tags=["market"])
+from ..responses import FastJSONResponse, dumps
+from ..upstream import (
+    CircuitBreaker,
+    CircuitOpenError,
+    SingleFlight,
+    UpstreamBusyError,
+    MeteredThreadPoolExecutor,
+    UpstreamGovernor,
+    amap_bounded,
+)
+from ..yahoo_session import YahooSession
+
+router = APIRouter(prefix="/v1", tags=["market"], default_response_class=FastJSONResponse)
 
 SYMBOL_RE = re.compile(r"^[A-Z0-9.\-]{1,15}$")
 ALLOWED_PERIODS = {"1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"}
 ALLOWED_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"}
-
-_CACHE_LOCK = threading.Lock()
-_CACHE: dict[str, tuple[float, dict]] = {}
+HISTORY_JSON_FORMATS = {"rows", "columns"}
+HISTORY_FORMATS = HISTORY_JSON_FORMATS | {"csv", "parquet", "arrow"}
+HISTORY_TS_FORMATS = {"iso", "epoch"}
+HISTORY_FIELDS = ("open", "high", "low", "close", "volume")
+# Profile fields rarely change and keep MARKET_FUNDAMENTALS_PROFILE_TTL_SECONDS; the
+# valuation/range metrics use MARKET_FUNDAMENTALS_TTL_SECONDS.
+FUNDAMENTALS_PROFILE_FIELDS = ("long_name", "sector", "industry", "website")
+FUNDAMENTALS_FIELDS = FUNDAMENTALS_PROFILE_FIELDS + (
+    "trailing_pe",
+    "forward_pe",
+    "price_to_book",
+    "dividend_yield",
+    "beta",
+    "fifty_two_week_high",
+    "fifty_two_week_low",
+)
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Accept header media types that select a history output format.
+_HISTORY_ACCEPT_FORMATS = {
+    CSV_MEDIA_TYPE: "csv",
+    PARQUET_MEDIA_TYPE: "parquet",
+    ARROW_MEDIA_TYPE: "arrow",
+}
+_NDJSON_CHUNK_ROWS = 500
+
+# Intraday history is cached for one bar length; daily and longer bars use
+# MARKET_HISTORY_DAILY_TTL_SECONDS.
+_INTRADAY_INTERVAL_SECONDS = {
+    "1m": 60,
+    "2m": 120,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "60m": 3600,
+    "90m": 5400,
+    "1h": 3600,
+}
+
+
+class _SymbolNotFound(LookupError):
+    pass
+
+
+_CACHE = MarketCache(
+    max_entries=settings.market_cache_max_entries,
+    max_bytes=settings.market_cache_max_bytes,
+)
+# "Not found" outcomes (empty fast_info/info/history) per cache key, so unknown or delisted
+# symbols answer 404 without an upstream call. Any later successful load drops the entry.
+_NOT_FOUND = MarketCache(
+    max_entries=settings.market_not_found_max_entries,
+    max_bytes=settings.market_cache_max_bytes,
+)
+_L2 = (
+    build_redis_tier(settings.redis_url, settings.market_cache_redis_timeout_seconds)
+    if settings.market_cache_redis_enabled
+    else None
+)
+_BAR_STORE = BarStore(settings.market_bar_store_dir) if settings.market_bar_store_dir else None
+_INFLIGHT = SingleFlight()
+_BREAKER = CircuitBreaker(
+    failure_ratio=settings.market_breaker_failure_ratio,
+    min_calls=settings.market_breaker_min_calls,
+    window=settings.market_breaker_window,
+    open_seconds=settings.market_breaker_open_seconds,
+    slow_call_seconds=settings.market_breaker_slow_call_seconds,
+    ignored=(_SymbolNotFound,),
+)
+_GOVERNOR = UpstreamGovernor(
+    max_in_flight=settings.market_upstream_max_in_flight,
+    rate_per_second=settings.market_upstream_rate_per_second,
+    burst=settings.market_upstream_burst,
+    max_wait_seconds=settings.market_upstream_max_wait_seconds,
+)
+# Market routes are async and run all blocking work (cache tiers, Yahoo calls, payload
+# conversion) here, leaving Starlette's default threadpool to auth, DB and dashboard work.
+_UPSTREAM_EXECUTOR = MeteredThreadPoolExecutor(
+    max_workers=settings.market_upstream_max_workers,
+    thread_name_prefix="market-upstream",
+)
+# Stale-while-revalidate refreshes run on their own small pool. Requests, pre-warming and
+# the fundamentals refresh join an in-flight refresh from _UPSTREAM_EXECUTOR threads, so a
+# refresh queued behind them on that pool could never start once it saturates.
+_REVALIDATE_EXECUTOR = MeteredThreadPoolExecutor(
+    max_workers=settings.market_revalidate_max_workers,
+    thread_name_prefix="market-revalidate",
+)
+_YAHOO = YahooSession(
+    pool_size=settings.market_upstream_pool_size,
+    crumb_refresh_seconds=settings.market_yahoo_crumb_refresh_seconds,
+)
+_YAHOO.install()
+_PROVIDER = build_provider(
+    settings.market_data_provider,
+    session=_YAHOO.session,
+    synthetic_latency_seconds=settings.market_synthetic_latency_seconds,
+    synthetic_jitter_seconds=settings.market_synthetic_jitter_seconds,
+    synthetic_failure_rate=settings.market_synthetic_failure_rate,
+    synthetic_seed=settings.market_synthetic_seed,
+    synthetic_unknown_symbols=settings.market_synthetic_unknown_symbols,
+)
+_DEMAND = SymbolDemand()
+_PREWARMER = CachePrewarmer(
+    warm=lambda symbol: _prewarm_symbol(symbol),
+    symbols=lambda: _prewarm_symbols(),
+    interval_seconds=settings.market_prewarm_interval_seconds,
+    executor=_UPSTREAM_EXECUTOR,
+    concurrency=settings.market_prewarm_concurrency,
+    timeout_seconds=settings.market_history_symbol_timeout_seconds,
+)
+_FUNDAMENTALS = FundamentalsStore(
+    default_ttl_seconds=settings.market_fundamentals_ttl_seconds,
+    field_ttls={field: settings.market_fundamentals_profile_ttl_seconds for field in FUNDAMENTALS_PROFILE_FIELDS},
+)
+# Nightly pass over every stored symbol; rows fetched within the last half day are skipped,
+# so when several workers wake at the same hour only the first one goes upstream.
+_FUNDAMENTALS_REFRESHER = CachePrewarmer(
+    warm=lambda symbol: _refresh_fundamentals(symbol),
+    symbols=lambda: _FUNDAMENTALS.symbols_fetched_before(time.time() - 12 * 3600),
+    interval_seconds=24 * 3600,
+    executor=_UPSTREAM_EXECUTOR,
+    concurrency=settings.market_fundamentals_refresh_concurrency,
+    timeout_seconds=settings.market_history_symbol_timeout_seconds,
+    delay=lambda: seconds_until_utc_hour(settings.market_fundamentals_refresh_hour_utc, time.time()),
+    name="fundamentals-refresh",
+)
+
+
+async def _run_blocking(fn, *args):
+    return await asyncio.wrap_future(_UPSTREAM_EXECUTOR.submit(fn, *args))
+
+
+def _call_upstream(fn):
+    # Every Yahoo call passes the circuit breaker first, so an open circuit fails fast
+    # instead of queueing on the governor; only fn itself is timed as upstream latency.
+    return _BREAKER.call(fn, gate=_GOVERNOR.call)
+
+
+def _upstream_http_error(exc: Exception) -> HTTPException:
+    if isinstance(exc, (CircuitOpenError, UpstreamBusyError)):
+        return HTTPException(
+            status_code=503,
+            detail="Upstream provider temporarily unavailable",
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+        )
+    return HTTPException(status_code=502, detail=f"Upstream provider error: {exc}")
 
 
 def _normalize_symbol(raw_symbol: str) -> str:
@@ -27,26 +199,93 @@ def _normalize_symbol(raw_symbol: str) -> str:
     return symbol
 
 
-def _cache_get(key: str) -> tuple[dict | None, bool]:
+def _cache_get(key: str) -> tuple[dict | None, bool, tuple[float, float] | None]:
+    # Returns (payload, stale, version); version is the entry's (created_at, fresh_until),
+    # read together with the payload so a concurrent refresh cannot pair it with another.
     now = time.time()
-    with _CACHE_LOCK:
-        entry = _CACHE.get(key)
-
-    if entry is None:
-        return None, False
-
-    created_at, payload = entry
-    age = now - created_at
-    if age <= settings.market_cache_ttl_seconds:
-        return payload, False
-    if age <= settings.market_cache_stale_window_seconds:
-        return payload, True
-    return None, False
-
-
-def _cache_set(key: str, payload: dict) -> None:
-    with _CACHE_LOCK:
-        _CACHE[key] = (time.time(), payload)
+    cached, is_stale = _CACHE.get_entry(key, now)
+    payload = cached.payload if cached is not None else None
+    version = (cached.created_at, cached.fresh_until) if cached is not None else None
+    if _L2 is None or (payload is not None and not is_stale):
+        return payload, is_stale, version
+
+    # L1 missed or only holds a stale copy: another worker may have refreshed the key.
+    entry = _L2.get(key)
+    if entry is None or now > entry.expires_at:
+        return payload, is_stale, version
+    if now > entry.fresh_until and payload is not None:
+        return payload, is_stale, version
+
+    _CACHE.set(
+        key,
+        entry.payload,
+        entry.created_at,
+        ttl=entry.fresh_until - entry.created_at,
+        stale_window=entry.expires_at - entry.created_at,
+    )
+    return entry.payload, now > entry.fresh_until, (entry.created_at, entry.fresh_until)
+
+
+def _cache_set(key: str, payload: dict, ttl: int | None = None) -> tuple[float, float]:
+    # Returns the version of the entry written, as _cache_get would report it.
+    now = time.time()
+    _NOT_FOUND.delete(key)
+    if ttl is None:
+        ttl = settings.market_cache_ttl_seconds
+    # Every entry keeps the same stale margin past its own TTL as quotes do.
+    stale_margin = max(0, settings.market_cache_stale_window_seconds - settings.market_cache_ttl_seconds)
+    stale_window = ttl + stale_margin
+    _CACHE.set(key, payload, now, ttl=ttl, stale_window=stale_window)
+    if _L2 is not None:
+        _L2.set(key, payload, now, ttl=ttl, stale_window=stale_window)
+    return now, now + ttl
+
+
+def _known_not_found(key: str) -> bool:
+    payload, _ = _NOT_FOUND.get(key, time.time())
+    return payload is not None
+
+
+def _remember_not_found(key: str) -> None:
+    ttl = settings.market_not_found_ttl_seconds
+    if ttl > 0:
+        _NOT_FOUND.set(key, {"not_found": True}, time.time(), ttl=ttl, stale_window=ttl)
+
+
+def _entry_validator(
+    cache_key: str,
+    payload: dict,
+    stale: bool,
+    version: tuple[float, float] | None,
+    variant: str = "",
+) -> tuple[str, int]:
+    # Validator for a served payload: the key and creation time of the cache entry it was
+    # read from (no serialization), or a content digest when it has no entry version.
+    # Returns (tag, seconds the payload stays fresh).
+    if version is None:
+        digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+        return f"{cache_key}:{digest}:{variant}:{stale}", 0
+    created_at, fresh_until = version
+    max_age = 0 if stale else max(0, int(fresh_until - time.time()))
+    return f"{cache_key}:{created_at!r}:{variant}:{stale}", max_age
+
+
+def _conditional_headers(tags: list[str], max_age: int) -> dict[str, str]:
+    # Weak: the tag covers the data, while the body's "cached" flag differs between the
+    # request that loaded an entry and the ones served from it.
+    digest = hashlib.sha256("\n".join(tags).encode()).hexdigest()[:32]
+    return {"ETag": f'W/"{digest}"', "Cache-Control": f"private, max-age={max_age}"}
+
+
+def _not_modified(request: Request, headers: dict[str, str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x".
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return headers["ETag"].removeprefix("W/") in candidates
 
 
 def _to_finite_float(value) -> float | None:
@@ -75,6 +314,374 @@ def _safe_info_get(info, key: str):
         raise RuntimeError(f"failed to read upstream field '{key}': {exc}") from exc
 
 
+def _read_through(
+    cache_key: str, loader, ttl: int | None = None
+) -> tuple[dict, bool, bool, tuple[float, float] | None]:
+    # Returns (payload, stale, cached, version). Not-found outcomes are never masked by
+    # stale entries.
+    cached, is_stale, version = _cache_get(cache_key)
+    if cached is not None and not is_stale:
+        return cached, False, True, version
+    if _known_not_found(cache_key):
+        raise _SymbolNotFound(cache_key)
+    if cached is not None and settings.market_cache_stale_while_revalidate:
+        _revalidate(cache_key, loader, ttl)
+        return cached, True, True, version
+    return _load_or_fallback(cache_key, loader, cached, version, ttl)
+
+
+def _caching_loader(cache_key: str, loader, ttl: int | None = None, persist=None):
+    # Only the loader runs inside _call_upstream; persist(payload) (e.g. a database write)
+    # runs after it, so its latency never counts against the breaker or a governor slot.
+    # Single-flight callers get (payload, version of the entry it was cached as).
+    def load_and_cache() -> tuple[dict, tuple[float, float]]:
+        try:
+            payload = _call_upstream(loader)
+        except _SymbolNotFound:
+            _remember_not_found(cache_key)
+            raise
+        version = _cache_set(cache_key, payload, ttl)
+        if persist is not None:
+            persist(payload)
+        return payload, version
+
+    return load_and_cache
+
+
+def _revalidate(cache_key: str, loader, ttl: int | None = None, persist=None) -> None:
+    # At most one background refresh per key; foreground misses for the key join it.
+    _INFLIGHT.submit(_REVALIDATE_EXECUTOR, cache_key, _caching_loader(cache_key, loader, ttl, persist))
+
+
+def _load_or_fallback(
+    cache_key: str,
+    loader,
+    stale_payload: dict | None,
+    stale_version: tuple[float, float] | None = None,
+    ttl: int | None = None,
+    persist=None,
+) -> tuple[dict, bool, bool, tuple[float, float] | None]:
+    try:
+        payload, version = _INFLIGHT.do(cache_key, _caching_loader(cache_key, loader, ttl, persist))
+    except _SymbolNotFound:
+        raise
+    except Exception:
+        if stale_payload is not None:
+            return stale_payload, True, True, stale_version
+        raise
+
+    return payload, False, False, version
+
+
+def _quote_payload(symbol: str, info) -> dict:
+    return {
+        "symbol": symbol,
+        "currency": _safe_info_get(info, "currency"),
+        "exchange": _safe_info_get(info, "exchange"),
+        "last_price": _to_finite_float(_safe_info_get(info, "lastPrice")),
+        "open": _to_finite_float(_safe_info_get(info, "open")),
+        "day_high": _to_finite_float(_safe_info_get(info, "dayHigh")),
+        "day_low": _to_finite_float(_safe_info_get(info, "dayLow")),
+        "previous_close": _to_finite_float(_safe_info_get(info, "previousClose")),
+        "volume": _to_finite_int(_safe_info_get(info, "lastVolume")),
+        "market_cap": _to_finite_int(_safe_info_get(info, "marketCap")),
+    }
+
+
+def _fetch_quote(symbol: str) -> dict:
+    info = _PROVIDER.quote(symbol)
+    if not info:
+        raise _SymbolNotFound(symbol)
+    return _quote_payload(symbol, info)
+
+
+def _fetch_quote_batch(symbols: list[str]) -> dict[str, dict]:
+    # One upstream call for many symbols; symbols the provider does not return are absent.
+    infos = _PROVIDER.quotes(symbols, timeout=settings.market_quotes_symbol_timeout_seconds)
+    return {symbol: _quote_payload(symbol, info) for symbol, info in infos.items()}
+
+
+def _history_cache_key(symbol: str, period: str, interval: str, start: date | None, end: date | None) -> str:
+    # yfinance ignores period once an explicit start date is given.
+    period_part = "" if start is not None else period
+    start_part = start.isoformat() if start is not None else ""
+    end_part = end.isoformat() if end is not None else ""
+    # v2: cached payload is columnar (see _history_columns).
+    return f"history:v2:{symbol}:{period_part}:{interval}:{start_part}:{end_part}"
+
+
+def _history_ttl(interval: str) -> int:
+    return _INTRADAY_INTERVAL_SECONDS.get(interval, settings.market_history_daily_ttl_seconds)
+
+
+def _fetch_history(symbol: str, period: str, interval: str, start: date | None, end: date | None) -> dict:
+    def fetch(period: str | None = None, start=None, end=None) -> pd.DataFrame:
+        return _PROVIDER.history(symbol, period=period, interval=interval, start=start, end=end)
+
+    if _BAR_STORE is None:
+        df = fetch(period=period, start=start, end=end)
+    else:
+        now = pd.Timestamp(time.time(), unit="s", tz="UTC")
+        df = _BAR_STORE.load(symbol, interval, period, start, end, now, fetch)
+    if df.empty:
+        raise _SymbolNotFound(symbol)
+
+    return _history_columns(df)
+
+
+def _finite_column(df: pd.DataFrame, column: str, as_int: bool = False) -> list:
+    # Column-wise equivalent of _to_finite_float/_to_finite_int: non-finite or
+    # non-numeric cells become None, ints are truncated like int(float(v)).
+    if column not in df.columns:
+        return [None] * len(df)
+    values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype="float64")
+    finite = np.isfinite(values)
+    if as_int and np.abs(values[finite]).max(initial=0) >= 2**63:
+        return [_to_finite_int(value) for value in values.tolist()]
+    if as_int:
+        out = np.where(finite, values, 0).astype(np.int64).astype(object)
+    else:
+        out = values.astype(object)
+    out[~finite] = None
+    return out.tolist()
+
+
+def _isoformat_index(index: pd.Index) -> list[str]:
+    if not isinstance(index, pd.DatetimeIndex) or (index.nanosecond != 0).any() or (index.microsecond != 0).any():
+        return [idx.isoformat() for idx in index]
+
+    if index.tz is None:
+        return np.datetime_as_string(index.to_numpy(dtype="datetime64[s]"), unit="s").tolist()
+
+    wall_clock = index.tz_localize(None)
+    local = np.datetime_as_string(wall_clock.to_numpy(dtype="datetime64[s]"), unit="s")
+    offsets = (wall_clock - index.tz_convert("UTC").tz_localize(None)).total_seconds().astype(np.int64)
+    suffixes = {}
+    for offset in np.unique(offsets).tolist():
+        sign = "-" if offset < 0 else "+"
+        hours, minutes = divmod(abs(offset) // 60, 60)
+        suffixes[offset] = f"{sign}{hours:02d}:{minutes:02d}"
+    return [ts + suffixes[offset] for ts, offset in zip(local.tolist(), offsets.tolist())]
+
+
+def _epoch_index(index: pd.Index) -> list[int | None]:
+    if not isinstance(index, pd.DatetimeIndex):
+        return [None] * len(index)
+    utc = index.tz_localize("UTC") if index.tz is None else index
+    return (utc.as_unit("ns").asi8 // 1_000_000_000).tolist()
+
+
+def _history_columns(df: pd.DataFrame) -> dict[str, list]:
+    tz = df.index.tz if isinstance(df.index, pd.DatetimeIndex) else None
+    return {
+        "tz": str(tz) if tz is not None else None,
+        "ts": _isoformat_index(df.index),
+        "epoch": _epoch_index(df.index),
+        "open": _finite_column(df, "Open"),
+        "high": _finite_column(df, "High"),
+        "low": _finite_column(df, "Low"),
+        "close": _finite_column(df, "Close"),
+        "volume": _finite_column(df, "Volume", as_int=True),
+    }
+
+
+def _columns_to_rows(columns: dict[str, list], ts_key: str = "ts") -> list[dict]:
+    return [
+        {"ts": ts, "open": open_, "high": high, "low": low, "close": close, "volume": volume}
+        for ts, open_, high, low, close, volume in zip(
+            columns[ts_key],
+            columns["open"],
+            columns["high"],
+            columns["low"],
+            columns["close"],
+            columns["volume"],
+        )
+    ]
+
+
+def _history_rows(df: pd.DataFrame) -> list[dict]:
+    return _columns_to_rows(_history_columns(df))
+
+
+def _history_ndjson(columns: dict[str, list], ts_key: str):
+    # Serializes a bounded slice of bars per chunk, so neither the row dicts nor the
+    # full response body are ever materialized at once.
+    total = len(columns[ts_key])
+    for offset in range(0, total, _NDJSON_CHUNK_ROWS):
+        window = slice(offset, offset + _NDJSON_CHUNK_ROWS)
+        chunk = {"ts": columns[ts_key][window], **{field: columns[field][window] for field in HISTORY_FIELDS}}
+        yield b"".join(dumps(row) + b"\n" for row in _columns_to_rows(chunk))
+
+
+def _validate_history_params(period: str, interval: str, start: date | None, end: date | None) -> tuple[str, str]:
+    period = period.strip().lower()
+    interval = interval.strip().lower()
+    if period not in ALLOWED_PERIODS:
+        raise HTTPException(status_code=400, detail="Invalid period")
+    if interval not in ALLOWED_INTERVALS:
+        raise HTTPException(status_code=400, detail="Invalid interval")
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="start must be <= end")
+    return period, interval
+
+
+def _validate_history_output(output_format: str, ts_format: str, allowed_formats: set[str]) -> tuple[str, str]:
+    output_format = output_format.strip().lower()
+    ts_format = ts_format.strip().lower()
+    if output_format not in allowed_formats:
+        raise HTTPException(status_code=400, detail="Invalid format")
+    if ts_format not in HISTORY_TS_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid ts_format")
+    return output_format, ts_format
+
+
+def _read_through_history(
+    symbol: str,
+    period: str,
+    interval: str,
+    start: date | None,
+    end: date | None,
+) -> tuple[dict, bool, bool, tuple[float, float] | None]:
+    return _read_through(
+        _history_cache_key(symbol, period, interval, start, end),
+        lambda: _fetch_history(symbol, period, interval, start, end),
+        ttl=_history_ttl(interval),
+    )
+
+
+def _history_data(columns: dict[str, list], output_format: str, ts_key: str):
+    if output_format == "columns":
+        return {"ts": columns[ts_key], **{field: columns[field] for field in HISTORY_FIELDS}}
+    return _columns_to_rows(columns, ts_key)
+
+
+def _prewarm_symbols() -> list[str]:
+    configured = [s.strip().upper() for s in settings.market_prewarm_symbols.split(",") if s.strip()]
+    symbols = dict.fromkeys(configured + _DEMAND.top(settings.market_prewarm_top_n))
+    return [symbol for symbol in symbols if SYMBOL_RE.fullmatch(symbol)]
+
+
+def _prewarm_symbol(symbol: str) -> None:
+    # Refreshes the quote and default daily history entries that would go stale before
+    # the next cycle, through the same single-flight/governor path as requests.
+    period = settings.market_prewarm_history_period
+    targets = [
+        (f"quote:{symbol}", lambda: _fetch_quote(symbol), None),
+        (
+            _history_cache_key(symbol, period, "1d", None, None),
+            lambda: _fetch_history(symbol, period, "1d", None, None),
+            _history_ttl("1d"),
+        ),
+    ]
+    error = None
+    for cache_key, loader, ttl in targets:
+        if _CACHE.fresh_for(cache_key, time.time()) > settings.market_prewarm_interval_seconds:
+            continue
+        try:
+            _INFLIGHT.do(cache_key, _caching_loader(cache_key, loader, ttl))
+        except Exception as exc:
+            error = exc
+    if error is not None:
+        raise error
+
+
+def start_upstream_session() -> None:
+    # Only the yfinance provider talks to Yahoo; others must not bootstrap a crumb.
+    if _PROVIDER.name == "yfinance":
+        _YAHOO.start()
+
+
+def stop_upstream_session() -> None:
+    _YAHOO.stop()
+
+
+def start_cache_prewarm() -> None:
+    if not settings.market_prewarm_symbols.strip() and settings.market_prewarm_top_n <= 0:
+        return
+    # The first cycle runs inline so the worker only starts serving with a warm cache.
+    _PREWARMER.run_once()
+    _PREWARMER.start()
+
+
+def stop_cache_prewarm() -> None:
+    _PREWARMER.stop()
+
+
+def start_fundamentals_refresh() -> None:
+    if settings.market_fundamentals_refresh_enabled:
+        _FUNDAMENTALS_REFRESHER.start()
+
+
+def stop_fundamentals_refresh() -> None:
+    _FUNDAMENTALS_REFRESHER.stop()
+
+
+def _fundamentals_payload(symbol: str, info) -> dict:
+    return {
+        "symbol": symbol,
+        "long_name": _safe_info_get(info, "longName"),
+        "sector": _safe_info_get(info, "sector"),
+        "industry": _safe_info_get(info, "industry"),
+        "website": _safe_info_get(info, "website"),
+        "trailing_pe": _to_finite_float(_safe_info_get(info, "trailingPE")),
+        "forward_pe": _to_finite_float(_safe_info_get(info, "forwardPE")),
+        "price_to_book": _to_finite_float(_safe_info_get(info, "priceToBook")),
+        "dividend_yield": _to_finite_float(_safe_info_get(info, "dividendYield")),
+        "beta": _to_finite_float(_safe_info_get(info, "beta")),
+        "fifty_two_week_high": _to_finite_float(_safe_info_get(info, "fiftyTwoWeekHigh")),
+        "fifty_two_week_low": _to_finite_float(_safe_info_get(info, "fiftyTwoWeekLow")),
+    }
+
+
+def _fetch_fundamentals(symbol: str) -> dict:
+    info = _PROVIDER.fundamentals(symbol)
+    if not info:
+        raise _SymbolNotFound(symbol)
+    return _fundamentals_payload(symbol, info)
+
+
+def _read_through_fundamentals(symbol: str) -> tuple[dict, bool, bool, tuple[float, float] | None]:
+    # Memory cache, then the fundamentals table; Yahoo only for unknown or expired symbols.
+    # An expired stored row still backs the stale fallback when Yahoo fails.
+    cache_key = f"fundamentals:{symbol}"
+    cached, is_stale, version = _cache_get(cache_key)
+    if cached is not None and not is_stale:
+        return cached, False, True, version
+    if _known_not_found(cache_key):
+        raise _SymbolNotFound(cache_key)
+
+    now = time.time()
+    stored, fresh_until = _FUNDAMENTALS.get(symbol, FUNDAMENTALS_FIELDS, now)
+    if stored is not None and now < fresh_until:
+        ttl = max(1, min(settings.market_cache_ttl_seconds, int(fresh_until - now)))
+        return stored, False, True, _cache_set(cache_key, stored, ttl=ttl)
+
+    def loader() -> dict:
+        return _fetch_fundamentals(symbol)
+
+    def persist(payload: dict) -> None:
+        _FUNDAMENTALS.put(symbol, payload, time.time())
+
+    # An expired stored row has no cache entry version; its tag falls back to a digest.
+    stale_payload, stale_version = (cached, version) if cached is not None else (stored, None)
+    if stale_payload is not None and settings.market_cache_stale_while_revalidate:
+        _revalidate(cache_key, loader, persist=persist)
+        return stale_payload, True, True, stale_version
+    return _load_or_fallback(cache_key, loader, stale_payload, stale_version, persist=persist)
+
+
+def _refresh_fundamentals(symbol: str) -> None:
+    cache_key = f"fundamentals:{symbol}"
+    _INFLIGHT.do(
+        cache_key,
+        _caching_loader(
+            cache_key,
+            lambda: _fetch_fundamentals(symbol),
+            persist=lambda payload: _FUNDAMENTALS.put(symbol, payload, time.time()),
+        ),
+    )
+
+
 @router.get("/health")
 def health():
     return {"ok": True}
@@ -82,195 +689,323 @@ def health():
 
 @router.get("/quote/{symbol}")
 @limiter.limit(default_market_rate_limit)
-def quote(request: Request, symbol: str, _: str = Depends(require_api_key)):
+async def quote(request: Request, symbol: str, _: str = Depends(require_api_key)):
     symbol = _normalize_symbol(symbol)
-    cache_key = f"quote:{symbol}"
+    _DEMAND.record([symbol])
 
+    cache_key = f"quote:{symbol}"
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.fast_info or {}
-    except Exception as exc:
-        cached, is_stale = _cache_get(cache_key)
-        if cached is not None and is_stale:
-            return {**cached, "stale": True}
-        raise HTTPException(status_code=502, detail=f"Upstream provider error: {exc}")
-
-    if not info:
+        payload, stale, cached, version = await _run_blocking(_read_through, cache_key, lambda: _fetch_quote(symbol))
+    except _SymbolNotFound:
         raise HTTPException(status_code=404, detail="Symbol not found or unavailable")
-
-    try:
-        payload = {
-            "symbol": symbol.upper(),
-            "currency": _safe_info_get(info, "currency"),
-            "exchange": _safe_info_get(info, "exchange"),
-            "last_price": _to_finite_float(_safe_info_get(info, "lastPrice")),
-            "open": _to_finite_float(_safe_info_get(info, "open")),
-            "day_high": _to_finite_float(_safe_info_get(info, "dayHigh")),
-            "day_low": _to_finite_float(_safe_info_get(info, "dayLow")),
-            "previous_close": _to_finite_float(_safe_info_get(info, "previousClose")),
-            "volume": _to_finite_int(_safe_info_get(info, "lastVolume")),
-            "market_cap": _to_finite_int(_safe_info_get(info, "marketCap")),
-        }
     except Exception as exc:
-        cached, is_stale = _cache_get(cache_key)
-        if cached is not None and is_stale:
-            return {**cached, "stale": True}
-        raise HTTPException(status_code=502, detail=f"Upstream provider error: {exc}")
+        raise _upstream_http_error(exc)
 
-    _cache_set(cache_key, payload)
-    return {**payload, "stale": False}
+    tag, max_age = _entry_validator(cache_key, payload, stale, version)
+    headers = _conditional_headers([tag], max_age)
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse({**payload, "stale": stale, "cached": cached}, headers=headers)
 
 
 @router.get("/history/{symbol}")
 @limiter.limit(default_market_rate_limit)
-def history(
+async def history(
     request: Request,
     symbol: str,
     period: str = Query(default="1mo", description="e.g. 1d, 5d, 1mo, 3mo, 1y, 5y, max"),
     interval: str = Query(default="1d", description="e.g. 1m, 5m, 1h, 1d, 1wk"),
     start: date | None = Query(default=None),
     end: date | None = Query(default=None),
+    output_format: str | None = Query(
+        default=None,
+        alias="format",
+        description="rows (default), columns, csv, parquet or arrow; also negotiated from Accept",
+    ),
+    ts_format: str = Query(default="iso", description="iso (ISO-8601 strings) or epoch (Unix seconds)"),
+    stream: bool = Query(default=False, description="Stream bars as NDJSON (same as Accept: application/x-ndjson)"),
     _: str = Depends(require_api_key),
 ):
     symbol = _normalize_symbol(symbol)
-    period = period.strip().lower()
-    interval = interval.strip().lower()
-
-    if period not in ALLOWED_PERIODS:
-        raise HTTPException(status_code=400, detail="Invalid period")
-    if interval not in ALLOWED_INTERVALS:
-        raise HTTPException(status_code=400, detail="Invalid interval")
-    if start is not None and end is not None and start > end:
-        raise HTTPException(status_code=400, detail="start must be <= end")
+    _DEMAND.record([symbol])
+    period, interval = _validate_history_params(period, interval, start, end)
+    accept = request.headers.get("accept", "")
+    if output_format is None:
+        output_format = next(
+            (fmt for media_type, fmt in _HISTORY_ACCEPT_FORMATS.items() if media_type in accept),
+            "rows",
+        )
+    output_format, ts_format = _validate_history_output(output_format, ts_format, HISTORY_FORMATS)
+    stream = stream or NDJSON_MEDIA_TYPE in accept
+    if stream and output_format != "rows":
+        raise HTTPException(status_code=400, detail="Streaming supports format=rows only")
 
     try:
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period=period, interval=interval, start=start, end=end, auto_adjust=False)
-    except Exception as exc:
-        raise HTTPException(status_code=502, detail=f"Upstream provider error: {exc}")
-
-    if df.empty:
-        raise HTTPException(status_code=404, detail="No historical data found")
-
-    rows = []
-    for idx, row in df.iterrows():
-        rows.append(
-            {
-                "ts": idx.isoformat(),
-                "open": _to_finite_float(row.get("Open")),
-                "high": _to_finite_float(row.get("High")),
-                "low": _to_finite_float(row.get("Low")),
-                "close": _to_finite_float(row.get("Close")),
-                "volume": _to_finite_int(row.get("Volume")),
-            }
+        columns, stale, cached, version = await _run_blocking(
+            _read_through_history, symbol, period, interval, start, end
         )
-
-    return {
-        "symbol": symbol.upper(),
+    except _SymbolNotFound:
+        raise HTTPException(status_code=404, detail="No historical data found")
+    except Exception as exc:
+        raise _upstream_http_error(exc)
+
+    ts_key = "epoch" if ts_format == "epoch" else "ts"
+    tag, max_age = _entry_validator(
+        _history_cache_key(symbol, period, interval, start, end),
+        columns,
+        stale,
+        version,
+        variant=f"{output_format}:{ts_format}:{stream}",
+    )
+    conditional_headers = _conditional_headers([tag], max_age)
+    if _not_modified(request, conditional_headers):
+        return Response(status_code=304, headers=conditional_headers)
+    headers = {
+        **conditional_headers,
+        "X-History-Count": str(len(columns["ts"])),
+        "X-Data-Stale": "true" if stale else "false",
+        "X-Data-Cached": "true" if cached else "false",
+    }
+    if stream:
+        return StreamingResponse(_history_ndjson(columns, ts_key), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+    if output_format == "csv":
+        return StreamingResponse(history_csv(columns, ts_key), media_type=CSV_MEDIA_TYPE, headers=headers)
+    if output_format == "parquet":
+        body = await _run_blocking(history_parquet, columns, ts_format)
+        return Response(body, media_type=PARQUET_MEDIA_TYPE, headers=headers)
+    if output_format == "arrow":
+        body = await _run_blocking(history_arrow, columns, ts_format)
+        return Response(body, media_type=ARROW_MEDIA_TYPE, headers=headers)
+
+    content = {
+        "symbol": symbol,
         "period": period,
         "interval": interval,
-        "count": len(rows),
-        "data": rows,
+        "format": output_format,
+        "count": len(columns["ts"]),
+        "data": await _run_blocking(_history_data, columns, output_format, ts_key),
+        "stale": stale,
+        "cached": cached,
     }
+    return FastJSONResponse(content, headers=conditional_headers)
 
 
-@router.get("/quotes")
+@router.get("/history")
 @limiter.limit(default_market_rate_limit)
-def quotes(
+async def history_batch(
     request: Request,
     symbols: str = Query(..., description="Comma-separated symbols, e.g. AAPL,MSFT,TSLA"),
+    period: str = Query(default="1mo", description="e.g. 1d, 5d, 1mo, 3mo, 1y, 5y, max"),
+    interval: str = Query(default="1d", description="e.g. 1m, 5m, 1h, 1d, 1wk"),
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    output_format: str = Query(default="rows", alias="format", description="rows or columns"),
+    ts_format: str = Query(default="iso", description="iso (ISO-8601 strings) or epoch (Unix seconds)"),
     _: str = Depends(require_api_key),
 ):
     raw = [s.strip() for s in symbols.split(",") if s.strip()]
     if not raw:
         raise HTTPException(status_code=400, detail="No symbols provided")
-    if len(raw) > 25:
-        raise HTTPException(status_code=400, detail="Maximum 25 symbols per request")
+    max_symbols = settings.market_history_batch_max_symbols
+    if len(raw) > max_symbols:
+        raise HTTPException(status_code=400, detail=f"Maximum {max_symbols} symbols per request")
 
     normalized_symbols = [_normalize_symbol(s) for s in raw]
+    _DEMAND.record(normalized_symbols)
+    period, interval = _validate_history_params(period, interval, start, end)
+    output_format, ts_format = _validate_history_output(output_format, ts_format, HISTORY_JSON_FORMATS)
+    ts_key = "epoch" if ts_format == "epoch" else "ts"
+
+    def resolve(symbol: str) -> dict:
+        columns, stale, cached, _ = _read_through_history(symbol, period, interval, start, end)
+        return {
+            "symbol": symbol,
+            "ok": True,
+            "count": len(columns["ts"]),
+            "data": _history_data(columns, output_format, ts_key),
+            "stale": stale,
+            "cached": cached,
+        }
 
-    results = []
-    for symbol in normalized_symbols:
-        cache_key = f"quote:{symbol}"
-        try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.fast_info or {}
-        except Exception:
-            cached, is_stale = _cache_get(cache_key)
-            if cached is not None and is_stale:
-                results.append({**cached, "ok": True, "stale": True})
-            else:
-                results.append({"symbol": symbol, "ok": False, "error": "upstream_error"})
-            continue
+    outcomes = await amap_bounded(
+        _UPSTREAM_EXECUTOR,
+        resolve,
+        normalized_symbols,
+        limit=settings.market_history_batch_concurrency,
+        timeout=settings.market_history_symbol_timeout_seconds,
+    )
 
-        if not info:
+    results = []
+    for symbol, (resolved, error) in zip(normalized_symbols, outcomes):
+        if error is None:
+            results.append(resolved)
+        elif isinstance(error, _SymbolNotFound):
             results.append({"symbol": symbol, "ok": False, "error": "unavailable"})
-            continue
-
-        try:
-            payload = {
-                "symbol": symbol,
-                "currency": _safe_info_get(info, "currency"),
-                "last_price": _to_finite_float(_safe_info_get(info, "lastPrice")),
-                "open": _to_finite_float(_safe_info_get(info, "open")),
-                "day_high": _to_finite_float(_safe_info_get(info, "dayHigh")),
-                "day_low": _to_finite_float(_safe_info_get(info, "dayLow")),
-                "previous_close": _to_finite_float(_safe_info_get(info, "previousClose")),
-                "volume": _to_finite_int(_safe_info_get(info, "lastVolume")),
-                "market_cap": _to_finite_int(_safe_info_get(info, "marketCap")),
-            }
-        except Exception:
-            cached, is_stale = _cache_get(cache_key)
-            if cached is not None and is_stale:
-                results.append({**cached, "ok": True, "stale": True})
+        else:
+            results.append({"symbol": symbol, "ok": False, "error": "upstream_error"})
+
+    return FastJSONResponse(
+        {
+            "period": period,
+            "interval": interval,
+            "format": output_format,
+            "count": len(results),
+            "data": results,
+        }
+    )
+
+
+async def _resolve_quote_misses_per_symbol(
+    misses: list[tuple[int, str, dict | None]], results: list, versions: list
+) -> None:
+    def resolve(miss: tuple[int, str, dict | None]) -> tuple[dict, bool, bool, tuple[float, float] | None]:
+        index, symbol, stale_payload = miss
+        return _load_or_fallback(f"quote:{symbol}", lambda: _fetch_quote(symbol), stale_payload, versions[index])
+
+    outcomes = await amap_bounded(
+        _UPSTREAM_EXECUTOR,
+        resolve,
+        misses,
+        limit=settings.market_quotes_concurrency,
+        timeout=settings.market_quotes_symbol_timeout_seconds,
+    )
+    for (index, symbol, stale_payload), (resolved, error) in zip(misses, outcomes):
+        if error is None:
+            payload, stale, cached, versions[index] = resolved
+            results[index] = {**payload, "ok": True, "stale": stale, "cached": cached}
+        elif isinstance(error, _SymbolNotFound):
+            results[index] = {"symbol": symbol, "ok": False, "error": "unavailable"}
+        elif isinstance(error, TimeoutError) and stale_payload is not None:
+            results[index] = {**stale_payload, "ok": True, "stale": True, "cached": True}
+        else:
+            results[index] = {"symbol": symbol, "ok": False, "error": "upstream_error"}
+
+
+async def _resolve_quote_misses_batched(
+    misses: list[tuple[int, str, dict | None]], results: list, versions: list
+) -> None:
+    batch_size = settings.market_quotes_batch_size
+    batches = [misses[i : i + batch_size] for i in range(0, len(misses), batch_size)]
+    unique_batches = [sorted({symbol for _, symbol, _ in batch}) for batch in batches]
+
+    def load(keys: list[str]) -> dict[str, tuple[dict, tuple[float, float]]]:
+        # Same (payload, version) results as _caching_loader, for callers joining these keys.
+        symbols = [key.removeprefix("quote:") for key in keys]
+        payloads = _call_upstream(lambda: _fetch_quote_batch(symbols))
+        loaded = {}
+        for symbol in symbols:
+            if symbol in payloads:
+                loaded[f"quote:{symbol}"] = payloads[symbol], _cache_set(f"quote:{symbol}", payloads[symbol])
             else:
-                results.append({"symbol": symbol, "ok": False, "error": "upstream_error"})
-            continue
+                _remember_not_found(f"quote:{symbol}")
+        return loaded
+
+    def fetch_batch(batch: list[str]) -> dict[str, tuple[tuple | None, BaseException | None]]:
+        # Symbols already being fetched (by another batch or /v1/quote) are joined, not refetched.
+        futures = _INFLIGHT.do_batch([f"quote:{symbol}" for symbol in batch], load, missing=_SymbolNotFound)
+        outcomes = {}
+        for symbol in batch:
+            future = futures[f"quote:{symbol}"]
+            error = future.exception()
+            outcomes[symbol] = (None, error) if error is not None else (future.result(), None)
+        return outcomes
+
+    outcomes = await amap_bounded(
+        _UPSTREAM_EXECUTOR,
+        fetch_batch,
+        unique_batches,
+        limit=settings.market_quotes_concurrency,
+        timeout=settings.market_quotes_symbol_timeout_seconds,
+    )
+    for batch, (symbol_outcomes, batch_error) in zip(batches, outcomes):
+        for index, symbol, stale_payload in batch:
+            loaded, error = symbol_outcomes[symbol] if batch_error is None else (None, batch_error)
+            if error is None:
+                payload, versions[index] = loaded
+                results[index] = {**payload, "ok": True, "stale": False, "cached": False}
+            elif isinstance(error, _SymbolNotFound):
+                results[index] = {"symbol": symbol, "ok": False, "error": "unavailable"}
+            elif stale_payload is not None:
+                results[index] = {**stale_payload, "ok": True, "stale": True, "cached": True}
+            else:
+                results[index] = {"symbol": symbol, "ok": False, "error": "upstream_error"}
+
+
+def _quote_cache_lookups(
+    symbols: list[str],
+) -> tuple[list[dict | None], list[tuple[float, float] | None], list[tuple[int, str, dict | None]]]:
+    # Returns (results, entry versions, misses), the first two indexed like symbols.
+    results: list[dict | None] = [None] * len(symbols)
+    versions: list[tuple[float, float] | None] = [None] * len(symbols)
+    misses: list[tuple[int, str, dict | None]] = []
+    for index, symbol in enumerate(symbols):
+        cached, is_stale, versions[index] = _cache_get(f"quote:{symbol}")
+        if cached is not None and not is_stale:
+            results[index] = {**cached, "ok": True, "stale": False, "cached": True}
+        elif _known_not_found(f"quote:{symbol}"):
+            results[index] = {"symbol": symbol, "ok": False, "error": "unavailable"}
+        elif cached is not None and settings.market_cache_stale_while_revalidate:
+            _revalidate(f"quote:{symbol}", lambda symbol=symbol: _fetch_quote(symbol))
+            results[index] = {**cached, "ok": True, "stale": True, "cached": True}
+        else:
+            misses.append((index, symbol, cached))
+    return results, versions, misses
 
-        _cache_set(cache_key, payload)
-        results.append({**payload, "ok": True, "stale": False})
 
-    return {"count": len(results), "data": results}
+@router.get("/quotes")
+@limiter.limit(default_market_rate_limit)
+async def quotes(
+    request: Request,
+    symbols: str = Query(..., description="Comma-separated symbols, e.g. AAPL,MSFT,TSLA"),
+    _: str = Depends(require_api_key),
+):
+    raw = [s.strip() for s in symbols.split(",") if s.strip()]
+    if not raw:
+        raise HTTPException(status_code=400, detail="No symbols provided")
+    max_symbols = settings.market_quotes_max_symbols
+    if len(raw) > max_symbols:
+        raise HTTPException(status_code=400, detail=f"Maximum {max_symbols} symbols per request")
+
+    normalized_symbols = [_normalize_symbol(s) for s in raw]
+    _DEMAND.record(normalized_symbols)
+
+    results, versions, misses = await _run_blocking(_quote_cache_lookups, normalized_symbols)
+    if settings.market_quotes_batch_size > 0:
+        await _resolve_quote_misses_batched(misses, results, versions)
+    else:
+        await _resolve_quote_misses_per_symbol(misses, results, versions)
+
+    tags = []
+    max_age = settings.market_cache_ttl_seconds
+    for item, version in zip(results, versions):
+        if item["ok"]:
+            tag, item_max_age = _entry_validator(f"quote:{item['symbol']}", item, item["stale"], version)
+        else:
+            tag, item_max_age = f"{item['symbol']}:{item['error']}", 0
+        tags.append(tag)
+        max_age = min(max_age, item_max_age)
+    headers = _conditional_headers(tags, max_age)
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse({"count": len(results), "data": results}, headers=headers)
 
 
 @router.get("/fundamentals/{symbol}")
 @limiter.limit(default_market_rate_limit)
-def fundamentals(request: Request, symbol: str, _: str = Depends(require_api_key)):
+async def fundamentals(request: Request, symbol: str, _: str = Depends(require_api_key)):
     symbol = _normalize_symbol(symbol)
+    _DEMAND.record([symbol])
+
     cache_key = f"fundamentals:{symbol}"
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info or {}
-    except Exception as exc:
-        cached, is_stale = _cache_get(cache_key)
-        if cached is not None and is_stale:
-            return {**cached, "stale": True}
-        raise HTTPException(status_code=502, detail=f"Upstream provider error: {exc}")
-
-    if not info:
+        payload, stale, cached, version = await _run_blocking(_read_through_fundamentals, symbol)
+    except _SymbolNotFound:
         raise HTTPException(status_code=404, detail="Fundamentals unavailable")
-
-    try:
-        payload = {
-            "symbol": symbol.upper(),
-            "long_name": _safe_info_get(info, "longName"),
-            "sector": _safe_info_get(info, "sector"),
-            "industry": _safe_info_get(info, "industry"),
-            "website": _safe_info_get(info, "website"),
-            "trailing_pe": _to_finite_float(_safe_info_get(info, "trailingPE")),
-            "forward_pe": _to_finite_float(_safe_info_get(info, "forwardPE")),
-            "price_to_book": _to_finite_float(_safe_info_get(info, "priceToBook")),
-            "dividend_yield": _to_finite_float(_safe_info_get(info, "dividendYield")),
-            "beta": _to_finite_float(_safe_info_get(info, "beta")),
-            "fifty_two_week_high": _to_finite_float(_safe_info_get(info, "fiftyTwoWeekHigh")),
-            "fifty_two_week_low": _to_finite_float(_safe_info_get(info, "fiftyTwoWeekLow")),
-        }
     except Exception as exc:
-        cached, is_stale = _cache_get(cache_key)
-        if cached is not None and is_stale:
-            return {**cached, "stale": True}
-        raise HTTPException(status_code=502, detail=f"Upstream provider error: {exc}")
-
-    _cache_set(cache_key, payload)
+        raise _upstream_http_error(exc)
 
-    return {**payload, "stale": False}
+    tag, max_age = _entry_validator(cache_key, payload, stale, version)
+    headers = _conditional_headers([tag], max_age)
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse({**payload, "stale": stale, "cached": cached}, headers=headers)
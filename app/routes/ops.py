@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+
+from ..auth import require_master_key
+from . import market
+
+router = APIRouter(prefix="/v1/ops", tags=["ops"], include_in_schema=False)
+
+
+@router.get("/market-cache")
+def market_cache_stats(_: str = Depends(require_master_key)):
+    stats = market._CACHE.stats()
+    stats["l2"] = market._L2.stats() if market._L2 is not None else None
+    stats["not_found"] = market._NOT_FOUND.stats()
+    stats["prewarm"] = market._PREWARMER.stats()
+    stats["fundamentals"] = {
+        "store": market._FUNDAMENTALS.stats(),
+        "refresh": market._FUNDAMENTALS_REFRESHER.stats(),
+    }
+    return stats
+
+
+@router.get("/upstream")
+def upstream_stats(_: str = Depends(require_master_key)):
+    return {
+        "provider": market._PROVIDER.stats(),
+        "session": market._YAHOO.stats(),
+        "executor": market._UPSTREAM_EXECUTOR.stats(),
+        "revalidate_executor": market._REVALIDATE_EXECUTOR.stats(),
+        "governor": market._GOVERNOR.stats(),
+        "breaker": market._BREAKER.stats(),
+        "single_flight": market._INFLIGHT.stats(),
+    }
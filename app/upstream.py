@@ -0,0 +1,475 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from typing import TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class SingleFlight:
+    # Concurrent callers sharing a key wait on the first caller's result (or error)
+    # instead of issuing their own upstream request.
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future] = {}
+        self._coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return future.result()
+        return self._run(key, future, fn)
+
+    def submit(self, executor: Executor, key: str, fn: Callable[[], T]) -> bool:
+        # Starts fn on the executor unless a call for key is already in flight; callers
+        # of do() for the same key wait on it. Returns whether a new call was started.
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return False
+        try:
+            executor.submit(self._run, key, future, fn)
+        except BaseException as exc:
+            with self._lock:
+                self._calls.pop(key, None)
+            future.set_exception(exc)
+            raise
+        return True
+
+    def do_batch(
+        self,
+        keys: Sequence[str],
+        fn: Callable[[list[str]], dict[str, T]],
+        missing: Callable[[str], BaseException],
+    ) -> dict[str, Future]:
+        # Batch form of do(): keys already in flight join those calls, the rest are led
+        # by one fn(led_keys) call whose per-key results also reach do() callers for the
+        # same keys. A key fn leaves out fails with missing(key). Returns one future per
+        # key; led ones are resolved, joined ones may still be running.
+        futures: dict[str, Future] = {}
+        led: dict[str, Future] = {}
+        for key in dict.fromkeys(keys):
+            future, is_leader = self._join(key)
+            futures[key] = future
+            if is_leader:
+                led[key] = future
+        if not led:
+            return futures
+
+        try:
+            results = fn(list(led))
+        except BaseException as exc:
+            with self._lock:
+                for key in led:
+                    self._calls.pop(key, None)
+            for future in led.values():
+                future.set_exception(exc)
+            return futures
+
+        with self._lock:
+            for key in led:
+                self._calls.pop(key, None)
+        for key, future in led.items():
+            if key in results:
+                future.set_result(results[key])
+            else:
+                future.set_exception(missing(key))
+        return futures
+
+    def _join(self, key: str) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def _run(self, key: str, future: Future, fn: Callable[[], T]) -> T:
+        try:
+            result = fn()
+        except BaseException as exc:
+            with self._lock:
+                self._calls.pop(key, None)
+            future.set_exception(exc)
+            raise
+
+        with self._lock:
+            self._calls.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"in_flight": len(self._calls), "coalesced": self._coalesced}
+
+
+def map_bounded(
+    executor: Executor,
+    fn: Callable[[T], R],
+    items: Sequence[T],
+    limit: int,
+    timeout: float,
+) -> list[tuple[R | None, BaseException | None]]:
+    # Runs fn over items with at most `limit` submitted at once; each item gets `timeout`
+    # seconds from submission. Returns (result, error) pairs in input order.
+    outcomes: list[tuple[R | None, BaseException | None]] = [(None, None)] * len(items)
+    pending: dict[Future, tuple[int, float]] = {}
+    next_index = 0
+    limit = max(1, limit)
+
+    while next_index < len(items) or pending:
+        while next_index < len(items) and len(pending) < limit:
+            future = executor.submit(fn, items[next_index])
+            pending[future] = (next_index, time.monotonic() + timeout)
+            next_index += 1
+
+        nearest_deadline = min(deadline for _, deadline in pending.values())
+        done, _ = wait(pending, timeout=max(0.0, nearest_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        for future in done:
+            index, _ = pending.pop(future)
+            error = future.exception()
+            outcomes[index] = (None, error) if error is not None else (future.result(), None)
+
+        now = time.monotonic()
+        for future, (index, deadline) in list(pending.items()):
+            if now >= deadline:
+                pending.pop(future)
+                future.cancel()
+                outcomes[index] = (None, TimeoutError(f"upstream call exceeded {timeout}s"))
+
+    return outcomes
+
+
+async def amap_bounded(
+    executor: Executor,
+    fn: Callable[[T], R],
+    items: Sequence[T],
+    limit: int,
+    timeout: float,
+) -> list[tuple[R | None, BaseException | None]]:
+    # Event-loop counterpart of map_bounded: the caller awaits instead of blocking a thread.
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(item: T) -> tuple[R | None, BaseException | None]:
+        async with semaphore:
+            future = executor.submit(fn, item)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout), None
+            except asyncio.TimeoutError:
+                future.cancel()
+                return None, TimeoutError(f"upstream call exceeded {timeout}s")
+            except Exception as exc:
+                return None, exc
+
+    return list(await asyncio.gather(*(run(item) for item in items)))
+
+
+class MeteredThreadPoolExecutor(ThreadPoolExecutor):
+    # ThreadPoolExecutor that tracks queued and running tasks and queue wait times.
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "") -> None:
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._metrics_lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._peak_queued = 0
+        self._peak_active = 0
+        self._completed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        enqueued_at = time.monotonic()
+
+        def run():
+            waited = time.monotonic() - enqueued_at
+            with self._metrics_lock:
+                self._queued -= 1
+                self._active += 1
+                self._peak_active = max(self._peak_active, self._active)
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._metrics_lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        with self._metrics_lock:
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+        try:
+            future = super().submit(run)
+        except BaseException:
+            with self._metrics_lock:
+                self._queued -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def stats(self) -> dict:
+        with self._metrics_lock:
+            started = self._completed + self._active
+            return {
+                "max_workers": self._max_workers,
+                "active": self._active,
+                "queued": self._queued,
+                "saturation": round(self._active / self._max_workers, 3),
+                "peak_active": self._peak_active,
+                "peak_queued": self._peak_queued,
+                "completed": self._completed,
+                "avg_queue_wait_seconds": round(self._wait_total / started, 4) if started else 0.0,
+                "max_queue_wait_seconds": round(self._wait_max, 4),
+            }
+
+    def _on_done(self, future: Future) -> None:
+        # A task cancelled while queued never runs, so it leaves the queue here.
+        if future.cancelled():
+            with self._metrics_lock:
+                self._queued -= 1
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, retry_after: float):
+        super().__init__("upstream circuit is open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    # Tracks the outcome of the last `window` upstream calls; a call counts as bad when
+    # it raises (other than `ignored` errors) or takes longer than slow_call_seconds.
+    # Once at least min_calls are recorded and the bad ratio reaches failure_ratio the
+    # circuit opens and calls fail fast for open_seconds. Then a single probe call is let
+    # through (half-open): success closes the circuit, failure reopens it.
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_ratio: float,
+        min_calls: int,
+        window: int,
+        open_seconds: float,
+        slow_call_seconds: float,
+        ignored: tuple[type[BaseException], ...] = (),
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self._ignored = ignored
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: deque[tuple[bool, float]] = deque(maxlen=max(1, window))
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._trips = 0
+        self._rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_ratio > 0
+
+    def call(self, fn: Callable[[], T], gate: Callable[[Callable[[], T]], T] | None = None) -> T:
+        # `gate` (e.g. UpstreamGovernor.call) wraps fn after admission: an open circuit
+        # fails fast without queueing, and time spent in the gate is not call latency.
+        if not self.enabled:
+            return gate(fn) if gate is not None else fn()
+
+        is_probe = self._admit()
+        recorded = False
+
+        def timed() -> T:
+            nonlocal recorded
+            started = self._clock()
+            failed = False
+            try:
+                return fn()
+            except self._ignored:
+                raise
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                recorded = True
+                elapsed = self._clock() - started
+                self._record(is_probe, failed or elapsed > self.slow_call_seconds, elapsed)
+
+        try:
+            return gate(timed) if gate is not None else timed()
+        finally:
+            if not recorded and is_probe:
+                # The gate rejected the probe before it ran; let the next caller probe.
+                with self._lock:
+                    self._probe_in_flight = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._outcomes.clear()
+            self._state = self.CLOSED
+            self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            calls = len(self._outcomes)
+            bad = sum(1 for is_bad, _ in self._outcomes if is_bad)
+            return {
+                "state": state,
+                "calls": calls,
+                "bad_calls": bad,
+                "bad_ratio": round(bad / calls, 3) if calls else 0.0,
+                "avg_latency_seconds": round(sum(elapsed for _, elapsed in self._outcomes) / calls, 3) if calls else 0.0,
+                "trips": self._trips,
+                "rejected": self._rejected,
+                "retry_after_seconds": round(self._retry_after(), 3) if state == self.OPEN else 0.0,
+            }
+
+    def _admit(self) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return False
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._rejected += 1
+            retry_after = self._retry_after() if state == self.OPEN else self.open_seconds
+        raise CircuitOpenError(retry_after)
+
+    def _record(self, is_probe: bool, bad: bool, elapsed: float) -> None:
+        with self._lock:
+            if is_probe:
+                self._probe_in_flight = False
+                if bad:
+                    self._open()
+                else:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                    self._outcomes.append((bad, elapsed))
+                return
+
+            if self._state != self.CLOSED:
+                return
+            self._outcomes.append((bad, elapsed))
+            calls = len(self._outcomes)
+            if calls >= self.min_calls:
+                bad_calls = sum(1 for is_bad, _ in self._outcomes if is_bad)
+                if bad_calls / calls >= self.failure_ratio:
+                    self._open()
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._trips += 1
+        self._outcomes.clear()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def _retry_after(self) -> float:
+        return max(0.0, self.open_seconds - (self._clock() - self._opened_at))
+
+
+class UpstreamBusyError(RuntimeError):
+    def __init__(self, retry_after: float):
+        super().__init__("upstream call queue is full")
+        self.retry_after = retry_after
+
+
+class UpstreamGovernor:
+    # Admits upstream calls while fewer than max_in_flight are running and a token is
+    # available from a bucket refilled at rate_per_second (holding at most `burst`).
+    # Callers queue for up to max_wait_seconds before UpstreamBusyError. A limit of 0
+    # disables that check.
+
+    def __init__(self, max_in_flight: int, rate_per_second: float, burst: int, max_wait_seconds: float) -> None:
+        self.max_in_flight = max_in_flight
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self.max_wait_seconds = max_wait_seconds
+        self._cond = threading.Condition()
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._queued = 0
+        self._calls = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def call(self, fn: Callable[[], T]) -> T:
+        self._acquire()
+        try:
+            return fn()
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify()
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._refill()
+            return {
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "max_in_flight": self.max_in_flight,
+                "rate_per_second": self.rate_per_second,
+                "tokens": round(self._tokens, 3),
+                "calls": self._calls,
+                "rejected": self._rejected,
+                "avg_wait_seconds": round(self._wait_total / self._calls, 4) if self._calls else 0.0,
+                "max_wait_seconds": round(self._wait_max, 4),
+            }
+
+    def _acquire(self) -> None:
+        started = time.monotonic()
+        deadline = started + self.max_wait_seconds
+        with self._cond:
+            self._queued += 1
+            try:
+                while True:
+                    self._refill()
+                    slot_free = self.max_in_flight <= 0 or self._in_flight < self.max_in_flight
+                    token_free = self.rate_per_second <= 0 or self._tokens >= 1
+                    if slot_free and token_free:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._rejected += 1
+                        raise UpstreamBusyError(retry_after=max(1.0, self.max_wait_seconds))
+                    if slot_free:
+                        # Only short of a token: sleep until the bucket refills one.
+                        remaining = min(remaining, (1 - self._tokens) / self.rate_per_second)
+                    self._cond.wait(remaining)
+            finally:
+                self._queued -= 1
+
+            self._in_flight += 1
+            if self.rate_per_second > 0:
+                self._tokens -= 1
+            waited = time.monotonic() - started
+            self._calls += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.rate_per_second > 0:
+            self._tokens = min(float(self.burst), self._tokens + (now - self._refilled_at) * self.rate_per_second)
+        self._refilled_at = now
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from yfinance.data import YfData
+
+_BOOTSTRAP_TIMEOUT_SECONDS = 10
+_FAILED_REFRESH_RETRY_SECONDS = 60
+
+
+def build_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    # Yahoo is a handful of hosts, so the per-host pool has to cover every upstream thread;
+    # requests' default of 10 drops and re-handshakes connections under concurrency.
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class YahooSession:
+    # Owns the process-wide keep-alive session installed into yfinance's YfData singleton,
+    # which every yf.Ticker and YfData() call shares, and refreshes the Yahoo cookie/crumb
+    # centrally instead of on whichever request first finds it missing.
+
+    def __init__(self, pool_size: int, crumb_refresh_seconds: float):
+        self.pool_size = pool_size
+        self.crumb_refresh_seconds = crumb_refresh_seconds
+        self.session = build_session(pool_size)
+        self._lock = threading.Lock()
+        self._crumb_fetched_at: float | None = None
+        self._refreshes = 0
+        self._errors = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def install(self) -> YfData:
+        return YfData(session=self.session)
+
+    def refresh_crumb(self, force: bool = False) -> bool:
+        data = self.install()
+        with self._lock:
+            fetched_at = self._crumb_fetched_at
+            if not force and fetched_at is not None and time.monotonic() - fetched_at < self.crumb_refresh_seconds:
+                return True
+            with data._cookie_lock:
+                data._cookie = None
+                data._crumb = None
+            try:
+                _, crumb, _ = data._get_cookie_and_crumb(timeout=_BOOTSTRAP_TIMEOUT_SECONDS)
+            except Exception:
+                crumb = None
+            if not crumb:
+                self._errors += 1
+                return False
+            self._crumb_fetched_at = time.monotonic()
+            self._refreshes += 1
+            return True
+
+    def start(self) -> None:
+        # Bootstraps the crumb inline, then refreshes it on a daemon thread.
+        self.install()
+        self.refresh_crumb(force=True)
+        if self.crumb_refresh_seconds <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="yahoo-session", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            fetched_at = self._crumb_fetched_at
+            return {
+                "pool_size": self.pool_size,
+                "installed": YfData(session=None)._session is self.session,
+                "crumb_age_seconds": round(time.monotonic() - fetched_at, 1) if fetched_at is not None else None,
+                "crumb_refreshes": self._refreshes,
+                "crumb_errors": self._errors,
+            }
+
+    def _loop(self) -> None:
+        ok = self._crumb_fetched_at is not None
+        while not self._stop.wait(self.crumb_refresh_seconds if ok else _FAILED_REFRESH_RETRY_SECONDS):
+            ok = self.refresh_crumb(force=True)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Bytes and CPU per request for /v1/history?period=5y&interval=1d under identity, gzip and brotli.
+
+Usage: python scripts/bench_history_compression.py [requests]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.compression import brotli, compress  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.routes.market import _history_columns, _history_data  # noqa: E402
+
+
+def build_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    index = pd.date_range("2020-01-02", periods=rows, freq="B", tz="America/New_York")
+    close = 100 + rng.standard_normal(rows).cumsum()
+    return pd.DataFrame(
+        {
+            "Open": close + rng.standard_normal(rows) * 0.1,
+            "High": close + 0.5,
+            "Low": close - 0.5,
+            "Close": close,
+            "Volume": rng.integers(0, 100_000_000, rows),
+        },
+        index=index,
+    )
+
+
+def history_body(df: pd.DataFrame, output_format: str) -> bytes:
+    columns = _history_columns(df)
+    content = {
+        "symbol": "AAPL",
+        "period": "5y",
+        "interval": "1d",
+        "format": output_format,
+        "count": len(df),
+        "stale": False,
+        "cached": True,
+        "data": _history_data(columns, output_format, "ts"),
+    }
+    return JSONResponse(content).body
+
+
+def cpu_per_request(body: bytes, encoding: str, requests: int) -> tuple[int, float]:
+    size = len(body)
+    started = time.process_time()
+    for _ in range(requests):
+        if encoding != "identity":
+            size = len(compress(body, encoding, settings.compression_gzip_level, settings.compression_brotli_quality))
+    return size, (time.process_time() - started) / requests
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    df = build_frame(1260)
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    print(
+        f"rows={len(df)} requests={requests} "
+        f"gzip_level={settings.compression_gzip_level} brotli_quality={settings.compression_brotli_quality}"
+    )
+    for output_format in ("rows", "columns"):
+        body = history_body(df, output_format)
+        for encoding in encodings:
+            size, cpu = cpu_per_request(body, encoding, requests)
+            print(
+                f"{output_format:8} {encoding:9} {size:9,d} bytes  {size / len(body):6.1%}  "
+                f"{cpu * 1000:7.2f} ms cpu/request"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Rows/second for /v1/history DataFrame -> JSON rows conversion, before vs after.
+
+Usage: python scripts/bench_history_serialization.py [rows]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.routes.market import _history_rows, _to_finite_float, _to_finite_int  # noqa: E402
+
+
+def iterrows_rows(df: pd.DataFrame) -> list[dict]:
+    rows = []
+    for idx, row in df.iterrows():
+        rows.append(
+            {
+                "ts": idx.isoformat(),
+                "open": _to_finite_float(row.get("Open")),
+                "high": _to_finite_float(row.get("High")),
+                "low": _to_finite_float(row.get("Low")),
+                "close": _to_finite_float(row.get("Close")),
+                "volume": _to_finite_int(row.get("Volume")),
+            }
+        )
+    return rows
+
+
+def build_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    index = pd.date_range("2020-01-02 09:30", periods=rows, freq="min", tz="America/New_York")
+    close = 100 + rng.standard_normal(rows).cumsum()
+    df = pd.DataFrame(
+        {
+            "Open": close + rng.standard_normal(rows) * 0.1,
+            "High": close + 0.5,
+            "Low": close - 0.5,
+            "Close": close,
+            "Volume": rng.integers(0, 1_000_000, rows),
+        },
+        index=index,
+    )
+    df.iloc[::997, 0] = np.nan
+    return df
+
+
+def bench(fn, df: pd.DataFrame, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    df = build_frame(rows)
+    assert iterrows_rows(df) == _history_rows(df)
+
+    before = bench(iterrows_rows, df)
+    after = bench(_history_rows, df)
+    print(f"rows={rows}")
+    print(f"iterrows:   {before * 1000:8.1f} ms  {rows / before:12,.0f} rows/s")
+    print(f"vectorized: {after * 1000:8.1f} ms  {rows / after:12,.0f} rows/s")
+    print(f"speedup:    {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
+import yfinance as yf
 
 from app.main import app
 
@@ -39,7 +40,6 @@ def test_quote_accepts_database_backed_api_key(monkeypatch):
     from app.db import SessionLocal
     from app.models import APIKey, Subscription, User
     from app.security import hash_api_key
-    import app.routes.market as market
 
     class DummyTicker:
         def __init__(self, symbol: str):
@@ -49,7 +49,7 @@ def test_quote_accepts_database_backed_api_key(monkeypatch):
         def fast_info(self):
             return {'lastPrice': 123.45}
 
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     with SessionLocal() as db:
         user = db.query(User).filter(User.email == 'test-auth@yfapi.local').first()
@@ -84,7 +84,6 @@ def test_quote_rejects_customer_key_without_active_subscription(monkeypatch):
     from app.db import SessionLocal
     from app.models import APIKey, Subscription, User
     from app.security import hash_api_key
-    import app.routes.market as market
 
     class DummyTicker:
         def __init__(self, symbol: str):
@@ -94,7 +93,7 @@ def test_quote_rejects_customer_key_without_active_subscription(monkeypatch):
         def fast_info(self):
             return {'lastPrice': 123.45}
 
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     with SessionLocal() as db:
         user = db.query(User).filter(User.email == 'test-no-sub@yfapi.local').first()
@@ -2,6 +2,7 @@ from uuid import uuid4
 
 import pytest
 from fastapi.testclient import TestClient
+import yfinance as yf
 
 from app.main import app
 from app.config import settings
@@ -1042,7 +1043,6 @@ def test_webhook_checkout_completed_unpaid_does_not_provision_key(monkeypatch):
 
 def test_checkout_completed_unpaid_retry_does_not_downgrade_existing_active_subscription(monkeypatch):
     import app.routes.billing as billing
-    import app.routes.market as market
 
     from app.db import SessionLocal
     from app.models import Subscription, User
@@ -1071,7 +1071,7 @@ def test_checkout_completed_unpaid_retry_does_not_downgrade_existing_active_subs
         def fast_info(self):
             return {'lastPrice': 321.0}
 
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
     monkeypatch.setattr(settings, 'stripe_webhook_secret', 'whsec_mock')
 
     customer_id = f"cus_retry_{uuid4().hex[:8]}"
@@ -1202,7 +1202,6 @@ def test_webhook_checkout_completed_no_payment_required_provisions_trialing_key_
 @pytest.mark.e2e
 def test_subscription_updated_active_provisions_key_and_enables_market_access(monkeypatch):
     import app.routes.billing as billing
-    import app.routes.market as market
 
     from app.db import SessionLocal
     from app.models import APIKey, Subscription, User
@@ -1237,7 +1236,7 @@ def test_subscription_updated_active_provisions_key_and_enables_market_access(mo
 
     monkeypatch.setattr(billing.stripe, 'Customer', DummyCustomer)
     monkeypatch.setattr(billing.stripe.checkout, 'Session', DummyCheckoutSession)
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     checkout_response = client.post(
         '/v1/billing/checkout/session',
@@ -1309,7 +1308,6 @@ def test_subscription_updated_active_provisions_key_and_enables_market_access(mo
 @pytest.mark.e2e
 def test_subscription_updated_trialing_provisions_key_and_enables_market_access(monkeypatch):
     import app.routes.billing as billing
-    import app.routes.market as market
 
     from app.db import SessionLocal
     from app.models import APIKey, Subscription, User
@@ -1344,7 +1342,7 @@ def test_subscription_updated_trialing_provisions_key_and_enables_market_access(
 
     monkeypatch.setattr(billing.stripe, 'Customer', DummyCustomer)
     monkeypatch.setattr(billing.stripe.checkout, 'Session', DummyCheckoutSession)
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     checkout_response = client.post(
         '/v1/billing/checkout/session',
@@ -1428,7 +1426,6 @@ def test_unpaid_checkout_then_subscription_created_provisions_key_and_enables_ma
     created_status: str,
 ):
     import app.routes.billing as billing
-    import app.routes.market as market
 
     from app.db import SessionLocal
     from app.models import APIKey, Subscription, User
@@ -1463,7 +1460,7 @@ def test_unpaid_checkout_then_subscription_created_provisions_key_and_enables_ma
 
     monkeypatch.setattr(billing.stripe, 'Customer', DummyCustomer)
     monkeypatch.setattr(billing.stripe.checkout, 'Session', DummyCheckoutSession)
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     checkout_response = client.post(
         '/v1/billing/checkout/session',
@@ -1574,7 +1571,6 @@ def test_unpaid_checkout_then_subscription_created_provisions_key_and_enables_ma
 @pytest.mark.e2e
 def test_full_billing_flow_paid_provisions_key_and_cancellation_revokes_api_access(monkeypatch):
     import app.routes.billing as billing
-    import app.routes.market as market
 
     from app.db import SessionLocal
     from app.models import APIKey, Subscription, User
@@ -1607,7 +1603,7 @@ def test_full_billing_flow_paid_provisions_key_and_cancellation_revokes_api_acce
 
     monkeypatch.setattr(billing.stripe, 'Customer', DummyCustomer)
     monkeypatch.setattr(billing.stripe.checkout, 'Session', DummyCheckoutSession)
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     provisioned_key_suffix = f"flowtoken_{uuid4().hex}"
 
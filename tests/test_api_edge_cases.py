@@ -1,6 +1,7 @@
 import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
+import yfinance as yf
 
 from app.main import app
 from app.config import settings
@@ -9,6 +10,21 @@ client = TestClient(app)
 pytestmark = [pytest.mark.integration, pytest.mark.critical]
 
 
+@pytest.fixture(autouse=True)
+def _clear_market_cache():
+    import app.routes.market as market
+
+    market._CACHE.clear()
+    market._NOT_FOUND.clear()
+    market._BREAKER.reset()
+    market._FUNDAMENTALS.clear()
+    yield
+    market._CACHE.clear()
+    market._NOT_FOUND.clear()
+    market._BREAKER.reset()
+    market._FUNDAMENTALS.clear()
+
+
 def _auth_headers():
     return {"x-api-key": settings.api_master_key}
 
@@ -43,25 +59,19 @@ def test_quotes_requires_symbols_param():
 
 
 def test_history_empty_returns_404(monkeypatch):
-    import app.routes.market as market
-
-    monkeypatch.setattr(market.yf, 'Ticker', EmptyHistoryTicker)
+    monkeypatch.setattr(yf, 'Ticker', EmptyHistoryTicker)
     r = client.get('/v1/history/AAPL', headers=_auth_headers())
     assert r.status_code == 404
 
 
 def test_fundamentals_empty_returns_404(monkeypatch):
-    import app.routes.market as market
-
-    monkeypatch.setattr(market.yf, 'Ticker', EmptyHistoryTicker)
+    monkeypatch.setattr(yf, 'Ticker', EmptyHistoryTicker)
     r = client.get('/v1/fundamentals/AAPL', headers=_auth_headers())
     assert r.status_code == 404
 
 
 def test_upstream_crash_is_bad_gateway(monkeypatch):
-    import app.routes.market as market
-
-    monkeypatch.setattr(market.yf, 'Ticker', CrashTicker)
+    monkeypatch.setattr(yf, 'Ticker', CrashTicker)
     r = client.get('/v1/quote/AAPL', headers=_auth_headers())
     assert r.status_code == 502
 
@@ -71,11 +81,12 @@ def test_invalid_symbol_rejected_early():
     assert r.status_code == 400
 
 
-def test_quotes_reject_more_than_25_symbols():
-    symbols = ','.join([f'S{i}' for i in range(26)])
+def test_quotes_reject_more_than_max_symbols():
+    max_symbols = settings.market_quotes_max_symbols
+    symbols = ','.join([f'S{i}' for i in range(max_symbols + 1)])
     r = client.get(f'/v1/quotes?symbols={symbols}', headers=_auth_headers())
     assert r.status_code == 400
-    assert r.json()['detail'] == 'Maximum 25 symbols per request'
+    assert r.json()['detail'] == f'Maximum {max_symbols} symbols per request'
 
 
 def test_quotes_reject_invalid_symbol_in_batch():
@@ -3,7 +3,9 @@ from datetime import datetime
 import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
+import yfinance as yf
 
+import app.providers as providers
 from app.config import settings
 from app.db import SessionLocal
 from app.main import app
@@ -160,6 +162,83 @@ class InfoGetExplodesTicker:
         return GetExplodes()
 
 
+@pytest.fixture(autouse=True)
+def _clear_market_cache():
+    import app.routes.market as market
+
+    market._CACHE.clear()
+    market._NOT_FOUND.clear()
+    market._BREAKER.reset()
+    market._FUNDAMENTALS.clear()
+    yield
+    market._CACHE.clear()
+    market._NOT_FOUND.clear()
+    market._BREAKER.reset()
+    market._FUNDAMENTALS.clear()
+
+
+@pytest.fixture(autouse=True)
+def _per_symbol_quotes(monkeypatch):
+    # The ticker fakes below stand in for yf.Ticker; batched /v1/quotes retrieval is
+    # exercised explicitly through FakeYfData.
+    monkeypatch.setattr(settings, 'market_quotes_batch_size', 0)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+class BrokenRedis:
+    def get(self, key):
+        raise ConnectionError('redis down')
+
+    def set(self, key, value, ex=None):
+        raise ConnectionError('redis down')
+
+
+class FakeYfData:
+    calls = []
+    sessions = []
+    fail = False
+
+    def __init__(self, session=None):
+        FakeYfData.sessions.append(session)
+
+    def get_raw_json(self, url, params=None, timeout=None):
+        symbols = params['symbols'].split(',')
+        FakeYfData.calls.append(symbols)
+        if FakeYfData.fail:
+            raise RuntimeError('batch endpoint down')
+        return {
+            'quoteResponse': {
+                'result': [
+                    {
+                        'symbol': symbol,
+                        'currency': 'USD',
+                        'exchange': 'NMS',
+                        'regularMarketPrice': 100.0 + i,
+                        'regularMarketOpen': 99.0,
+                        'regularMarketDayHigh': float('inf'),
+                        'regularMarketDayLow': 98.0,
+                        'regularMarketPreviousClose': 99.5,
+                        'regularMarketVolume': 1000,
+                        'marketCap': 5000,
+                    }
+                    for i, symbol in enumerate(symbols)
+                    if symbol != 'BAD'
+                ],
+                'error': None,
+            }
+        }
+
+
 def _auth_headers():
     return {'x-api-key': settings.api_master_key}
 
@@ -181,8 +260,7 @@ def _master_api_key_id() -> int:
 
 
 def test_quote_ok(monkeypatch):
-    import app.routes.market as market
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     r = client.get('/v1/quote/AAPL', headers=_auth_headers())
     assert r.status_code == 200
@@ -193,8 +271,7 @@ def test_quote_ok(monkeypatch):
 
 
 def test_quotes_batch_mixed(monkeypatch):
-    import app.routes.market as market
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     r = client.get('/v1/quotes?symbols=AAPL,BAD,MSFT', headers=_auth_headers())
     assert r.status_code == 200
@@ -204,8 +281,7 @@ def test_quotes_batch_mixed(monkeypatch):
 
 
 def test_history_ok(monkeypatch):
-    import app.routes.market as market
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     r = client.get('/v1/history/AAPL?period=1mo&interval=1d', headers=_auth_headers())
     assert r.status_code == 200
@@ -215,8 +291,7 @@ def test_history_ok(monkeypatch):
 
 
 def test_fundamentals_ok(monkeypatch):
-    import app.routes.market as market
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     r = client.get('/v1/fundamentals/AAPL', headers=_auth_headers())
     assert r.status_code == 200
@@ -227,8 +302,7 @@ def test_fundamentals_ok(monkeypatch):
 
 
 def test_history_invalid_period_400(monkeypatch):
-    import app.routes.market as market
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     r = client.get('/v1/history/AAPL?period=13mo&interval=1d', headers=_auth_headers())
     assert r.status_code == 400
@@ -236,8 +310,7 @@ def test_history_invalid_period_400(monkeypatch):
 
 
 def test_history_invalid_interval_400(monkeypatch):
-    import app.routes.market as market
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     r = client.get('/v1/history/AAPL?period=1mo&interval=2h', headers=_auth_headers())
     assert r.status_code == 400
@@ -245,8 +318,7 @@ def test_history_invalid_interval_400(monkeypatch):
 
 
 def test_history_start_gt_end_400(monkeypatch):
-    import app.routes.market as market
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     r = client.get('/v1/history/AAPL?period=1mo&interval=1d&start=2026-02-01&end=2026-01-01', headers=_auth_headers())
     assert r.status_code == 400
@@ -254,8 +326,7 @@ def test_history_start_gt_end_400(monkeypatch):
 
 
 def test_quote_sanitizes_non_finite_numbers_to_null(monkeypatch):
-    import app.routes.market as market
-    monkeypatch.setattr(market.yf, 'Ticker', NonFiniteTicker)
+    monkeypatch.setattr(yf, 'Ticker', NonFiniteTicker)
 
     r = client.get('/v1/quote/AAPL', headers=_auth_headers())
     assert r.status_code == 200
@@ -268,8 +339,7 @@ def test_quote_sanitizes_non_finite_numbers_to_null(monkeypatch):
 
 
 def test_quotes_batch_sanitizes_non_finite_numbers_to_null(monkeypatch):
-    import app.routes.market as market
-    monkeypatch.setattr(market.yf, 'Ticker', NonFiniteTicker)
+    monkeypatch.setattr(yf, 'Ticker', NonFiniteTicker)
 
     r = client.get('/v1/quotes?symbols=AAPL,MSFT', headers=_auth_headers())
     assert r.status_code == 200
@@ -285,8 +355,7 @@ def test_quotes_batch_sanitizes_non_finite_numbers_to_null(monkeypatch):
 
 
 def test_fundamentals_sanitizes_non_finite_numbers_to_null(monkeypatch):
-    import app.routes.market as market
-    monkeypatch.setattr(market.yf, 'Ticker', NonFiniteTicker)
+    monkeypatch.setattr(yf, 'Ticker', NonFiniteTicker)
 
     r = client.get('/v1/fundamentals/AAPL', headers=_auth_headers())
     assert r.status_code == 200
@@ -303,7 +372,7 @@ def test_quote_uses_stale_cache_on_upstream_failure(monkeypatch):
     market._CACHE.clear()
     monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 1000.0)}))
     FlakyTicker.fail_mode = False
-    monkeypatch.setattr(market.yf, 'Ticker', FlakyTicker)
+    monkeypatch.setattr(yf, 'Ticker', FlakyTicker)
 
     warm = client.get('/v1/quote/AAPL', headers=_auth_headers())
     assert warm.status_code == 200
@@ -322,39 +391,1120 @@ def test_fundamentals_uses_stale_cache_on_upstream_failure(monkeypatch):
     market._CACHE.clear()
     monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 2000.0)}))
     FlakyTicker.fail_mode = False
-    monkeypatch.setattr(market.yf, 'Ticker', FlakyTicker)
+    monkeypatch.setattr(yf, 'Ticker', FlakyTicker)
 
     warm = client.get('/v1/fundamentals/AAPL', headers=_auth_headers())
     assert warm.status_code == 200
     assert warm.json()['stale'] is False
 
-    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 2040.0)}))
+    # Past both the memory stale window and the stored row's TTL: the expired row is the fallback.
+    expired_at = 2000.0 + settings.market_fundamentals_ttl_seconds + 1
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: expired_at)}))
     FlakyTicker.fail_mode = True
     stale = client.get('/v1/fundamentals/AAPL', headers=_auth_headers())
     assert stale.status_code == 200
     assert stale.json()['stale'] is True
 
 
-def test_quote_field_read_failure_maps_to_502(monkeypatch):
+def test_quote_serves_fresh_cache_without_upstream_call(monkeypatch):
+    import app.routes.market as market
+
+    calls = []
+
+    class CountingTicker(DummyTicker):
+        def __init__(self, symbol: str):
+            calls.append(symbol)
+            super().__init__(symbol)
+
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 3000.0)}))
+    monkeypatch.setattr(yf, 'Ticker', CountingTicker)
+
+    first = client.get('/v1/quote/AAPL', headers=_auth_headers())
+    assert first.status_code == 200
+    assert first.json()['cached'] is False
+
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 3010.0)}))
+    second = client.get('/v1/quote/AAPL', headers=_auth_headers())
+    assert second.status_code == 200
+    assert second.json()['cached'] is True
+    assert second.json()['stale'] is False
+    assert second.json()['last_price'] == 123.45
+    assert calls == ['AAPL']
+
+    batch = client.get('/v1/quotes?symbols=AAPL,MSFT', headers=_auth_headers())
+    assert batch.status_code == 200
+    assert [item['cached'] for item in batch.json()['data']] == [True, False]
+    assert calls == ['AAPL', 'MSFT']
+
+
+def test_fundamentals_are_served_from_the_store_until_it_expires(monkeypatch):
+    import app.routes.market as market
+
+    calls = []
+
+    class CountingTicker(DummyTicker):
+        def __init__(self, symbol: str):
+            calls.append(symbol)
+            super().__init__(symbol)
+
+    def at(now):
+        monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: now)}))
+
+    at(4000.0)
+    monkeypatch.setattr(yf, 'Ticker', CountingTicker)
+    first = client.get('/v1/fundamentals/AAPL', headers=_auth_headers())
+    assert first.json()['cached'] is False
+    assert client.get('/v1/fundamentals/AAPL', headers=_auth_headers()).json()['cached'] is True
+
+    # The memory entry is gone (another worker, a restart); the stored row still answers.
+    market._CACHE.clear()
+    at(4000.0 + settings.market_fundamentals_ttl_seconds - 60)
+    from_store = client.get('/v1/fundamentals/AAPL', headers=_auth_headers())
+    assert from_store.json() == {**first.json(), 'cached': True}
+    assert calls == ['AAPL']
+
+    market._CACHE.clear()
+    at(4000.0 + settings.market_fundamentals_ttl_seconds + 1)
+    refreshed = client.get('/v1/fundamentals/AAPL', headers=_auth_headers())
+    assert refreshed.json()['cached'] is False
+    assert calls == ['AAPL', 'AAPL']
+
+
+def test_fundamentals_store_keeps_profile_fields_longer_than_metrics(monkeypatch):
+    import app.routes.market as market
+
+    store = market._FUNDAMENTALS
+    store.put('AAPL', {'symbol': 'AAPL', 'sector': 'Technology', 'beta': 1.1}, 1000.0)
+    payload, fresh_until = store.get('AAPL', ['sector', 'beta'], 1000.0)
+    assert payload == {'symbol': 'AAPL', 'sector': 'Technology', 'beta': 1.1}
+    assert fresh_until == 1000.0 + settings.market_fundamentals_ttl_seconds
+    assert store.ttl_for('sector') == settings.market_fundamentals_profile_ttl_seconds
+
+    # A field the row has never stored makes the whole symbol due.
+    payload, fresh_until = store.get('AAPL', ['sector', 'beta', 'forward_pe'], 1000.0)
+    assert payload['forward_pe'] is None
+    assert fresh_until == 0.0
+
+
+def test_fundamentals_refresh_updates_stored_symbols(monkeypatch):
+    import app.routes.market as market
+
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+    old = market.time.time() - 13 * 3600
+    market._FUNDAMENTALS.put('AAPL', {'symbol': 'AAPL', 'sector': 'Old', 'beta': 0.5}, old)
+    market._FUNDAMENTALS.put('MSFT', {'symbol': 'MSFT', 'sector': 'Software'}, market.time.time())
+
+    assert market._FUNDAMENTALS_REFRESHER.run_once() == {'symbols': 1, 'failed': 0}
+
+    payload, _ = market._FUNDAMENTALS.get('AAPL', market.FUNDAMENTALS_FIELDS, market.time.time())
+    assert payload['sector'] == 'Technology'
+    assert payload['beta'] == 1.1
+    cached = client.get('/v1/fundamentals/AAPL', headers=_auth_headers())
+    assert cached.json()['cached'] is True
+    assert cached.json()['sector'] == 'Technology'
+
+
+def test_fundamentals_store_writes_run_outside_the_upstream_governor(monkeypatch):
     import app.routes.market as market
 
-    monkeypatch.setattr(market.yf, 'Ticker', InfoGetExplodesTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+    store_put = market._FUNDAMENTALS.put
+    in_flight_during_put = []
+
+    def put(symbol, payload, now):
+        in_flight_during_put.append(market._GOVERNOR.stats()['in_flight'])
+        store_put(symbol, payload, now)
+
+    monkeypatch.setattr(market._FUNDAMENTALS, 'put', put)
+
+    assert client.get('/v1/fundamentals/AAPL', headers=_auth_headers()).status_code == 200
+    market._refresh_fundamentals('MSFT')
+
+    assert in_flight_during_put == [0, 0]
+    payload, _ = market._FUNDAMENTALS.get('MSFT', market.FUNDAMENTALS_FIELDS, market.time.time())
+    assert payload['sector'] == 'Technology'
+
+
+def test_ops_market_cache_stats_require_master_key(monkeypatch):
+    import app.routes.market as market
+
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+    client.get('/v1/quote/AAPL', headers=_auth_headers())
+    client.get('/v1/quote/AAPL', headers=_auth_headers())
+
+    assert client.get('/v1/ops/market-cache').status_code == 401
+    assert client.get('/v1/ops/market-cache', headers={'x-api-key': 'not-master'}).status_code == 403
+
+    r = client.get('/v1/ops/market-cache', headers=_auth_headers())
+    assert r.status_code == 200
+    body = r.json()
+    assert body['entries'] == 1
+    assert body['hits'] >= 1
+    assert body['max_entries'] == settings.market_cache_max_entries
+
+
+def test_quote_reads_through_redis_l2_shared_by_workers(monkeypatch):
+    import app.routes.market as market
+    from app.market_cache import RedisCacheTier
+
+    calls = []
+
+    class CountingTicker(DummyTicker):
+        def __init__(self, symbol: str):
+            calls.append(symbol)
+            super().__init__(symbol)
+
+    fake_redis = FakeRedis()
+    monkeypatch.setattr(market, '_L2', RedisCacheTier(fake_redis))
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 5000.0)}))
+    monkeypatch.setattr(yf, 'Ticker', CountingTicker)
+
+    warm = client.get('/v1/quote/AAPL', headers=_auth_headers())
+    assert warm.json()['cached'] is False
+    assert 'yfapi:market:quote:AAPL' in fake_redis.store
+
+    # A second worker starts with an empty L1 but shares Redis.
+    market._CACHE.clear()
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 5010.0)}))
+    shared = client.get('/v1/quote/AAPL', headers=_auth_headers())
+    assert shared.json()['cached'] is True
+    assert shared.json()['stale'] is False
+    assert calls == ['AAPL']
+    assert 'quote:AAPL' in market._CACHE
+
+    # Stale-window semantics survive the trip through L2.
+    market._CACHE.clear()
+    FlakyTicker.fail_mode = True
+    monkeypatch.setattr(yf, 'Ticker', FlakyTicker)
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 5100.0)}))
+    stale = client.get('/v1/quote/AAPL', headers=_auth_headers())
+    FlakyTicker.fail_mode = False
+    assert stale.status_code == 200
+    assert stale.json()['stale'] is True
+
+
+def test_quote_ignores_unavailable_redis_l2(monkeypatch):
+    import app.routes.market as market
+    from app.market_cache import RedisCacheTier
+
+    tier = RedisCacheTier(BrokenRedis())
+    monkeypatch.setattr(market, '_L2', tier)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+
     r = client.get('/v1/quote/AAPL', headers=_auth_headers())
-    assert r.status_code == 502
+    assert r.status_code == 200
+    assert r.json()['last_price'] == 123.45
+    assert tier.stats()['errors'] >= 1
 
 
-def test_fundamentals_field_read_failure_maps_to_502(monkeypatch):
+def test_quotes_fetch_symbols_concurrently_with_per_symbol_timeout(monkeypatch):
+    import time
+
+
+    class SlowTicker(DummyTicker):
+        @property
+        def fast_info(self):
+            time.sleep(2 if self.symbol == 'SLOW' else 0.2)
+            return DummyTicker.fast_info.fget(self)
+
+    monkeypatch.setattr(yf, 'Ticker', SlowTicker)
+    monkeypatch.setattr(settings, 'market_quotes_concurrency', 10)
+    monkeypatch.setattr(settings, 'market_quotes_symbol_timeout_seconds', 0.5)
+
+    symbols = ','.join([f'S{i}' for i in range(9)] + ['SLOW'])
+    started = time.monotonic()
+    r = client.get(f'/v1/quotes?symbols={symbols}', headers=_auth_headers())
+    elapsed = time.monotonic() - started
+
+    assert r.status_code == 200
+    body = r.json()
+    assert elapsed < 1.5
+    assert [item['symbol'] for item in body['data']] == [f'S{i}' for i in range(9)] + ['SLOW']
+    assert all(item['ok'] is True and item['stale'] is False for item in body['data'][:9])
+    assert body['data'][9] == {'symbol': 'SLOW', 'ok': False, 'error': 'upstream_error'}
+
+
+def test_quotes_batches_cache_misses_into_few_upstream_calls(monkeypatch):
+    import app.routes.market as market
+
+    FakeYfData.calls = []
+    FakeYfData.sessions = []
+    FakeYfData.fail = False
+    monkeypatch.setattr(providers, 'YfData', FakeYfData)
+    monkeypatch.setattr(settings, 'market_quotes_batch_size', 50)
+
+    symbols = [f'S{i}' for i in range(120)] + ['BAD']
+    r = client.get(f"/v1/quotes?symbols={','.join(symbols)}", headers=_auth_headers())
+    assert r.status_code == 200
+    body = r.json()
+    assert body['count'] == 121
+    assert len(FakeYfData.calls) == 3
+    assert sorted(sum(FakeYfData.calls, [])) == sorted(symbols)
+    assert all(session is market._YAHOO.session for session in FakeYfData.sessions)
+
+    by_symbol = {item['symbol']: item for item in body['data']}
+    assert [item['symbol'] for item in body['data']] == symbols
+    assert by_symbol['S0']['ok'] is True
+    assert by_symbol['S0']['exchange'] == 'NMS'
+    assert by_symbol['S0']['day_high'] is None
+    assert by_symbol['S0']['volume'] == 1000
+    assert by_symbol['BAD'] == {'symbol': 'BAD', 'ok': False, 'error': 'unavailable'}
+
+    # Batched results land in the same quote:SYM cache as /v1/quote.
+    monkeypatch.setattr(yf, 'Ticker', FlakyTicker)
+    FlakyTicker.fail_mode = True
+    single = client.get('/v1/quote/S1', headers=_auth_headers())
+    FlakyTicker.fail_mode = False
+    assert single.status_code == 200
+    assert single.json()['cached'] is True
+
+
+def test_concurrent_batched_quotes_share_in_flight_symbol_fetches(monkeypatch):
+    import threading
+    import time
+
+    import app.routes.market as market
+
+    release = threading.Event()
+
+    class SlowYfData(FakeYfData):
+        def get_raw_json(self, url, params=None, timeout=None):
+            release.wait(timeout=5)
+            return super().get_raw_json(url, params=params, timeout=timeout)
+
+    def wait_for(condition):
+        deadline = time.monotonic() + 5
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    FakeYfData.calls = []
+    FakeYfData.fail = False
+    monkeypatch.setattr(providers, 'YfData', SlowYfData)
+    monkeypatch.setattr(settings, 'market_quotes_batch_size', 50)
+    coalesced_before = market._INFLIGHT.stats()['coalesced']
+
+    responses = []
+    threads = [
+        threading.Thread(
+            target=lambda: responses.append(client.get('/v1/quotes?symbols=AAPL,MSFT', headers=_auth_headers()))
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    # The first batch leads both symbols; the other four requests join its futures.
+    wait_for(lambda: market._INFLIGHT.stats()['coalesced'] - coalesced_before >= 8)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert FakeYfData.calls == [['AAPL', 'MSFT']]
+    assert len(responses) == 5
+    for response in responses:
+        assert [(item['symbol'], item['ok']) for item in response.json()['data']] == [('AAPL', True), ('MSFT', True)]
+
+    # A batch joins a single-symbol fetch already in flight and only fetches the rest.
+    market._CACHE.clear()
+    FakeYfData.calls = []
+    ticker_started = threading.Event()
+    ticker_release = threading.Event()
+
+    class SlowTicker(DummyTicker):
+        @property
+        def fast_info(self):
+            ticker_started.set()
+            ticker_release.wait(timeout=5)
+            return DummyTicker.fast_info.fget(self)
+
+    monkeypatch.setattr(yf, 'Ticker', SlowTicker)
+    single = []
+    single_thread = threading.Thread(target=lambda: single.append(client.get('/v1/quote/TSLA', headers=_auth_headers())))
+    single_thread.start()
+    ticker_started.wait(timeout=5)
+    batch = []
+    batch_thread = threading.Thread(
+        target=lambda: batch.append(client.get('/v1/quotes?symbols=TSLA,NVDA', headers=_auth_headers()))
+    )
+    batch_thread.start()
+    wait_for(lambda: FakeYfData.calls)
+    ticker_release.set()
+    single_thread.join(timeout=5)
+    batch_thread.join(timeout=5)
+
+    assert FakeYfData.calls == [['NVDA']]
+    assert single[0].json()['last_price'] == 123.45
+    tsla, nvda = batch[0].json()['data']
+    assert tsla['ok'] is True and tsla['last_price'] == 123.45
+    assert nvda['ok'] is True
+
+
+def test_not_found_symbols_are_negatively_cached_until_they_resolve(monkeypatch):
+    import app.routes.market as market
+
+    calls = []
+    listed = set()
+
+    class ListingTicker(DummyTicker):
+        def __init__(self, symbol: str):
+            calls.append(symbol)
+            super().__init__(symbol)
+
+        @property
+        def fast_info(self):
+            return super().fast_info if self.symbol in listed else {}
+
+        @property
+        def info(self):
+            return super().info if self.symbol in listed else {}
+
+        def history(self, **kwargs):
+            return super().history(**kwargs) if self.symbol in listed else pd.DataFrame()
+
+    def at(now):
+        monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: now)}))
+
+    at(7000.0)
+    monkeypatch.setattr(yf, 'Ticker', ListingTicker)
+    for path in ('/v1/quote/NEWCO', '/v1/fundamentals/NEWCO', '/v1/history/NEWCO'):
+        assert client.get(path, headers=_auth_headers()).status_code == 404
+        assert client.get(path, headers=_auth_headers()).status_code == 404
+    assert calls == ['NEWCO', 'NEWCO', 'NEWCO']
+    batch = client.get('/v1/quotes?symbols=NEWCO', headers=_auth_headers())
+    assert batch.json()['data'] == [{'symbol': 'NEWCO', 'ok': False, 'error': 'unavailable'}]
+    assert len(calls) == 3
+    assert market._NOT_FOUND.stats()['entries'] == 3
+
+    # Past the negative TTL the symbol is retried; resolving drops its negative entry.
+    listed.add('NEWCO')
+    at(7000.0 + settings.market_not_found_ttl_seconds + 1)
+    assert client.get('/v1/quote/NEWCO', headers=_auth_headers()).status_code == 200
+    assert 'quote:NEWCO' not in market._NOT_FOUND
+
+
+def test_batch_quotes_record_and_clear_not_found_symbols(monkeypatch):
+    import app.routes.market as market
+
+    FakeYfData.calls = []
+    FakeYfData.fail = False
+    monkeypatch.setattr(providers, 'YfData', FakeYfData)
+    monkeypatch.setattr(settings, 'market_quotes_batch_size', 50)
+
+    first = client.get('/v1/quotes?symbols=AAPL,BAD', headers=_auth_headers())
+    assert first.json()['data'][1] == {'symbol': 'BAD', 'ok': False, 'error': 'unavailable'}
+    assert 'quote:BAD' in market._NOT_FOUND
+
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+    FakeYfData.calls = []
+    assert client.get('/v1/quote/BAD', headers=_auth_headers()).status_code == 404
+    second = client.get('/v1/quotes?symbols=AAPL,BAD', headers=_auth_headers())
+    assert [item['ok'] for item in second.json()['data']] == [True, False]
+    assert FakeYfData.calls == []
+
+    # A later successful load for the key (here a prewarm of the quote) clears it.
+    market._cache_set('quote:BAD', {'symbol': 'BAD'})
+    assert 'quote:BAD' not in market._NOT_FOUND
+
+
+def test_market_routes_serve_from_the_synthetic_provider(monkeypatch):
+    import app.routes.market as market
+
+    class NoYahoo:
+        def __init__(self, symbol: str):
+            raise AssertionError('yfinance must not be called')
+
+    monkeypatch.setattr(yf, 'Ticker', NoYahoo)
+    monkeypatch.setattr(settings, 'market_quotes_batch_size', 50)
+    synthetic = providers.SyntheticProvider(unknown_symbols=frozenset({'GONE'}))
+    monkeypatch.setattr(market, '_PROVIDER', synthetic)
+
+    def no_bootstrap():
+        raise AssertionError('the synthetic provider must not bootstrap a Yahoo crumb')
+
+    monkeypatch.setattr(market._YAHOO, 'start', no_bootstrap)
+
+    market.start_upstream_session()
+    quote = client.get('/v1/quote/AAPL', headers=_auth_headers())
+    assert quote.status_code == 200
+    assert quote.json()['exchange'] == 'SYN'
+    history = client.get('/v1/history/AAPL?period=5y&interval=1d', headers=_auth_headers())
+    assert history.status_code == 200
+    assert history.json()['count'] > 1200
+    assert client.get('/v1/fundamentals/AAPL', headers=_auth_headers()).json()['long_name'] == 'AAPL Synthetic Holdings'
+    batch = client.get('/v1/quotes?symbols=MSFT,GONE', headers=_auth_headers())
+    assert [item['ok'] for item in batch.json()['data']] == [True, False]
+    assert client.get('/v1/quote/GONE', headers=_auth_headers()).status_code == 404
+
+    monkeypatch.setattr(synthetic, 'failure_rate', 1.0)
+    assert client.get('/v1/quote/TSLA', headers=_auth_headers()).status_code == 502
+
+    stats = client.get('/v1/ops/upstream', headers=_auth_headers()).json()['provider']
+    assert stats['name'] == 'synthetic'
+    assert stats['failures'] == 1
+
+
+def test_quotes_batch_failure_falls_back_to_stale_or_upstream_error(monkeypatch):
+    import app.routes.market as market
+
+    monkeypatch.setattr(providers, 'YfData', FakeYfData)
+    monkeypatch.setattr(settings, 'market_quotes_batch_size', 50)
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 6000.0)}))
+    FakeYfData.calls = []
+    FakeYfData.fail = False
+    client.get('/v1/quotes?symbols=AAPL', headers=_auth_headers())
+
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 6040.0)}))
+    FakeYfData.fail = True
+    r = client.get('/v1/quotes?symbols=AAPL,MSFT', headers=_auth_headers())
+    FakeYfData.fail = False
+    assert r.status_code == 200
+    aapl, msft = r.json()['data']
+    assert aapl['ok'] is True and aapl['stale'] is True
+    assert msft == {'symbol': 'MSFT', 'ok': False, 'error': 'upstream_error'}
+
+
+def test_history_cache_ttl_depends_on_interval(monkeypatch):
+    import app.routes.market as market
+
+    calls = []
+
+    class CountingTicker(DummyTicker):
+        def history(self, **kwargs):
+            calls.append(kwargs['interval'])
+            return super().history(**kwargs)
+
+    monkeypatch.setattr(yf, 'Ticker', CountingTicker)
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 7000.0)}))
+    assert client.get('/v1/history/AAPL?period=1d&interval=1m', headers=_auth_headers()).json()['cached'] is False
+    assert client.get('/v1/history/AAPL?period=1y&interval=1d', headers=_auth_headers()).json()['cached'] is False
+
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 7000.0 + 120)}))
+    intraday = client.get('/v1/history/AAPL?period=1d&interval=1m', headers=_auth_headers())
+    daily = client.get('/v1/history/aapl?period=1y&interval=1D', headers=_auth_headers())
+
+    assert intraday.json()['cached'] is False
+    assert daily.status_code == 200
+    assert daily.json()['cached'] is True
+    assert daily.json()['period'] == '1y'
+    assert daily.json()['count'] == 2
+    assert calls == ['1m', '1d', '1m']
+
+
+def test_history_uses_stale_cache_on_upstream_failure(monkeypatch):
+    import app.routes.market as market
+
+    class FailingHistoryTicker(DummyTicker):
+        def history(self, **kwargs):
+            raise RuntimeError('upstream down')
+
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 8000.0)}))
+    warm = client.get('/v1/history/AAPL?period=1d&interval=5m', headers=_auth_headers())
+    assert warm.json()['stale'] is False
+
+    monkeypatch.setattr(yf, 'Ticker', FailingHistoryTicker)
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 8000.0 + 400)}))
+    stale = client.get('/v1/history/AAPL?period=1d&interval=5m', headers=_auth_headers())
+    assert stale.status_code == 200
+    assert stale.json()['stale'] is True
+    assert stale.json()['count'] == 2
+
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 8000.0 + 3600)}))
+    expired = client.get('/v1/history/AAPL?period=1d&interval=5m', headers=_auth_headers())
+    assert expired.status_code == 502
+
+
+def test_stale_while_revalidate_serves_stale_and_refreshes_once_in_background(monkeypatch):
+    import threading
+    import time
+
+    import app.routes.market as market
+
+    calls = []
+    release = threading.Event()
+
+    class SlowTicker(DummyTicker):
+        @property
+        def fast_info(self):
+            calls.append(self.symbol)
+            release.wait(timeout=5)
+            return {**DummyTicker.fast_info.fget(self), 'lastPrice': 200.0}
+
+    monkeypatch.setattr(settings, 'market_cache_stale_while_revalidate', True)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 9000.0)}))
+    assert client.get('/v1/quote/AAPL', headers=_auth_headers()).json()['last_price'] == 123.45
+
+    monkeypatch.setattr(yf, 'Ticker', SlowTicker)
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 9000.0 + 120)}))
+    started = time.monotonic()
+    responses = [client.get('/v1/quote/AAPL', headers=_auth_headers()).json() for _ in range(3)]
+    batch = client.get('/v1/quotes?symbols=AAPL', headers=_auth_headers()).json()
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.0
+    assert all(body['stale'] is True and body['last_price'] == 123.45 for body in responses)
+    assert batch['data'][0]['stale'] is True
+    assert batch['data'][0]['last_price'] == 123.45
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while market._INFLIGHT.stats()['in_flight'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    fresh = client.get('/v1/quote/AAPL', headers=_auth_headers()).json()
+    assert calls == ['AAPL']
+    assert fresh['stale'] is False
+    assert fresh['cached'] is True
+    assert fresh['last_price'] == 200.0
+
+
+def test_circuit_breaker_serves_stale_or_503_without_calling_a_failing_provider(monkeypatch):
+    import app.routes.market as market
+    from app.upstream import CircuitBreaker
+
+    calls = []
+
+    class FailingProviderTicker(DummyTicker):
+        @property
+        def fast_info(self):
+            calls.append(self.symbol)
+            raise RuntimeError('upstream down')
+
+    breaker = CircuitBreaker(
+        failure_ratio=0.75,
+        min_calls=4,
+        window=10,
+        open_seconds=30,
+        slow_call_seconds=5,
+        ignored=(market._SymbolNotFound,),
+    )
+    monkeypatch.setattr(market, '_BREAKER', breaker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 7000.0)}))
+    assert client.get('/v1/quote/AAPL', headers=_auth_headers()).status_code == 200
+
+    monkeypatch.setattr(yf, 'Ticker', FailingProviderTicker)
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 7000.0 + 120)}))
+    for symbol in ('MSFT', 'TSLA', 'NVDA'):
+        assert client.get(f'/v1/quote/{symbol}', headers=_auth_headers()).status_code == 502
+    assert calls == ['MSFT', 'TSLA', 'NVDA']
+
+    stale = client.get('/v1/quote/AAPL', headers=_auth_headers())
+    assert stale.status_code == 200
+    assert stale.json()['stale'] is True
+
+    unavailable = client.get('/v1/quote/AMZN', headers=_auth_headers())
+    assert unavailable.status_code == 503
+    assert 1 <= int(unavailable.headers['Retry-After']) <= 30
+    assert calls == ['MSFT', 'TSLA', 'NVDA']
+
+    ops = client.get('/v1/ops/upstream', headers=_auth_headers())
+    assert ops.status_code == 200
+    assert ops.json()['breaker']['state'] == 'open'
+    assert ops.json()['breaker']['rejected'] == 2
+    assert client.get('/v1/ops/upstream', headers={'x-api-key': 'not-master'}).status_code == 403
+
+
+def test_quotes_burst_is_capped_by_the_upstream_governor(monkeypatch):
+    import threading
+    import time
+
+    import app.routes.market as market
+    from app.upstream import UpstreamGovernor
+
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    class CountingTicker(DummyTicker):
+        @property
+        def fast_info(self):
+            with lock:
+                active.append(self.symbol)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(self.symbol)
+            return DummyTicker.fast_info.fget(self)
+
+    monkeypatch.setattr(yf, 'Ticker', CountingTicker)
+    monkeypatch.setattr(settings, 'market_quotes_concurrency', 10)
+    monkeypatch.setattr(
+        market,
+        '_GOVERNOR',
+        UpstreamGovernor(max_in_flight=3, rate_per_second=0, burst=1, max_wait_seconds=5),
+    )
+
+    r = client.get('/v1/quotes?symbols=' + ','.join(f'S{i}' for i in range(10)), headers=_auth_headers())
+    assert r.status_code == 200
+    assert all(item['ok'] for item in r.json()['data'])
+    assert max(peak) <= 3
+
+    ops = client.get('/v1/ops/upstream', headers=_auth_headers()).json()
+    assert ops['governor']['calls'] == 10
+    assert ops['governor']['max_in_flight'] == 3
+
+    monkeypatch.setattr(
+        market,
+        '_GOVERNOR',
+        UpstreamGovernor(max_in_flight=1, rate_per_second=0.01, burst=1, max_wait_seconds=0.05),
+    )
+    assert client.get('/v1/quote/AAPL', headers=_auth_headers()).status_code == 200
+    busy = client.get('/v1/quote/MSFT', headers=_auth_headers())
+    assert busy.status_code == 503
+    assert busy.headers['Retry-After'] == '1'
+
+
+def test_cache_prewarm_fills_quote_and_daily_history_before_serving(monkeypatch):
+    import app.routes.market as market
+
+    calls = []
+
+    class CountingTicker(DummyTicker):
+        @property
+        def fast_info(self):
+            calls.append(('quote', self.symbol))
+            return DummyTicker.fast_info.fget(self)
+
+        def history(self, **kwargs):
+            calls.append(('history', self.symbol))
+            return DummyTicker.history(self, **kwargs)
+
+    monkeypatch.setattr(yf, 'Ticker', CountingTicker)
+    monkeypatch.setattr(market, '_DEMAND', market.SymbolDemand())
+    monkeypatch.setattr(settings, 'market_prewarm_symbols', 'aapl')
+    monkeypatch.setattr(settings, 'market_prewarm_top_n', 1)
+    monkeypatch.setattr(settings, 'market_prewarm_interval_seconds', 20)
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 6000.0)}))
+
+    market._DEMAND.record(['MSFT', 'MSFT', 'TSLA'])
+    market.start_cache_prewarm()
+    market.stop_cache_prewarm()
+
+    assert sorted(calls) == [('history', 'AAPL'), ('history', 'MSFT'), ('quote', 'AAPL'), ('quote', 'MSFT')]
+    quote = client.get('/v1/quote/AAPL', headers=_auth_headers()).json()
+    history = client.get('/v1/history/MSFT?period=1mo&interval=1d', headers=_auth_headers()).json()
+    assert quote['cached'] is True
+    assert history['cached'] is True
+
+    # Entries still fresh past the next cycle are skipped; the quote nearing its TTL is refreshed.
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 6015.0)}))
+    calls.clear()
+    market._PREWARMER.run_once()
+    assert sorted(calls) == [('quote', 'AAPL'), ('quote', 'MSFT')]
+
+
+def test_market_routes_are_async_and_run_upstream_work_on_the_market_executor(monkeypatch):
+    import inspect
+    import threading
+
+    import app.routes.market as market
+
+    threads = []
+
+    class ThreadRecordingTicker(DummyTicker):
+        @property
+        def fast_info(self):
+            threads.append(threading.current_thread().name)
+            return DummyTicker.fast_info.fget(self)
+
+    monkeypatch.setattr(yf, 'Ticker', ThreadRecordingTicker)
+
+    for handler in (market.quote, market.history, market.history_batch, market.quotes, market.fundamentals):
+        assert inspect.iscoroutinefunction(inspect.unwrap(handler))
+
+    assert client.get('/v1/quote/AAPL', headers=_auth_headers()).status_code == 200
+    assert client.get('/v1/quotes?symbols=MSFT,TSLA', headers=_auth_headers()).status_code == 200
+    assert len(threads) == 3
+    assert all(name.startswith('market-upstream') for name in threads)
+
+    executor = client.get('/v1/ops/upstream', headers=_auth_headers()).json()['executor']
+    assert executor['max_workers'] == settings.market_upstream_max_workers
+    assert executor['completed'] >= 3
+    assert executor['active'] == 0
+
+
+def test_market_endpoints_emit_etags_and_honour_if_none_match(monkeypatch):
     import app.routes.market as market
 
-    monkeypatch.setattr(market.yf, 'Ticker', InfoGetExplodesTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 5000.0)}))
+
+    for path in ('/v1/quote/AAPL', '/v1/fundamentals/AAPL', '/v1/quotes?symbols=AAPL,BAD', '/v1/history/AAPL'):
+        first = client.get(path, headers={**_auth_headers(), 'Accept-Encoding': 'identity'})
+        assert first.status_code == 200
+        etag = first.headers['ETag']
+        # Weak: the body's "cached" flag differs between the first and repeated reads.
+        assert etag.startswith('W/"') and etag.endswith('"')
+        assert first.headers['Cache-Control'].startswith('private, max-age=')
+
+        repeat = client.get(path, headers={**_auth_headers(), 'If-None-Match': etag})
+        assert repeat.status_code == 304
+        assert repeat.content == b''
+        assert repeat.headers['ETag'] == etag
+
+        strong = client.get(path, headers={**_auth_headers(), 'If-None-Match': f'"other", {etag[2:]}'})
+        assert strong.status_code == 304
+        assert client.get(path, headers={**_auth_headers(), 'If-None-Match': '"other"'}).status_code == 200
+
+    quote = client.get('/v1/quote/AAPL', headers=_auth_headers())
+    assert quote.headers['Cache-Control'] == f'private, max-age={settings.market_cache_ttl_seconds}'
+    batch = client.get('/v1/quotes?symbols=AAPL,BAD', headers=_auth_headers())
+    assert batch.headers['Cache-Control'] == 'private, max-age=0'
+
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 5010.0)}))
+    aging = client.get('/v1/quote/AAPL', headers={**_auth_headers(), 'If-None-Match': quote.headers['ETag']})
+    assert aging.status_code == 304
+    assert aging.headers['Cache-Control'] == f'private, max-age={settings.market_cache_ttl_seconds - 10}'
+
+    # A refreshed entry gets a new ETag.
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 5000.0 + 3600)}))
+    refreshed = client.get('/v1/quote/AAPL', headers={**_auth_headers(), 'If-None-Match': quote.headers['ETag']})
+    assert refreshed.status_code == 200
+    assert refreshed.headers['ETag'] != quote.headers['ETag']
+
+
+def test_revalidation_does_not_queue_behind_its_joiners(monkeypatch):
+    import threading
+    import time
+
+    import app.routes.market as market
+    from app.upstream import MeteredThreadPoolExecutor
+
+    # The only request thread is busy joining the key; the refresh it waits on must not
+    # need that thread to start.
+    request_pool = MeteredThreadPoolExecutor(max_workers=1, thread_name_prefix='saturated')
+    monkeypatch.setattr(market, '_UPSTREAM_EXECUTOR', request_pool)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+    coalesced = market._INFLIGHT.stats()['coalesced']
+    refresh_threads = []
+
+    def refresh():
+        # Hold the refresh until the joiner is waiting on it.
+        deadline = time.monotonic() + 5
+        while market._INFLIGHT.stats()['coalesced'] == coalesced and time.monotonic() < deadline:
+            time.sleep(0.01)
+        refresh_threads.append(threading.current_thread().name)
+        return market._fetch_quote('AAPL')
+
+    try:
+        market._revalidate('quote:AAPL', refresh)
+        joiner = request_pool.submit(market._INFLIGHT.do, 'quote:AAPL', lambda: pytest.fail('joiner must not lead'))
+        payload, _ = joiner.result(timeout=5)
+    finally:
+        request_pool.shutdown(wait=False)
+
+    assert payload['last_price'] == 123.45
+    assert market._INFLIGHT.stats()['coalesced'] == coalesced + 1
+    assert len(refresh_threads) == 1 and refresh_threads[0].startswith('market-revalidate')
+    ops = client.get('/v1/ops/upstream', headers=_auth_headers()).json()
+    assert ops['revalidate_executor']['max_workers'] == settings.market_revalidate_max_workers
+
+
+def test_etag_comes_from_the_entry_the_body_was_read_from(monkeypatch):
+    import app.routes.market as market
+
+    def at(now):
+        monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: now)}))
+
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+    at(5000.0)
+    for path in ('/v1/quote/AAPL', '/v1/quotes?symbols=AAPL', '/v1/fundamentals/AAPL'):
+        client.get(path, headers=_auth_headers())
+    at(5005.0)
+    original = {
+        path: client.get(path, headers=_auth_headers()).headers['ETag']
+        for path in ('/v1/quote/AAPL', '/v1/quotes?symbols=AAPL', '/v1/fundamentals/AAPL')
+    }
+
+    # A background refresh replaces the entries after the payload was read but before
+    # the tag is built; the tag must still describe the body that is sent.
+    entry_validator = market._entry_validator
+
+    def replace_then_validate(cache_key, payload, *args, **kwargs):
+        at(5010.0)
+        market._cache_set(cache_key, {**payload, 'last_price': 999.0})
+        at(5005.0)
+        return entry_validator(cache_key, payload, *args, **kwargs)
+
+    for path, etag in original.items():
+        market._CACHE.clear()
+        at(5000.0)
+        client.get(path, headers=_auth_headers())
+        at(5005.0)
+        monkeypatch.setattr(market, '_entry_validator', replace_then_validate)
+        served = client.get(path, headers=_auth_headers())
+        monkeypatch.setattr(market, '_entry_validator', entry_validator)
+        body = served.json()
+        assert (body['data'][0] if 'data' in body else body)['cached'] is True
+        assert served.headers['ETag'] == etag
+
+
+def test_history_etag_varies_by_representation_and_304_skips_serialization(monkeypatch):
+    import app.routes.market as market
+
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+    rows = client.get('/v1/history/AAPL?period=1mo&interval=1d', headers=_auth_headers())
+    columns = client.get('/v1/history/AAPL?period=1mo&interval=1d&format=columns', headers=_auth_headers())
+    csv = client.get('/v1/history/AAPL?period=1mo&interval=1d&format=csv', headers=_auth_headers())
+    assert len({rows.headers['ETag'], columns.headers['ETag'], csv.headers['ETag']}) == 3
+    assert csv.headers['X-History-Count'] == '2'
+
+    def fail_if_serialized(*args, **kwargs):
+        raise AssertionError('304 must not serialize the payload')
+
+    monkeypatch.setattr(market, '_history_data', fail_if_serialized)
+    monkeypatch.setattr(market, 'history_csv', fail_if_serialized)
+    for response, query in ((rows, ''), (csv, '&format=csv')):
+        r = client.get(
+            f'/v1/history/AAPL?period=1mo&interval=1d{query}',
+            headers={**_auth_headers(), 'If-None-Match': response.headers['ETag']},
+        )
+        assert r.status_code == 304
+
+
+def test_history_is_compressed_but_small_quotes_are_not(monkeypatch):
+    class LongHistoryTicker(DummyTicker):
+        def history(self, **kwargs):
+            idx = pd.date_range('2021-01-04', periods=1260, freq='B')
+            return pd.DataFrame(
+                {'Open': 100.0, 'High': 101.0, 'Low': 99.0, 'Close': 100.5, 'Volume': 1000},
+                index=idx,
+            )
+
+    monkeypatch.setattr(yf, 'Ticker', LongHistoryTicker)
+
+    identity = client.get('/v1/history/AAPL?period=5y&interval=1d', headers={**_auth_headers(), 'Accept-Encoding': 'identity'})
+    compressed = client.get('/v1/history/AAPL?period=5y&interval=1d', headers={**_auth_headers(), 'Accept-Encoding': 'gzip, br'})
+    assert compressed.headers['Content-Encoding'] == 'br'
+    assert compressed.num_bytes_downloaded < identity.num_bytes_downloaded / 5
+    assert compressed.json()['data'] == identity.json()['data']
+
+    quote = client.get('/v1/quote/AAPL', headers={**_auth_headers(), 'Accept-Encoding': 'gzip, br'})
+    assert quote.status_code == 200
+    assert 'Content-Encoding' not in quote.headers
+
+
+def test_history_columns_format_returns_one_array_per_field(monkeypatch):
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+
+    rows = client.get('/v1/history/AAPL?period=1mo&interval=1d', headers=_auth_headers()).json()
+    r = client.get('/v1/history/AAPL?period=1mo&interval=1d&format=columns', headers=_auth_headers())
+    assert r.status_code == 200
+    body = r.json()
+    assert body['format'] == 'columns'
+    assert body['count'] == 2
+    assert body['data'] == {
+        'ts': [row['ts'] for row in rows['data']],
+        'open': [100.0, 101.0],
+        'high': [102.0, 103.0],
+        'low': [99.0, 100.0],
+        'close': [101.0, 102.0],
+        'volume': [1000, 2000],
+    }
+
+    epoch = client.get('/v1/history/AAPL?period=1mo&interval=1d&format=columns&ts_format=epoch', headers=_auth_headers())
+    assert epoch.json()['data']['ts'] == [1767225600, 1767312000]
+
+    epoch_rows = client.get('/v1/history/AAPL?period=1mo&interval=1d&ts_format=epoch', headers=_auth_headers())
+    assert epoch_rows.json()['data'][0] == {**rows['data'][0], 'ts': 1767225600}
+
+
+def test_history_streams_ndjson_when_requested(monkeypatch):
+    import json
+
+    import app.routes.market as market
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(market, '_NDJSON_CHUNK_ROWS', 1)
+
+    rows = client.get('/v1/history/AAPL?period=1mo&interval=1d', headers=_auth_headers()).json()['data']
+
+    by_param = client.get('/v1/history/AAPL?period=1mo&interval=1d&stream=true', headers=_auth_headers())
+    by_accept = client.get(
+        '/v1/history/AAPL?period=1mo&interval=1d',
+        headers={**_auth_headers(), 'accept': 'application/x-ndjson'},
+    )
+    for r in (by_param, by_accept):
+        assert r.status_code == 200
+        assert r.headers['content-type'].startswith('application/x-ndjson')
+        assert r.headers['x-history-count'] == '2'
+        assert [json.loads(line) for line in r.text.splitlines()] == rows
+
+    columns = client.get('/v1/history/AAPL?format=columns&stream=true', headers=_auth_headers())
+    assert columns.status_code == 400
+
+
+def test_history_exports_csv_parquet_and_arrow(monkeypatch):
+    import io
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
+
+    csv_by_param = client.get('/v1/history/AAPL?period=1mo&interval=1d&format=csv', headers=_auth_headers())
+    csv_by_accept = client.get('/v1/history/AAPL?period=1mo&interval=1d', headers={**_auth_headers(), 'accept': 'text/csv'})
+    for r in (csv_by_param, csv_by_accept):
+        assert r.status_code == 200
+        assert r.headers['content-type'].startswith('text/csv')
+        assert r.text == (
+            'ts,open,high,low,close,volume\n'
+            '2026-01-01T00:00:00,100.0,102.0,99.0,101.0,1000\n'
+            '2026-01-02T00:00:00,101.0,103.0,100.0,102.0,2000\n'
+        )
+
+    parquet = client.get('/v1/history/AAPL?period=1mo&interval=1d&format=parquet', headers=_auth_headers())
+    assert parquet.status_code == 200
+    assert parquet.headers['content-type'] == 'application/vnd.apache.parquet'
+    table = pq.read_table(io.BytesIO(parquet.content))
+    assert table.column_names == ['ts', 'open', 'high', 'low', 'close', 'volume']
+    assert table.column('close').to_pylist() == [101.0, 102.0]
+    assert table.column('volume').to_pylist() == [1000, 2000]
+
+    arrow = client.get(
+        '/v1/history/AAPL?period=1mo&interval=1d&ts_format=epoch',
+        headers={**_auth_headers(), 'accept': 'application/vnd.apache.arrow.stream'},
+    )
+    assert arrow.status_code == 200
+    table = pa.ipc.open_stream(arrow.content).read_all()
+    assert table.column('ts').to_pylist() == [1767225600, 1767312000]
+    assert table.column('open').to_pylist() == [100.0, 101.0]
+
+
+@pytest.mark.parametrize('query', ['format=table', 'ts_format=ms'])
+def test_history_rejects_unknown_output_formats(query):
+    r = client.get(f'/v1/history/AAPL?period=1mo&interval=1d&{query}', headers=_auth_headers())
+    assert r.status_code == 400
+
+
+@pytest.mark.parametrize('tz', [None, 'America/New_York', 'Asia/Kolkata'])
+def test_history_rows_match_per_row_conversion(tz):
+    import app.routes.market as market
+
+    idx = pd.date_range('2026-03-07', periods=6, freq='12h', tz=tz)
+    df = pd.DataFrame(
+        {
+            'Open': [1.5, float('nan'), 3.0, float('inf'), 5.25, 6.0],
+            'High': [2.0, 3.0, float('-inf'), 5.0, 6.0, 7.0],
+            'Low': [1.0, 2.0, 3.0, 4.0, None, 6.0],
+            'Close': [1.75, 2.5, 3.5, 4.5, 5.5, 6.5],
+            'Volume': [1000.9, float('nan'), 3000, 0, float('inf'), 6000],
+        },
+        index=idx,
+    )
+
+    expected = [
+        {
+            'ts': ts.isoformat(),
+            'open': market._to_finite_float(row.get('Open')),
+            'high': market._to_finite_float(row.get('High')),
+            'low': market._to_finite_float(row.get('Low')),
+            'close': market._to_finite_float(row.get('Close')),
+            'volume': market._to_finite_int(row.get('Volume')),
+        }
+        for ts, row in df.iterrows()
+    ]
+    assert market._history_rows(df) == expected
+
+
+def test_history_reads_persisted_bars_and_fetches_only_the_tail(monkeypatch, tmp_path):
+    import app.routes.market as market
+    from app.bar_store import BarStore
+
+    calls = []
+
+    class RecordingTicker(DummyTicker):
+        def history(self, **kwargs):
+            calls.append(kwargs)
+            return super().history(**kwargs)
+
+    monkeypatch.setattr(market, '_BAR_STORE', BarStore(tmp_path))
+    monkeypatch.setattr(yf, 'Ticker', RecordingTicker)
+    monkeypatch.setattr(market, 'time', type('T', (), {'time': staticmethod(lambda: 1767657600.0)}))
+
+    first = client.get('/v1/history/AAPL?period=max&interval=1d', headers=_auth_headers())
+    assert first.status_code == 200
+    assert calls[0]['period'] == 'max'
+
+    # Restarted worker: empty cache, same bar store.
+    market._CACHE.clear()
+    monkeypatch.setattr(market, '_BAR_STORE', BarStore(tmp_path))
+    second = client.get('/v1/history/AAPL?period=max&interval=1d', headers=_auth_headers())
+    assert second.status_code == 200
+    assert second.json()['data'] == first.json()['data']
+    assert len(calls) == 2
+    assert calls[1]['period'] is None
+    assert calls[1]['start'] is not None
+
+
+def test_quote_field_read_failure_maps_to_502(monkeypatch):
+    monkeypatch.setattr(yf, 'Ticker', InfoGetExplodesTicker)
+    r = client.get('/v1/quote/AAPL', headers=_auth_headers())
+    assert r.status_code == 502
+
+
+def test_fundamentals_field_read_failure_maps_to_502(monkeypatch):
+    monkeypatch.setattr(yf, 'Ticker', InfoGetExplodesTicker)
     r = client.get('/v1/fundamentals/AAPL', headers=_auth_headers())
     assert r.status_code == 502
 
 
-def test_quotes_field_read_failure_maps_to_upstream_error(monkeypatch):
-    import app.routes.market as market
+def test_history_batch_fetches_symbols_concurrently_with_partial_failures(monkeypatch):
+    import time
+
+
+    class WatchlistTicker(DummyTicker):
+        def history(self, **kwargs):
+            time.sleep(0.2)
+            if self.symbol == 'EMPTY':
+                return pd.DataFrame()
+            if self.symbol == 'DOWN':
+                raise RuntimeError('upstream down')
+            return DummyTicker.history(self, **kwargs)
+
+    monkeypatch.setattr(yf, 'Ticker', WatchlistTicker)
+    monkeypatch.setattr(settings, 'market_history_batch_concurrency', 8)
+
+    started = time.monotonic()
+    r = client.get(
+        '/v1/history?symbols=aapl,MSFT,EMPTY,DOWN&period=1mo&interval=1d&format=columns&ts_format=epoch',
+        headers=_auth_headers(),
+    )
+    elapsed = time.monotonic() - started
+
+    assert r.status_code == 200
+    body = r.json()
+    assert elapsed < 0.6
+    assert body['format'] == 'columns'
+    assert body['count'] == 4
+    assert [item['symbol'] for item in body['data']] == ['AAPL', 'MSFT', 'EMPTY', 'DOWN']
+    assert body['data'][0]['ok'] is True
+    assert body['data'][0]['count'] == 2
+    assert body['data'][0]['data']['ts'] == [1767225600, 1767312000]
+    assert body['data'][0]['stale'] is False
+    assert body['data'][2] == {'symbol': 'EMPTY', 'ok': False, 'error': 'unavailable'}
+    assert body['data'][3] == {'symbol': 'DOWN', 'ok': False, 'error': 'upstream_error'}
+
+    single = client.get('/v1/history/MSFT?period=1mo&interval=1d', headers=_auth_headers())
+    assert single.json()['cached'] is True
+
+
+@pytest.mark.parametrize(
+    'query',
+    [
+        'symbols=,,',
+        'symbols=AAPL&period=13mo',
+        'symbols=AAPL&format=csv',
+        'symbols=' + ','.join(f'S{i}' for i in range(26)),
+    ],
+)
+def test_history_batch_rejects_invalid_requests(query):
+    r = client.get(f'/v1/history?{query}', headers=_auth_headers())
+    assert r.status_code == 400
 
-    monkeypatch.setattr(market.yf, 'Ticker', InfoGetExplodesTicker)
+
+def test_quotes_field_read_failure_maps_to_upstream_error(monkeypatch):
+    monkeypatch.setattr(yf, 'Ticker', InfoGetExplodesTicker)
     r = client.get('/v1/quotes?symbols=AAPL,MSFT', headers=_auth_headers())
     assert r.status_code == 200
     body = r.json()
@@ -363,11 +1513,9 @@ def test_quotes_field_read_failure_maps_to_upstream_error(monkeypatch):
 
 
 def test_market_rate_limit_returns_429(monkeypatch):
-    import app.routes.market as market
-
     _reset_rate_limiter_storage()
     monkeypatch.setattr(settings, 'default_rate_limit', '2/minute')
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     first = client.get('/v1/quote/AAPL', headers=_auth_headers())
     second = client.get('/v1/quote/AAPL', headers=_auth_headers())
@@ -379,11 +1527,9 @@ def test_market_rate_limit_returns_429(monkeypatch):
 
 
 def test_rate_limited_market_calls_still_write_usage_logs(monkeypatch):
-    import app.routes.market as market
-
     _reset_rate_limiter_storage()
     monkeypatch.setattr(settings, 'default_rate_limit', '1/minute')
-    monkeypatch.setattr(market.yf, 'Ticker', DummyTicker)
+    monkeypatch.setattr(yf, 'Ticker', DummyTicker)
 
     api_key_id = _master_api_key_id()
     with SessionLocal() as db:
@@ -0,0 +1,168 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.bar_store import BarStore
+
+pytestmark = [pytest.mark.unit]
+
+TZ = 'America/New_York'
+
+
+def _bars(start, periods, freq='B', tz=TZ):
+    idx = pd.date_range(start, periods=periods, freq=freq, tz=tz)
+    values = np.arange(periods, dtype=float)
+    return pd.DataFrame(
+        {
+            'Open': values + 1,
+            'High': values + 2,
+            'Low': values + 0.5,
+            'Close': values + 1.5,
+            'Volume': values * 100,
+        },
+        index=idx,
+    )
+
+
+class FakeUpstream:
+    def __init__(self, frame):
+        self.frame = frame
+        self.calls = []
+
+    def __call__(self, period=None, start=None, end=None):
+        self.calls.append({'period': period, 'start': start, 'end': end})
+        frame = self.frame
+        if start is not None:
+            frame = frame[frame.index >= _market_ts(start).normalize()]
+        if end is not None:
+            frame = frame[frame.index < _market_ts(end)]
+        return frame
+
+
+def _market_ts(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_localize(TZ) if ts.tzinfo is None else ts.tz_convert(TZ)
+
+
+def _now_after(frame):
+    return frame.index[-1].tz_convert('UTC') + pd.Timedelta(hours=20)
+
+
+def test_repeat_history_fetches_only_the_tail(tmp_path):
+    upstream = FakeUpstream(_bars('2025-01-01', 300))
+    store = BarStore(tmp_path)
+    now = _now_after(upstream.frame)
+
+    first = store.load('AAPL', '1d', '1y', None, None, now, upstream)
+    assert upstream.calls == [{'period': '1y', 'start': None, 'end': None}]
+    assert (tmp_path / '1d' / 'AAPL.npy').exists()
+
+    second = BarStore(tmp_path).load('AAPL', '1d', '1y', None, None, now, upstream)
+    assert len(upstream.calls) == 2
+    assert upstream.calls[1]['period'] is None
+    assert pd.Timestamp(upstream.calls[1]['start']) == upstream.frame.index[-1]
+    expected = first[first.index >= now.tz_convert(TZ) - pd.DateOffset(years=1)]
+    assert list(second.index) == list(expected.index)
+    assert second['Close'].tolist() == expected['Close'].tolist()
+    assert second['Volume'].tolist() == expected['Volume'].tolist()
+
+
+def test_session_periods_and_explicit_ranges_are_served_from_store(tmp_path):
+    upstream = FakeUpstream(_bars('2025-01-01', 300))
+    store = BarStore(tmp_path)
+    now = _now_after(upstream.frame)
+    store.load('AAPL', '1d', '1y', None, None, now, upstream)
+
+    last_five = store.load('AAPL', '1d', '5d', None, None, now, upstream)
+    assert list(last_five.index) == list(upstream.frame.index[-5:])
+
+    calls_before = len(upstream.calls)
+    window = store.load('AAPL', '1d', '1mo', date(2025, 3, 3), date(2025, 3, 8), now, upstream)
+    assert len(upstream.calls) == calls_before
+    assert len(window) == 5
+    assert window.index[0] == pd.Timestamp('2025-03-03', tz=TZ)
+
+
+def test_uncovered_range_triggers_full_fetch_and_extends_coverage(tmp_path):
+    upstream = FakeUpstream(_bars('2025-01-01', 300))
+    store = BarStore(tmp_path)
+    now = _now_after(upstream.frame)
+    store.load('AAPL', '1d', '1mo', None, None, now, upstream)
+
+    store.load('AAPL', '1d', 'max', None, None, now, upstream)
+    assert upstream.calls[-1]['period'] == 'max'
+    assert store.read('AAPL', '1d').covers_max is True
+
+    calls_before = len(upstream.calls)
+    store.load('AAPL', '1d', '5y', None, None, now, upstream)
+    assert upstream.calls[-1]['period'] is None
+    assert len(upstream.calls) == calls_before + 1
+
+
+def test_disjoint_older_range_does_not_extend_coverage_across_the_gap(tmp_path):
+    upstream = FakeUpstream(_bars('2019-12-02', 1700))
+    store = BarStore(tmp_path)
+    now = _now_after(upstream.frame)
+    store.load('AAPL', '1d', '1mo', None, None, now, upstream)
+    covered_from = store.read('AAPL', '1d').covered_from
+
+    january = store.load('AAPL', '1d', '1mo', date(2020, 1, 1), date(2020, 2, 1), now, upstream)
+    assert len(january) == 23
+    assert store.read('AAPL', '1d').covered_from == covered_from
+
+    # The year between January 2020 and the last month was never fetched.
+    store.load('AAPL', '1d', '1y', None, None, now, upstream)
+    assert upstream.calls[-1]['period'] == '1y'
+    one_year = store.load('AAPL', '1d', '1y', None, None, now, upstream)
+    assert upstream.calls[-1]['period'] is None
+    expected = upstream.frame[upstream.frame.index >= now.tz_convert(TZ) - pd.DateOffset(years=1)]
+    assert list(one_year.index) == list(expected.index)
+
+
+def test_older_range_ending_at_the_covered_one_extends_coverage(tmp_path):
+    upstream = FakeUpstream(_bars('2025-01-01', 300))
+    store = BarStore(tmp_path)
+    now = _now_after(upstream.frame)
+    store.load('AAPL', '1d', '1mo', None, None, now, upstream)
+    month_start = pd.Timestamp(store.read('AAPL', '1d').covered_from, unit='s', tz='UTC').tz_convert(TZ)
+
+    # Bounded by an explicit end that reaches the covered range, even if its last bar does not.
+    start = (month_start - pd.DateOffset(months=2)).date()
+    store.load('AAPL', '1d', '1mo', start, (month_start + pd.Timedelta(days=1)).date(), now, upstream)
+    assert store.read('AAPL', '1d').covered_from == pd.Timestamp(start, tz=TZ).timestamp()
+
+    calls_before = len(upstream.calls)
+    three_months = store.load('AAPL', '1d', '3mo', None, None, now, upstream)
+    assert len(upstream.calls) == calls_before + 1
+    assert upstream.calls[-1]['period'] is None
+    expected = upstream.frame[upstream.frame.index >= now.tz_convert(TZ) - pd.DateOffset(months=3)]
+    assert list(three_months.index) == list(expected.index)
+
+
+def test_intraday_bars_accumulate_beyond_upstream_retention(tmp_path):
+    store = BarStore(tmp_path)
+    week_one = _bars('2026-01-05 09:30', 5, freq='min')
+    week_two = _bars('2026-01-12 09:30', 5, freq='min')
+    store.merge('AAPL', '1m', week_one, week_one.index[0])
+    store.merge('AAPL', '1m', week_two, week_two.index[0])
+
+    stored = store.read('AAPL', '1m')
+    assert stored.columns.shape == (6, 10)
+    assert stored.covered_from == week_two.index[0].timestamp()
+    assert list(stored.frame().index) == list(week_one.index) + list(week_two.index)
+
+
+def test_later_fetch_wins_for_duplicate_bars(tmp_path):
+    store = BarStore(tmp_path)
+    bars = _bars('2026-01-05', 3)
+    store.merge('AAPL', '1d', bars, bars.index[0])
+
+    revised = bars.iloc[-1:].copy()
+    revised['Close'] = 99.0
+    store.merge('AAPL', '1d', revised, revised.index[0])
+
+    frame = store.read('AAPL', '1d').frame()
+    assert len(frame) == 3
+    assert frame['Close'].iloc[-1] == 99.0
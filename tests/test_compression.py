@@ -0,0 +1,112 @@
+import gzip
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware, choose_encoding
+
+pytestmark = [pytest.mark.unit]
+
+
+@pytest.mark.parametrize(
+    ('accept_encoding', 'brotli_available', 'expected'),
+    [
+        ('gzip, deflate, br', True, 'br'),
+        ('gzip, deflate, br', False, 'gzip'),
+        ('br;q=0, gzip;q=0.5', True, 'gzip'),
+        ('identity', True, None),
+        ('*', True, 'br'),
+        ('*;q=0, gzip', True, 'gzip'),
+        ('', True, None),
+    ],
+)
+def test_choose_encoding_honours_q_values(accept_encoding, brotli_available, expected):
+    assert choose_encoding(accept_encoding, brotli_available) == expected
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500, media_types={'application/json', 'application/x-ndjson'})
+    big = b'{"rows": [' + b','.join(b'{"close": 101.25}' for _ in range(200)) + b']}'
+
+    @app.get('/big')
+    def big_json():
+        return Response(big, media_type='application/json', headers={'ETag': '"v1"'})
+
+    @app.get('/small')
+    def small_json():
+        return Response(b'{"ok": true}', media_type='application/json')
+
+    @app.get('/binary')
+    def binary():
+        return Response(b'\x00' * 5000, media_type='application/vnd.apache.parquet')
+
+    @app.get('/text')
+    def text():
+        return PlainTextResponse('x' * 5000)
+
+    @app.get('/stream')
+    def stream():
+        chunks = (b''.join(b'{"n": %d}\n' % i for i in range(start, start + 50)) for start in range(0, 300, 50))
+        return StreamingResponse(chunks, media_type='application/x-ndjson')
+
+    @app.get('/small-stream')
+    def small_stream():
+        # The shape BaseHTTPMiddleware gives every body: one chunk, then an empty terminator.
+        return StreamingResponse(iter([b'{"ok": true}', b'']), media_type='application/json')
+
+    return app, big
+
+
+def test_middleware_compresses_allowlisted_bodies_over_the_threshold():
+    app, big = _app()
+    client = TestClient(app)
+
+    raw = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+    assert raw.headers['Content-Encoding'] == 'gzip'
+    assert raw.headers['Vary'] == 'Accept-Encoding'
+    assert raw.headers['ETag'] == 'W/"v1"'
+    assert int(raw.headers['Content-Length']) < len(big)
+    assert raw.content == big
+
+    br = client.get('/big', headers={'Accept-Encoding': 'br'})
+    assert br.headers['Content-Encoding'] == 'br'
+    assert br.content == big
+
+    identity = client.get('/big', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in identity.headers
+    assert identity.headers['ETag'] == '"v1"'
+
+    for path in ('/small', '/binary', '/text'):
+        r = client.get(path, headers={'Accept-Encoding': 'gzip, br'})
+        assert 'Content-Encoding' not in r.headers
+    assert client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers['Vary'] == 'Accept-Encoding'
+
+
+def test_middleware_buffers_small_chunked_bodies_to_apply_the_threshold():
+    app, _ = _app()
+    client = TestClient(app)
+
+    r = client.get('/small-stream', headers={'Accept-Encoding': 'gzip, br'})
+    assert 'Content-Encoding' not in r.headers
+    assert r.headers['Content-Length'] == str(len(b'{"ok": true}'))
+    assert r.content == b'{"ok": true}'
+
+
+@pytest.mark.parametrize('encoding', ['gzip', 'br'])
+def test_middleware_compresses_streamed_bodies_incrementally(encoding):
+    app, _ = _app()
+    client = TestClient(app)
+    expected = b''.join(b'{"n": %d}\n' % i for i in range(300))
+
+    with client.stream('GET', '/stream', headers={'Accept-Encoding': encoding}) as r:
+        assert r.headers['Content-Encoding'] == encoding
+        assert 'Content-Length' not in r.headers
+        compressed = b''.join(r.iter_raw())
+
+    decoded = gzip.decompress(compressed) if encoding == 'gzip' else brotli.decompress(compressed)
+    assert decoded == expected
+    assert len(compressed) < len(expected)
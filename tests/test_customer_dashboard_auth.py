@@ -2,6 +2,7 @@ from uuid import uuid4
 
 import pytest
 from fastapi.testclient import TestClient
+import yfinance as yf
 
 from app.db import SessionLocal
 from app.main import app
@@ -301,8 +302,6 @@ def test_customer_dashboard_activity_is_tenant_scoped():
 
 @pytest.mark.e2e
 def test_customer_dashboard_rotated_and_reactivated_key_controls_market_access(monkeypatch):
-    import app.routes.market as market
-
     class DummyTicker:
         def __init__(self, symbol: str):
             self.symbol = symbol
@@ -315,7 +314,7 @@ def test_customer_dashboard_rotated_and_reactivated_key_controls_market_access(m
                 "lastPrice": 211.0,
             }
 
-    monkeypatch.setattr(market.yf, "Ticker", DummyTicker)
+    monkeypatch.setattr(yf, "Ticker", DummyTicker)
 
     email = _new_email()
     token = _register(email)
@@ -377,8 +376,6 @@ def test_customer_dashboard_rotated_and_reactivated_key_controls_market_access(m
 
 
 def test_customer_dashboard_overview_and_metrics_use_real_usage_data(monkeypatch):
-    import app.routes.market as market
-
     class DummyTicker:
         def __init__(self, symbol: str):
             self.symbol = symbol
@@ -397,7 +394,7 @@ def test_customer_dashboard_overview_and_metrics_use_real_usage_data(monkeypatch
                 "marketCap": 1000000000,
             }
 
-    monkeypatch.setattr(market.yf, "Ticker", DummyTicker)
+    monkeypatch.setattr(yf, "Ticker", DummyTicker)
 
     email = _new_email()
     token = _register(email)
@@ -438,8 +435,6 @@ def test_customer_dashboard_overview_and_metrics_use_real_usage_data(monkeypatch
 
 
 def test_customer_dashboard_activity_uses_db_events(monkeypatch):
-    import app.routes.market as market
-
     class DummyTicker:
         def __init__(self, symbol: str):
             self.symbol = symbol
@@ -452,7 +447,7 @@ def test_customer_dashboard_activity_uses_db_events(monkeypatch):
                 "lastPrice": 99.5,
             }
 
-    monkeypatch.setattr(market.yf, "Ticker", DummyTicker)
+    monkeypatch.setattr(yf, "Ticker", DummyTicker)
 
     email = _new_email()
     token = _register(email)
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.db import build_engine
+from app.fundamentals_store import FundamentalsStore
+
+pytestmark = [pytest.mark.unit]
+
+
+@pytest.fixture
+def store(tmp_path):
+    # No create_all here: the store creates its table on first use, as it must for
+    # databases that predate it.
+    engine = build_engine(f"sqlite:///{tmp_path / 'fundamentals.db'}")
+    return FundamentalsStore(
+        default_ttl_seconds=100,
+        field_ttls={'sector': 1000},
+        session_factory=sessionmaker(bind=engine, expire_on_commit=False),
+    )
+
+
+def test_store_round_trips_and_tracks_per_field_freshness(store):
+    assert store.get('AAPL', ['sector', 'beta'], 0.0) == (None, 0.0)
+
+    store.put('AAPL', {'symbol': 'AAPL', 'sector': 'Technology', 'beta': 1.1}, 500.0)
+    assert store.get('AAPL', ['sector', 'beta'], 550.0) == ({'symbol': 'AAPL', 'sector': 'Technology', 'beta': 1.1}, 600.0)
+    assert store.get('AAPL', ['sector'], 650.0)[1] == 1500.0
+
+    store.put('AAPL', {'symbol': 'AAPL', 'beta': 1.2}, 700.0)
+    payload, fresh_until = store.get('AAPL', ['sector', 'beta'], 700.0)
+    assert payload['beta'] == 1.2
+    assert fresh_until == 800.0
+
+    stats = store.stats()
+    assert stats['symbols'] == 1
+    assert stats['writes'] == 2
+    assert stats['fresh_hits'] == 3
+
+
+def test_store_lists_symbols_with_fields_fetched_before_a_cutoff(store):
+    store.put('OLD', {'symbol': 'OLD', 'beta': 1.0}, 100.0)
+    store.put('NEW', {'symbol': 'NEW', 'beta': 1.0}, 900.0)
+    store.put('MIXED', {'symbol': 'MIXED', 'sector': 'Energy'}, 50.0)
+    store.put('MIXED', {'symbol': 'MIXED', 'beta': 1.0}, 900.0)
+
+    assert store.symbols_fetched_before(500.0) == ['MIXED', 'OLD']
+    store.clear()
+    assert store.symbols_fetched_before(500.0) == []
+
+
+def test_store_fails_open_when_the_database_is_unavailable():
+    def broken_session():
+        return sessionmaker(bind=build_engine('sqlite:////nonexistent-dir/fundamentals.db'))()
+
+    store = FundamentalsStore(default_ttl_seconds=100, session_factory=broken_session)
+    store.put('AAPL', {'symbol': 'AAPL', 'beta': 1.0}, 0.0)
+    assert store.get('AAPL', ['beta'], 0.0) == (None, 0.0)
+    assert store.symbols_fetched_before(10.0) == []
+    assert store.stats()['errors'] == 3
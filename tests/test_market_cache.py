@@ -0,0 +1,105 @@
+import pytest
+
+from app.market_cache import MarketCache, approx_size
+
+pytestmark = [pytest.mark.unit]
+
+
+def _set(cache, key, now, payload=None, ttl=30, stale_window=300):
+    cache.set(key, payload or {'symbol': key}, now, ttl=ttl, stale_window=stale_window)
+
+
+def test_fresh_stale_and_expired_reads_are_counted():
+    cache = MarketCache(max_entries=10, max_bytes=1_000_000)
+    _set(cache, 'quote:AAPL', 1000.0)
+
+    assert cache.get('quote:AAPL', 1010.0) == ({'symbol': 'quote:AAPL'}, False)
+    assert cache.get('quote:AAPL', 1100.0) == ({'symbol': 'quote:AAPL'}, True)
+    assert cache.get('quote:AAPL', 1400.0) == (None, False)
+    assert cache.get('quote:MSFT', 1400.0) == (None, False)
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['stale_hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['expirations'] == 1
+    assert stats['entries'] == 0
+    assert stats['bytes'] == 0
+
+
+def test_fresh_for_reports_remaining_ttl_without_counting_a_read():
+    cache = MarketCache(max_entries=10, max_bytes=1_000_000)
+    _set(cache, 'quote:AAPL', 1000.0)
+
+    assert cache.fresh_for('quote:AAPL', 1010.0) == 20.0
+    assert cache.fresh_for('quote:AAPL', 1100.0) == 0.0
+    assert cache.fresh_for('quote:MSFT', 1000.0) == 0.0
+    assert cache.stats()['hits'] == 0
+    assert cache.stats()['misses'] == 0
+
+
+def test_get_entry_returns_the_payload_with_its_version():
+    cache = MarketCache(max_entries=10, max_bytes=1_000_000)
+    assert cache.get_entry('quote:AAPL', 1000.0) == (None, False)
+
+    _set(cache, 'quote:AAPL', 1000.0)
+    first, is_stale = cache.get_entry('quote:AAPL', 1010.0)
+    _set(cache, 'quote:AAPL', 1040.0)
+    second, _ = cache.get_entry('quote:AAPL', 1080.0)
+
+    assert (first.created_at, first.fresh_until, is_stale) == (1000.0, 1030.0, False)
+    assert (second.created_at, second.fresh_until) == (1040.0, 1070.0)
+    assert second.payload is not first.payload
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['stale_hits'] == 1
+
+
+def test_delete_removes_an_entry_and_its_bytes():
+    cache = MarketCache(max_entries=10, max_bytes=1_000_000)
+    _set(cache, 'quote:AAPL', 1000.0)
+
+    assert cache.delete('quote:AAPL') is True
+    assert cache.delete('quote:AAPL') is False
+    assert 'quote:AAPL' not in cache
+    assert cache.stats()['bytes'] == 0
+
+
+def test_entry_cap_evicts_least_recently_used():
+    cache = MarketCache(max_entries=2, max_bytes=1_000_000)
+    _set(cache, 'quote:AAPL', 1000.0)
+    _set(cache, 'quote:MSFT', 1000.0)
+    cache.get('quote:AAPL', 1001.0)
+    _set(cache, 'quote:TSLA', 1002.0)
+
+    assert 'quote:AAPL' in cache
+    assert 'quote:MSFT' not in cache
+    assert 'quote:TSLA' in cache
+    assert cache.stats()['evictions'] == 1
+
+
+def test_byte_cap_evicts_and_rejects_oversized_payloads():
+    payload = {'data': ['x' * 100 for _ in range(10)]}
+    size = approx_size(payload)
+    cache = MarketCache(max_entries=100, max_bytes=size * 2)
+
+    _set(cache, 'history:A', 1000.0, payload)
+    _set(cache, 'history:B', 1000.0, payload)
+    _set(cache, 'history:C', 1000.0, payload)
+    assert len(cache) == 2
+    assert cache.stats()['bytes'] <= size * 2
+
+    _set(cache, 'history:HUGE', 1000.0, {'data': ['x' * 100 for _ in range(100)]})
+    assert 'history:HUGE' not in cache
+
+
+def test_capacity_pressure_purges_expired_before_evicting_live_entries():
+    cache = MarketCache(max_entries=2, max_bytes=1_000_000)
+    _set(cache, 'quote:OLD', 1000.0)
+    _set(cache, 'quote:LIVE', 1500.0)
+    _set(cache, 'quote:NEW', 1500.0)
+
+    assert 'quote:OLD' not in cache
+    assert 'quote:LIVE' in cache
+    stats = cache.stats()
+    assert stats['expirations'] == 1
+    assert stats['evictions'] == 0
@@ -0,0 +1,64 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.prewarm import CachePrewarmer, SymbolDemand, seconds_until_utc_hour
+
+pytestmark = [pytest.mark.unit]
+
+
+def test_symbol_demand_ranks_and_bounds_tracked_symbols():
+    demand = SymbolDemand(max_tracked=4)
+    demand.record(['AAPL', 'MSFT', 'AAPL'])
+    demand.record(['TSLA', 'AAPL', 'MSFT'])
+
+    assert demand.top(2) == ['AAPL', 'MSFT']
+    assert demand.top(0) == []
+
+    demand.record(['A', 'B', 'C'])
+    assert demand.top(10)[:2] == ['AAPL', 'MSFT']
+    assert len(demand.top(10)) <= 4
+
+
+def test_prewarmer_counts_failures_and_refreshes_on_interval():
+    warmed = []
+    lock = threading.Lock()
+    cycles = threading.Event()
+
+    def warm(symbol):
+        with lock:
+            warmed.append(symbol)
+            if len(warmed) >= 6:
+                cycles.set()
+        if symbol == 'DOWN':
+            raise RuntimeError('upstream down')
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        prewarmer = CachePrewarmer(
+            warm=warm,
+            symbols=lambda: ['AAPL', 'MSFT', 'DOWN'],
+            interval_seconds=0.05,
+            executor=executor,
+            concurrency=2,
+            timeout_seconds=5,
+        )
+        assert prewarmer.run_once() == {'symbols': 3, 'failed': 1}
+
+        prewarmer.start()
+        assert cycles.wait(timeout=5)
+        prewarmer.stop()
+
+    stats = prewarmer.stats()
+    assert stats['running'] is False
+    assert stats['cycles'] >= 2
+    assert stats['failed'] >= 2
+    assert stats['warmed'] >= 4
+    assert stats['last_symbols'] == 3
+
+
+def test_seconds_until_utc_hour_rolls_over_to_the_next_day():
+    midnight = 1_767_225_600.0  # 2026-01-01T00:00:00Z
+    assert seconds_until_utc_hour(4, midnight) == 4 * 3600
+    assert seconds_until_utc_hour(4, midnight + 4 * 3600) == 24 * 3600
+    assert seconds_until_utc_hour(4, midnight + 5 * 3600 + 30) == 23 * 3600 - 30
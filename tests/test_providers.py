@@ -0,0 +1,131 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+import requests
+
+from app.bar_store import BarStore
+from app.providers import SyntheticProvider, SyntheticUpstreamError, YFinanceProvider, build_provider
+
+pytestmark = [pytest.mark.unit]
+
+NOW = 1_767_286_800.0  # 2026-01-01T17:00:00Z, 12:00 in New York
+
+
+def _provider(**kwargs):
+    return SyntheticProvider(clock=lambda: NOW, **kwargs)
+
+
+def test_synthetic_provider_is_deterministic_across_instances_and_windows():
+    first, second = _provider(), _provider()
+    assert first.quote('AAPL') == second.quote('AAPL')
+    assert first.fundamentals('AAPL') == second.fundamentals('AAPL')
+    assert first.quote('AAPL') != first.quote('MSFT')
+    assert _provider(seed=1).quote('AAPL') != first.quote('AAPL')
+
+    five_years = first.history('AAPL', '5y', '1d', None, None)
+    one_month = second.history('AAPL', '1mo', '1d', None, None)
+    assert len(five_years) > 1200
+    assert five_years.loc[one_month.index].equals(one_month)
+    assert (five_years['High'] >= five_years[['Open', 'Close']].max(axis=1)).all()
+    assert (five_years['Low'] <= five_years[['Open', 'Close']].min(axis=1)).all()
+
+
+@pytest.mark.parametrize(
+    ('period', 'interval', 'min_bars', 'max_bars'),
+    [('5d', '1m', 3 * 390, 5 * 390), ('1mo', '1h', 100, 160), ('1y', '1wk', 52, 53), ('ytd', '1d', 1, 1)],
+)
+def test_synthetic_history_covers_the_requested_period_and_interval(period, interval, min_bars, max_bars):
+    df = _provider().history('AAPL', period, interval, None, None)
+    assert list(df.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+    assert str(df.index.tz) == 'America/New_York'
+    assert df.index.is_monotonic_increasing
+    assert min_bars <= len(df) <= max_bars
+    if interval in {'1m', '1h'}:
+        minutes = df.index.hour * 60 + df.index.minute
+        assert minutes.min() >= 570 and df.index.hour.max() < 16
+
+
+def test_synthetic_history_honours_explicit_start_and_exclusive_end():
+    df = _provider().history('AAPL', None, '1d', date(2025, 1, 6), date(2025, 1, 13))
+    assert [ts.date().isoformat() for ts in df.index] == [
+        '2025-01-06',
+        '2025-01-07',
+        '2025-01-08',
+        '2025-01-09',
+        '2025-01-10',
+    ]
+
+
+def test_synthetic_unknown_symbols_come_back_empty():
+    provider = _provider(unknown_symbols=frozenset({'GONE'}))
+    assert provider.quote('GONE') == {}
+    assert provider.fundamentals('GONE') == {}
+    assert provider.history('GONE', '1mo', '1d', None, None).empty
+    assert set(provider.quotes(['AAPL', 'GONE'], timeout=1.0)) == {'AAPL'}
+
+
+def test_synthetic_latency_and_failure_rate_are_applied_per_call():
+    sleeps = []
+    provider = _provider(latency_seconds=0.05, jitter_seconds=0.01, failure_rate=0.25, seed=3, sleep=sleeps.append)
+
+    failures = 0
+    for _ in range(400):
+        try:
+            provider.quote('AAPL')
+        except SyntheticUpstreamError:
+            failures += 1
+
+    assert 60 < failures < 140
+    assert len(sleeps) == 400
+    assert all(0.05 <= delay <= 0.06 for delay in sleeps)
+    assert provider.stats() == {
+        'name': 'synthetic',
+        'latency_seconds': 0.05,
+        'jitter_seconds': 0.01,
+        'failure_rate': 0.25,
+        'calls': 400,
+        'failures': failures,
+    }
+
+
+def test_build_provider_selects_by_name():
+    session = requests.Session()
+    yahoo = build_provider('yfinance', session=session)
+    assert isinstance(yahoo, YFinanceProvider)
+    assert yahoo.session is session
+
+    synthetic = build_provider(' Synthetic ', session=session, synthetic_failure_rate=0.5, synthetic_unknown_symbols='bad, gone')
+    assert isinstance(synthetic, SyntheticProvider)
+    assert synthetic.failure_rate == 0.5
+    assert synthetic.unknown_symbols == frozenset({'BAD', 'GONE'})
+
+    with pytest.raises(ValueError, match='MARKET_DATA_PROVIDER'):
+        build_provider('bloomberg', session=session)
+
+
+@pytest.mark.parametrize(('interval', 'period'), [('1d', '1mo'), ('1m', '5d')])
+def test_synthetic_history_extends_a_bar_store_through_its_aware_tail_fetch(tmp_path, interval, period):
+    clock = {'now': NOW}
+    provider = SyntheticProvider(clock=lambda: clock['now'])
+    store = BarStore(tmp_path)
+    calls = []
+
+    def fetch(period=None, start=None, end=None):
+        calls.append(start)
+        return provider.history('AAPL', period, interval, start, end)
+
+    def load():
+        now = pd.Timestamp(clock['now'], unit='s', tz='UTC')
+        return store.load('AAPL', interval, period, None, None, now, fetch)
+
+    first = load()
+    clock['now'] += 86400
+    second = load()
+
+    assert calls[0] is None
+    assert calls[1].tzinfo is not None
+    assert len(calls) == 2  # the tail fetch succeeded, no full refetch
+    assert second.index[-1] > first.index[-1]
+    expected = provider.history('AAPL', None, interval, first.index[0].date(), None)
+    assert second['Close'].equals(expected.loc[second.index, 'Close'])
@@ -0,0 +1,50 @@
+import json
+from datetime import UTC, date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.responses import FastJSONResponse, dumps
+from app.routes.market import _to_finite_float
+
+pytestmark = [pytest.mark.unit]
+
+
+def test_dumps_maps_non_finite_floats_to_null_like_to_finite_float():
+    values = [1.5, float('nan'), float('inf'), -float('inf'), np.float64('nan'), np.float32(2.5), None]
+
+    assert json.loads(dumps(values)) == [_to_finite_float(v) for v in values]
+    assert json.loads(dumps(np.array([1.0, np.nan]))) == [1.0, None]
+
+
+def test_dumps_serializes_datetimes_and_numpy_scalars_natively():
+    content = {
+        'when': datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC),
+        'day': date(2024, 1, 2),
+        'bar': pd.Timestamp('2024-01-02 09:30', tz='America/New_York'),
+        'volume': np.int64(1_000),
+        'flag': np.bool_(True),
+        'price': Decimal('1.25'),
+        1: 'non-str key',
+    }
+
+    assert json.loads(dumps(content)) == {
+        'when': '2024-01-02T03:04:05+00:00',
+        'day': '2024-01-02',
+        'bar': '2024-01-02T09:30:00-05:00',
+        'volume': 1000,
+        'flag': True,
+        'price': 1.25,
+        '1': 'non-str key',
+    }
+
+
+def test_fast_json_response_renders_compact_json():
+    response = FastJSONResponse({'symbol': 'AAPL', 'price': float('nan')}, headers={'ETag': '"v1"'})
+
+    assert response.body == b'{"symbol":"AAPL","price":null}'
+    assert response.media_type == 'application/json'
+    assert response.headers['ETag'] == '"v1"'
+    assert response.headers['Content-Length'] == str(len(response.body))
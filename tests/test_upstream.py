@@ -0,0 +1,440 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.upstream import (
+    CircuitBreaker,
+    CircuitOpenError,
+    MeteredThreadPoolExecutor,
+    SingleFlight,
+    UpstreamBusyError,
+    UpstreamGovernor,
+    amap_bounded,
+    map_bounded,
+)
+
+pytestmark = [pytest.mark.unit]
+
+
+def _run_concurrently(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def worker(index):
+        try:
+            results[index] = target()
+        except Exception as exc:
+            errors[index] = exc
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results, errors
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'symbol': 'AAPL'}
+
+    results, errors = _run_concurrently(10, lambda: flight.do('quote:AAPL', fetch))
+
+    assert calls == [1]
+    assert errors == [None] * 10
+    assert all(result == {'symbol': 'AAPL'} for result in results)
+    assert flight.stats() == {'in_flight': 0, 'coalesced': 9}
+
+
+def test_single_flight_shares_errors_and_allows_retry():
+    flight = SingleFlight()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        time.sleep(0.2)
+        raise RuntimeError('upstream down')
+
+    results, errors = _run_concurrently(5, lambda: flight.do('quote:AAPL', failing))
+
+    assert calls == [1]
+    assert all(isinstance(err, RuntimeError) for err in errors)
+    assert flight.do('quote:AAPL', lambda: 'recovered') == 'recovered'
+
+
+def test_single_flight_keys_are_independent():
+    flight = SingleFlight()
+    assert flight.do('quote:AAPL', lambda: 1) == 1
+    assert flight.do('quote:MSFT', lambda: 2) == 2
+
+
+def test_single_flight_submit_runs_one_background_call_per_key():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def refresh():
+        calls.append(1)
+        release.wait(timeout=5)
+        return 'fresh'
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        started = [flight.submit(executor, 'quote:AAPL', refresh) for _ in range(5)]
+        waiter = executor.submit(flight.do, 'quote:AAPL', lambda: 'unused')
+        release.set()
+        assert waiter.result(timeout=5) == 'fresh'
+
+    assert started == [True, False, False, False, False]
+    assert calls == [1]
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_single_flight_do_batch_leads_new_keys_and_joins_in_flight_ones():
+    flight = SingleFlight()
+    batches = []
+    release = threading.Event()
+
+    def fetch(keys):
+        batches.append(keys)
+        return {key: key.upper() for key in keys if key != 'gone'}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        single = executor.submit(flight.do, 'aapl', lambda: release.wait(timeout=5) and 'AAPL-single')
+        deadline = time.monotonic() + 5
+        while not flight.stats()['in_flight'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        futures = flight.do_batch(['aapl', 'msft', 'gone', 'msft'], fetch, missing=LookupError)
+        assert futures['msft'].result() == 'MSFT'
+        assert isinstance(futures['gone'].exception(), LookupError)
+        assert flight.do('msft', lambda: 'refetched') == 'refetched'
+        release.set()
+        assert futures['aapl'].result(timeout=5) == 'AAPL-single'
+        assert single.result(timeout=5) == 'AAPL-single'
+
+    assert batches == [['msft', 'gone']]
+    assert flight.stats() == {'in_flight': 0, 'coalesced': 1}
+
+    def down(keys):
+        raise RuntimeError('batch endpoint down')
+
+    failed = flight.do_batch(['aapl', 'msft'], down, missing=LookupError)
+    assert all(isinstance(future.exception(), RuntimeError) for future in failed.values())
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_map_bounded_runs_concurrently_within_limit():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work(item):
+        with lock:
+            active.append(item)
+            peak.append(len(active))
+        time.sleep(0.1)
+        with lock:
+            active.remove(item)
+        if item == 3:
+            raise ValueError('bad item')
+        return item * 10
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        started = time.monotonic()
+        outcomes = map_bounded(executor, work, list(range(8)), limit=4, timeout=5)
+        elapsed = time.monotonic() - started
+
+    assert max(peak) <= 4
+    assert elapsed < 0.6
+    assert [result for result, _ in outcomes] == [0, 10, 20, None, 40, 50, 60, 70]
+    assert isinstance(outcomes[3][1], ValueError)
+
+
+def test_map_bounded_times_out_slow_items():
+    def work(item):
+        if item == 'slow':
+            time.sleep(1)
+        return item
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        started = time.monotonic()
+        outcomes = map_bounded(executor, work, ['fast', 'slow'], limit=2, timeout=0.2)
+        elapsed = time.monotonic() - started
+
+    assert elapsed < 0.8
+    assert outcomes[0] == ('fast', None)
+    assert isinstance(outcomes[1][1], TimeoutError)
+
+
+def test_amap_bounded_awaits_items_within_limit_and_timeout():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work(item):
+        with lock:
+            active.append(item)
+            peak.append(len(active))
+        time.sleep(1 if item == 'slow' else 0.1)
+        with lock:
+            active.remove(item)
+        if item == 'bad':
+            raise ValueError('bad item')
+        return item
+
+    items = ['a', 'b', 'bad', 'c', 'slow', 'd']
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        started = time.monotonic()
+        outcomes = asyncio.run(amap_bounded(executor, work, items, limit=3, timeout=0.3))
+        elapsed = time.monotonic() - started
+
+    assert max(peak) <= 3
+    assert elapsed < 0.8
+    assert [result for result, _ in outcomes] == ['a', 'b', None, 'c', None, 'd']
+    assert isinstance(outcomes[2][1], ValueError)
+    assert isinstance(outcomes[4][1], TimeoutError)
+
+
+def test_metered_executor_reports_saturation_and_queue_waits():
+    release = threading.Event()
+    executor = MeteredThreadPoolExecutor(max_workers=2, thread_name_prefix='metered')
+    try:
+        running = [executor.submit(release.wait, 5) for _ in range(2)]
+        queued = [executor.submit(lambda: 'done') for _ in range(2)]
+        deadline = time.monotonic() + 5
+        while executor.stats()['active'] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        busy = executor.stats()
+        assert busy['active'] == 2
+        assert busy['queued'] == 2
+        assert busy['saturation'] == 1.0
+
+        assert queued[1].cancel()
+        time.sleep(0.05)
+        release.set()
+        assert [future.result(timeout=5) for future in running] == [True, True]
+        assert queued[0].result(timeout=5) == 'done'
+    finally:
+        executor.shutdown(wait=True)
+
+    stats = executor.stats()
+    assert stats['active'] == 0
+    assert stats['queued'] == 0
+    assert stats['completed'] == 3
+    assert stats['peak_queued'] >= 2
+    assert stats['max_queue_wait_seconds'] >= 0.05
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(clock, **overrides):
+    options = {
+        'failure_ratio': 0.5,
+        'min_calls': 4,
+        'window': 10,
+        'open_seconds': 30,
+        'slow_call_seconds': 2,
+        'ignored': (LookupError,),
+        'clock': clock,
+    }
+    options.update(overrides)
+    return CircuitBreaker(**options)
+
+
+def _fail():
+    raise RuntimeError('upstream down')
+
+
+def test_circuit_breaker_opens_on_error_ratio_and_fails_fast():
+    clock = _FakeClock()
+    breaker = _breaker(clock)
+
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.call(lambda: 'ok') == 'ok'
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(_fail)
+
+    calls = []
+    clock.now += 10
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.call(lambda: calls.append(1))
+
+    assert calls == []
+    assert excinfo.value.retry_after == pytest.approx(20)
+    stats = breaker.stats()
+    assert stats['state'] == 'open'
+    assert stats['trips'] == 1
+    assert stats['rejected'] == 1
+
+
+def test_circuit_breaker_counts_slow_calls_but_not_ignored_errors():
+    clock = _FakeClock()
+    breaker = _breaker(clock)
+
+    def slow():
+        clock.now += 3
+        return 'slow'
+
+    def not_found():
+        raise LookupError('no such symbol')
+
+    for _ in range(4):
+        with pytest.raises(LookupError):
+            breaker.call(not_found)
+    assert breaker.stats()['state'] == 'closed'
+
+    for _ in range(3):
+        breaker.call(slow)
+    assert breaker.stats()['state'] == 'closed'
+    breaker.call(slow)
+    assert breaker.stats()['state'] == 'open'
+
+
+def test_circuit_breaker_half_open_probe_closes_or_reopens():
+    clock = _FakeClock()
+    breaker = _breaker(clock, min_calls=1)
+
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+    clock.now += 30
+    assert breaker.stats()['state'] == 'half_open'
+
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+    assert breaker.stats()['state'] == 'open'
+    assert breaker.stats()['trips'] == 2
+
+    clock.now += 30
+    release = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        probe = executor.submit(breaker.call, lambda: release.wait(timeout=5) and 'recovered')
+        deadline = time.monotonic() + 5
+        while not breaker._probe_in_flight and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: 'second probe')
+        release.set()
+        assert probe.result(timeout=5) == 'recovered'
+
+    assert breaker.stats()['state'] == 'closed'
+    assert breaker.call(lambda: 'ok') == 'ok'
+
+
+def test_governor_caps_in_flight_calls_and_queues_the_rest():
+    governor = UpstreamGovernor(max_in_flight=2, rate_per_second=0, burst=1, max_wait_seconds=5)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.1)
+        with lock:
+            active.pop()
+        return 'ok'
+
+    results, errors = _run_concurrently(6, lambda: governor.call(work))
+
+    assert errors == [None] * 6
+    assert max(peak) == 2
+    stats = governor.stats()
+    assert stats['calls'] == 6
+    assert stats['in_flight'] == 0
+    assert stats['queued'] == 0
+    assert stats['max_wait_seconds'] >= 0.15
+
+
+def test_governor_token_bucket_paces_calls_after_the_burst():
+    governor = UpstreamGovernor(max_in_flight=0, rate_per_second=20, burst=2, max_wait_seconds=5)
+
+    started = time.monotonic()
+    for _ in range(6):
+        governor.call(lambda: None)
+    elapsed = time.monotonic() - started
+
+    # Two calls ride the burst, the other four wait ~50ms each for a token.
+    assert 0.15 <= elapsed < 0.6
+
+
+def test_governor_rejects_calls_that_wait_too_long():
+    governor = UpstreamGovernor(max_in_flight=1, rate_per_second=0, burst=1, max_wait_seconds=0.1)
+    release = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        holder = executor.submit(governor.call, lambda: release.wait(timeout=5))
+        deadline = time.monotonic() + 5
+        while governor.stats()['in_flight'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with pytest.raises(UpstreamBusyError):
+            governor.call(lambda: 'never')
+        release.set()
+        holder.result(timeout=5)
+
+    assert governor.stats()['rejected'] == 1
+    assert governor.call(lambda: 'ok') == 'ok'
+
+
+def test_market_read_through_coalesces_cache_misses(monkeypatch):
+    import app.routes.market as market
+
+    market._CACHE.clear()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'symbol': 'AAPL', 'last_price': 1.0}
+
+    results, errors = _run_concurrently(8, lambda: market._read_through('quote:AAPL', fetch))
+    market._CACHE.clear()
+
+    assert calls == [1]
+    assert errors == [None] * 8
+    assert all(payload['symbol'] == 'AAPL' and stale is False for payload, stale, _, _ in results)
+
+
+def test_circuit_breaker_checks_admission_before_the_gate_and_times_only_fn():
+    clock = _FakeClock()
+    breaker = _breaker(clock, min_calls=1)
+    gated = []
+
+    def gate(fn):
+        gated.append(1)
+        clock.now += 5  # queue wait, not upstream latency
+        return fn()
+
+    assert breaker.call(lambda: 'ok', gate=gate) == 'ok'
+    assert breaker.stats()['state'] == 'closed'
+
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail, gate=gate)
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 'ok', gate=gate)
+    assert len(gated) == 2
+
+    def busy(fn):
+        raise UpstreamBusyError(retry_after=1)
+
+    clock.now += 30
+    with pytest.raises(UpstreamBusyError):
+        breaker.call(lambda: 'ok', gate=busy)
+    assert breaker.stats()['state'] == 'half_open'
+    assert breaker.call(lambda: 'recovered', gate=gate) == 'recovered'
+    assert breaker.stats()['state'] == 'closed'
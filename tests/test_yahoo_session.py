@@ -0,0 +1,53 @@
+import pytest
+from yfinance.data import YfData
+
+from app.yahoo_session import YahooSession, build_session
+
+pytestmark = [pytest.mark.unit]
+
+
+@pytest.fixture
+def restore_yf_session():
+    original = YfData(session=None)._session
+    yield
+    YfData(session=original)
+
+
+def test_build_session_sizes_the_connection_pool():
+    session = build_session(pool_size=48)
+    adapter = session.get_adapter('https://query1.finance.yahoo.com/v7/finance/quote')
+    assert adapter._pool_maxsize == 48
+
+
+def test_install_shares_one_session_with_every_ticker(restore_yf_session):
+    import yfinance as yf
+
+    yahoo = YahooSession(pool_size=16, crumb_refresh_seconds=3600)
+    yahoo.install()
+
+    assert yf.Ticker('AAPL')._data._session is yahoo.session
+    assert yf.Ticker('MSFT')._data._session is yahoo.session
+    assert yahoo.stats()['installed'] is True
+
+
+def test_refresh_crumb_fetches_once_per_interval_and_counts_failures(monkeypatch, restore_yf_session):
+    calls = []
+    crumbs = ['crumb-1', 'crumb-2', None]
+
+    def fake_get_cookie_and_crumb(self, proxy=None, timeout=30):
+        calls.append(timeout)
+        return None, crumbs[len(calls) - 1], 'basic'
+
+    monkeypatch.setattr(YfData, '_get_cookie_and_crumb', fake_get_cookie_and_crumb)
+    yahoo = YahooSession(pool_size=4, crumb_refresh_seconds=3600)
+
+    assert yahoo.refresh_crumb() is True
+    assert yahoo.refresh_crumb() is True
+    assert len(calls) == 1
+
+    assert yahoo.refresh_crumb(force=True) is True
+    assert yahoo.refresh_crumb(force=True) is False
+    stats = yahoo.stats()
+    assert stats['crumb_refreshes'] == 2
+    assert stats['crumb_errors'] == 1
+    assert stats['crumb_age_seconds'] is not None